@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Time FileTree updates against rebuilding the tree on every snapshot.
+
+Usage:
+    python benchmarks/bench_file_tree.py [--files N] [--repeat N]
+
+A headless app shows only the file tree. Synthetic snapshots with N changed
+files (50k by default) are applied in turn: the first load, the same status
+again, one file edited, 100 files staged, and every modified file staged.
+Each step is timed until the screen has been redrawn: with the
+clear-and-rebuild update FileTree used to do, with FileTree as it is, and
+with FileTree showing files by directory (nothing expanded).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from rich.text import Text  # noqa: E402
+from textual.app import App, ComposeResult  # noqa: E402
+from textual.widgets import Tree  # noqa: E402
+
+from gitx.git.snapshot import PorcelainV2Parser, RepoSnapshot  # noqa: E402
+from gitx.widgets.file_tree import STATUS_STYLES, FileTree  # noqa: E402
+
+OID = "0123456789abcdef0123456789abcdef01234567"
+SCREEN_SIZE = (120, 50)
+
+
+def snapshot(entries: List[Tuple[str, str]]) -> RepoSnapshot:
+    """Build a snapshot from (XY code or "?", path) pairs."""
+    records = [b"# branch.oid " + OID.encode(), b"# branch.head main"]
+    for code, path in entries:
+        if code == "?":
+            records.append(f"? {path}".encode())
+        else:
+            records.append(f"1 {code} N... 100644 100644 100644 {OID} {OID} {path}".encode())
+    parser = PorcelainV2Parser()
+    parser.feed(b"\0".join(records) + b"\0")
+    return parser.close()
+
+
+def scenarios(files: int) -> List[Tuple[str, RepoSnapshot]]:
+    """The snapshots applied in turn: half of the files modified, a quarter untracked, the rest staged."""
+    paths = [f"src/pkg{i // 1000:03}/mod{i // 50 % 20:02}/file{i}.txt" for i in range(files)]
+    codes = [".M" if i % 4 < 2 else "?" if i % 4 == 2 else "M." for i in range(files)]
+    base = list(zip(codes, paths))
+
+    edited = list(base)
+    edited[7] = ("MM", paths[7]) if codes[7] == "M." else (".M", paths[7])
+
+    staged_some = list(edited)
+    moved = 0
+    for i, (code, path) in enumerate(staged_some):
+        if code == ".M" and moved < 100:
+            staged_some[i] = ("M.", path)
+            moved += 1
+
+    staged_all = [("M." if code == ".M" else code, path) for code, path in staged_some]
+    return [
+        ("first load", snapshot(base)),
+        ("unchanged", snapshot(base)),
+        ("one file edited", snapshot(edited)),
+        ("100 files staged", snapshot(staged_some)),
+        ("all modified staged", snapshot(staged_all)),
+    ]
+
+
+def legacy_update(file_tree: FileTree, snap: RepoSnapshot) -> None:
+    """The update FileTree used before: clear the tree, add every file, then style every node."""
+    tree = file_tree.query_one(Tree)
+    status = snap.status_groups()
+    tree.clear()
+    for name, title in (
+        ("staged", "Staged Changes"), ("modified", "Unstaged Changes"),
+        ("deleted", "Deleted Files"), ("untracked", "Untracked Files"),
+    ):
+        if status.get(name):
+            group = tree.root.add(title, expand=True)
+            for path in status[name]:
+                node = group.add_leaf(Text(path))
+                node.data = {"status": name, "path": path}
+    for node in tree.walk_children():
+        if node is not tree.root and node.data:
+            node.set_label(Text(node.data["path"], style=STATUS_STYLES.get(node.data["status"], "")))
+
+
+class TreeApp(App):
+    def compose(self) -> ComposeResult:
+        yield FileTree()
+
+
+async def _run(
+    steps: List[Tuple[str, RepoSnapshot]], update: Callable[[FileTree, RepoSnapshot], None], directories: bool = False
+) -> Dict:
+    app = TreeApp()
+    results = {}
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        file_tree = app.query_one(FileTree)
+        file_tree.show_directories = directories
+        tree = file_tree.query_one(Tree)
+        tree.root.expand()
+        tree.focus()
+        await pilot.pause()
+        for name, snap in steps:
+            start = time.perf_counter()
+            update(file_tree, snap)
+            await pilot.pause()
+            results[name] = time.perf_counter() - start
+            if name == "first load":
+                # Put the cursor on a file further down, to see whether it stays there
+                tree.move_cursor(tree.get_node_at_line(40))
+                await pilot.pause()
+        cursor = tree.cursor_node
+        results["cursor"] = cursor.data["path"] if cursor is not None and cursor.data else None
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50_000, help="changed files in each snapshot")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    steps = scenarios(args.files)
+    runs = {"clear and rebuild": [], "incremental": [], "by directory": []}
+    for _ in range(args.repeat):
+        runs["clear and rebuild"].append(asyncio.run(_run(steps, legacy_update)))
+        runs["incremental"].append(asyncio.run(_run(steps, FileTree.update_snapshot)))
+        runs["by directory"].append(asyncio.run(_run(steps, FileTree.update_snapshot, directories=True)))
+
+    print(f"{'update':<22} {'clear and rebuild (ms)':>23} {'incremental (ms)':>17} {'by directory (ms)':>18}")
+    for name, _ in steps:
+        legacy = min(run[name] for run in runs["clear and rebuild"]) * 1000
+        incremental = min(run[name] for run in runs["incremental"]) * 1000
+        directories = min(run[name] for run in runs["by directory"]) * 1000
+        print(f"{name:<22} {legacy:>23.1f} {incremental:>17.1f} {directories:>18.1f}")
+    print(f"\ncursor after the updates: {runs['clear and rebuild'][0]['cursor']} (clear and rebuild), "
+          f"{runs['incremental'][0]['cursor']} (incremental)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Time the in-process object reader against git.
+
+Usage:
+    python benchmarks/bench_objects.py [--repo PATH] [--preset small|large] [--sample N]
+
+Without --repo, a repository is generated with synthrepo.py (same shape
+options) and extended with merges, a rename, a type change and a commit
+with a non-UTF-8 message, so the fallbacks are exercised too. It is then
+timed twice: as written, with loose objects and fast-import's pack, and
+after an aggressive repack, which makes long delta chains.
+
+For each repository the whole log is read page by page with PackBackend
+and with `git rev-list`, and for a sample of commits the commit and its
+changed files are read with PackBackend and with `git log` and `git show
+--name-status`. Calls where PackBackend declines and git would be run
+instead are counted as fallbacks. That both give the same answers is
+checked by tests/test_objects.py.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from gitx.git.history import METADATA_ARGS, page_args, parse_metadata  # noqa: E402
+from gitx.git.objects import PackBackend, rename_detection  # noqa: E402
+from gitx.git.refs import RefReader  # noqa: E402
+
+from synthrepo import add_shape_arguments, generate, shape_from_arguments  # noqa: E402
+
+PAGE_SIZE = 200
+
+
+def git(repo: str, *args: str, **kwargs) -> str:
+    return subprocess.run(
+        ["git", "-C", repo, *args], capture_output=True, text=True, check=True, **kwargs
+    ).stdout
+
+
+def extend_history(repo: str) -> None:
+    """Add merges, a rename, a type change and a Latin-1 commit on top of main."""
+    # Drop the local changes synthrepo.py leaves in the work tree
+    git(repo, "reset", "-q", "--hard")
+    git(repo, "clean", "-q", "-f", "-d")
+    git(repo, "config", "user.name", "Bench Author")
+    git(repo, "config", "user.email", "bench@example.com")
+    tracked = git(repo, "ls-files").split()
+    for i in range(1, 6):
+        git(repo, "checkout", "-q", "-b", f"bench/merge-{i}", f"main~{i * 3}")
+        with open(os.path.join(repo, f"merged-{i}.txt"), "w") as f:
+            f.write(f"merged {i}\n")
+        git(repo, "add", f"merged-{i}.txt")
+        git(repo, "commit", "-q", "-m", f"Topic {i}")
+        git(repo, "checkout", "-q", "main")
+        git(repo, "merge", "-q", "--no-ff", "-m", f"Merge topic {i}", f"bench/merge-{i}")
+    git(repo, "mv", tracked[0], "renamed.txt")
+    git(repo, "commit", "-q", "-m", "Rename a file")
+    os.symlink("renamed.txt", os.path.join(repo, "link"))
+    git(repo, "add", "link")
+    git(repo, "commit", "-q", "-m", "Add a symlink")
+    os.remove(os.path.join(repo, "link"))
+    with open(os.path.join(repo, "link"), "w") as f:
+        f.write("no longer a link\n")
+    git(repo, "add", "link")
+    git(repo, "commit", "-q", "-m", "Replace the symlink with a file")
+    with open(os.path.join(repo, "latin1.txt"), "w") as f:
+        f.write("latin-1\n")
+    git(repo, "add", "latin1.txt")
+    subprocess.run(
+        ["git", "-C", repo, "-c", "i18n.commitEncoding=ISO-8859-1", "commit", "-q", "-F", "-"],
+        input="Caf\xe9\n".encode("latin-1"), check=True,
+    )
+    for i in range(20):
+        with open(os.path.join(repo, tracked[i + 1]), "a") as f:
+            f.write("loose edit\n")
+        git(repo, "commit", "-q", "-a", "-m", f"Loose commit {i}")
+
+
+def measure(repo: str, sample: int) -> Dict[str, float]:
+    """Time PackBackend and git on one repository, returning timings and counts."""
+    git_dir = git(repo, "rev-parse", "--absolute-git-dir").strip()
+    refs = RefReader(git_dir)
+    head = refs.head()[1]
+    backend = PackBackend(refs, hash_size=len(head) // 2)
+    renames = rename_detection(subprocess.run(
+        ["git", "-C", repo, "config", "--get", "diff.renames"], capture_output=True, text=True
+    ).stdout or None)
+    results: Dict[str, float] = {"page_fallbacks": 0, "files_fallbacks": 0}
+
+    # Every log page, the way the commit log reads them
+    start = time.perf_counter()
+    expected: List[str] = []
+    skip = 0
+    while True:
+        page = git(repo, *page_args(skip, PAGE_SIZE)).split()
+        if not page:
+            break
+        expected.extend(page)
+        skip += len(page)
+    results["log_git_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    pages: List[Optional[List[str]]] = []
+    for skip in range(0, len(expected) + 1, PAGE_SIZE):
+        commits = backend.commit_page(skip, PAGE_SIZE)
+        pages.append(None if commits is None else [commit.hash for commit in commits])
+    results["log_pack_ms"] = (time.perf_counter() - start) * 1000
+    results["page_fallbacks"] = sum(page is None for page in pages)
+    results["commits"] = len(expected)
+
+    chosen = expected[::max(1, len(expected) // sample)][:sample]
+    start = time.perf_counter()
+    from_git = {commit.hash: commit for commit in parse_metadata(git(repo, *METADATA_ARGS, input="\n".join(chosen) + "\n"))}
+    for oid in chosen:
+        git(repo, "show", "--name-status", "--pretty=format:", oid)
+    results["details_git_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    read = {oid: backend.read_commit(oid) for oid in chosen}
+    files = {oid: backend.changed_files(read[oid] or from_git[oid], renames) for oid in chosen}
+    results["details_pack_ms"] = (time.perf_counter() - start) * 1000
+
+    results["files_fallbacks"] = sum(files[oid] is None for oid in chosen)
+    results["sampled"] = len(chosen)
+    backend.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", help="time an existing repository instead of generating one")
+    add_shape_arguments(parser)
+    parser.add_argument("--sample", type=int, default=300, help="commits whose details are read")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="gitx-objects-") as scratch:
+        if args.repo is not None:
+            repos = {"repository": os.path.abspath(args.repo)}
+        else:
+            repo = os.path.join(scratch, "repo")
+            start = time.perf_counter()
+            generate(repo, **shape_from_arguments(args))
+            extend_history(repo)
+            print(f"generated {repo} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            repacked = os.path.join(scratch, "repacked")
+            shutil.copytree(repo, repacked, symlinks=True)
+            git(repacked, "repack", "-a", "-d", "-f", "-q", "--depth=250", "--window=250")
+            repos = {"loose and fast-import pack": repo, "aggressively repacked": repacked}
+
+        for name, path in repos.items():
+            results = measure(path, args.sample)
+            print(f"{name}: {results['commits']:.0f} commits, {results['sampled']:.0f} sampled")
+            print(f"  {'':<24} {'git (ms)':>10} {'in process (ms)':>16}")
+            print(f"  {'whole log by pages':<24} {results['log_git_ms']:>10.1f} {results['log_pack_ms']:>16.1f}")
+            print(f"  {'sampled details':<24} {results['details_git_ms']:>10.1f} {results['details_pack_ms']:>16.1f}")
+            print(
+                f"  page fallbacks {results['page_fallbacks']:.0f}, changed files fallbacks {results['files_fallbacks']:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Time the startup of gitx: imports, first frame and fully loaded panels.
+
+Usage:
+    python benchmarks/bench_startup.py [--repo PATH] [--preset small|large] [--runs N] [--output FILE]
+
+Every run starts a fresh interpreter, so imports are not shared between
+runs. Each run reports, in milliseconds from just before gitx is imported:
+
+    import_ms        importing gitx.app, Textual included
+    first_frame_ms   the first frame is drawn, with the last session or placeholders in the panels
+    repository_ms    the repository is open and the git actions are enabled
+    loaded_ms        every panel shows its data and no worker is running
+
+The headless app is driven by Textual's pilot and quits with q. The commit
+cache and the saved session are kept between runs, so the first run starts
+cold and later runs warm, like repeated launches do. Without --repo, a repository is generated with
+synthrepo.py (the shape options are the same) in a temporary directory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Screen size for the headless app
+SCREEN_SIZE = (160, 50)
+
+METRICS = ("import_ms", "first_frame_ms", "repository_ms", "loaded_ms")
+
+
+async def _measure(start: float) -> Dict[str, float]:
+    from gitx.app import GitxApp
+
+    def since_start() -> float:
+        return (time.perf_counter() - start) * 1000
+
+    results = {"import_ms": since_start()}
+    app = GitxApp()
+    display = app._display
+
+    def first_frame(screen, renderable) -> None:
+        # Frames are still composed in headless mode, only not written out
+        if renderable is not None and not app._batch_count:
+            results.setdefault("first_frame_ms", since_start())
+        display(screen, renderable)
+
+    app._display = first_frame
+    try:
+        async with app.run_test(size=SCREEN_SIZE) as pilot:
+            while app.git is None and any(worker.is_running for worker in app.workers):
+                await pilot.pause()
+            results["repository_ms"] = since_start()
+
+            while any(worker.is_running for worker in app.workers):
+                await app.workers.wait_for_complete()
+                await pilot.pause()
+            await pilot.pause()
+            results["loaded_ms"] = since_start()
+            # Quitting saves the session for the next run
+            await pilot.press("q")
+    finally:
+        if app.git is not None:
+            app.git.close()
+    return results
+
+
+def child() -> None:
+    """Measure one startup in this process and print the results as JSON."""
+    start = time.perf_counter()
+    sys.path.insert(0, SRC)
+    print(json.dumps(asyncio.run(_measure(start))))
+
+
+def run_once(repo: str) -> Dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        cwd=repo, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        metric: {
+            "median": statistics.median(run[metric] for run in runs),
+            "best": min(run[metric] for run in runs),
+            "first_run": runs[0][metric],
+        }
+        for metric in METRICS
+    }
+
+
+def main() -> None:
+    if "--child" in sys.argv:
+        child()
+        return
+
+    from synthrepo import add_shape_arguments, generate, shape_from_arguments
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", help="start in an existing repository instead of generating one")
+    add_shape_arguments(parser)
+    parser.add_argument("--runs", type=int, default=5, help="number of startups to time")
+    parser.add_argument("--output", default="bench-startup.json", help="where to write the JSON results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="gitx-bench-") as scratch:
+        # Keep the commit cache of the benchmark away from the real one
+        os.environ["GITX_CACHE_DIR"] = os.path.join(scratch, "cache")
+        repo = args.repo
+        if repo is None:
+            repo = os.path.join(scratch, "repo")
+            start = time.perf_counter()
+            generate(repo, **shape_from_arguments(args))
+            print(f"generated {repo} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        runs = [run_once(os.path.abspath(repo)) for _ in range(args.runs)]
+
+    summary = summarize(runs)
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repository": {"path": args.repo, "shape": None if args.repo else shape_from_arguments(args)},
+        "runs": runs,
+        "summary": summary,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'metric':<16} {'median':>10} {'best':>10} {'first run':>10}")
+    for metric, values in summary.items():
+        print(f"{metric:<16} {values['median']:>10.1f} {values['best']:>10.1f} {values['first_run']:>10.1f}")
+    print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
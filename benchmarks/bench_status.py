@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Compare the porcelain v1 status parser with the streaming porcelain v2 parser.
+
+Usage:
+    python benchmarks/bench_status.py [--entries N] [--repo PATH]
+
+Without --repo, synthetic status output with N entries is generated. With
+--repo, the real `git status` output of that repository is used instead.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from gitx.git.snapshot import PorcelainV2Parser  # noqa: E402
+
+CHUNK_SIZE = 64 * 1024
+OID = "0123456789abcdef0123456789abcdef01234567"
+
+
+def legacy_parse_status(output: str) -> Dict[str, List[str]]:
+    """The `--porcelain` v1 parser GitHandler.get_status used before the v2 parser."""
+    status = {"untracked": [], "modified": [], "staged": [], "deleted": [], "renamed": []}
+
+    for line in output.splitlines():
+        if not line:
+            continue
+        code = line[:2]
+        file_path = line[3:]
+        if code == "??":
+            status["untracked"].append(file_path)
+        elif code[0] == "M" or code[1] == "M":
+            if code[0] != " ":
+                status["staged"].append(file_path)
+            if code[1] != " ":
+                status["modified"].append(file_path)
+        elif code[0] == "A":
+            status["staged"].append(file_path)
+        elif code[0] == "D" or code[1] == "D":
+            if code[0] != " ":
+                status["staged"].append(file_path)
+            if code[1] != " ":
+                status["deleted"].append(file_path)
+        elif code[0] == "R":
+            status["renamed"].append(file_path)
+
+    return status
+
+
+def synthetic_outputs(entries: int) -> Tuple[bytes, bytes]:
+    """Build equivalent porcelain v1 and v2 -z outputs with a mix of entry types."""
+    v1: List[str] = []
+    v2: List[bytes] = [b"# branch.oid " + OID.encode(), b"# branch.head main"]
+
+    for i in range(entries):
+        path = f"src/module_{i // 100}/file {i}.py"
+        kind = i % 5
+        if kind == 0:
+            v1.append(f"?? \"{path}\"")
+            v2.append(f"? {path}".encode())
+        elif kind == 1:
+            v1.append(f" M \"{path}\"")
+            v2.append(f"1 .M N... 100644 100644 100644 {OID} {OID} {path}".encode())
+        elif kind == 2:
+            v1.append(f"MM \"{path}\"")
+            v2.append(f"1 MM N... 100644 100644 100644 {OID} {OID} {path}".encode())
+        elif kind == 3:
+            v1.append(f" D \"{path}\"")
+            v2.append(f"1 .D N... 100644 100644 000000 {OID} {OID} {path}".encode())
+        else:
+            v1.append(f"R  \"old {path}\" -> \"{path}\"")
+            v2.append(f"2 R. N... 100644 100644 100644 {OID} {OID} R100 {path}".encode())
+            v2.append(f"old {path}".encode())
+
+    return "\n".join(v1).encode() + b"\n", b"\0".join(v2) + b"\0"
+
+
+def repo_outputs(repo: str) -> Tuple[bytes, bytes]:
+    """Read real porcelain v1 and v2 -z outputs from a repository."""
+    v1 = subprocess.run(["git", "-C", repo, "status", "--porcelain"], capture_output=True, check=True).stdout
+    v2 = subprocess.run(
+        ["git", "-C", repo, "status", "--porcelain=v2", "--branch", "-z"], capture_output=True, check=True
+    ).stdout
+    return v1, v2
+
+
+def run_legacy(v1: bytes) -> int:
+    # Mirrors the old capture_output=True, text=True call
+    status = legacy_parse_status(v1.decode())
+    return sum(len(paths) for paths in status.values())
+
+
+def run_streaming(v2: bytes) -> int:
+    parser = PorcelainV2Parser()
+    for offset in range(0, len(v2), CHUNK_SIZE):
+        parser.feed(v2[offset:offset + CHUNK_SIZE])
+    return len(parser.close().entries)
+
+
+def measure(func: Callable[[bytes], int], data: bytes, repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    records = func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak_mib": peak / (1024 * 1024), "records": records}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000, help="synthetic entries to generate")
+    parser.add_argument("--repo", help="benchmark the status of a real repository instead")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    v1, v2 = repo_outputs(args.repo) if args.repo else synthetic_outputs(args.entries)
+
+    results = {
+        "legacy v1": measure(run_legacy, v1, args.repeat),
+        "streaming v2": measure(run_streaming, v2, args.repeat),
+    }
+
+    print(f"{'parser':<14} {'time (ms)':>10} {'peak (MiB)':>11} {'records':>9}")
+    for name, result in results.items():
+        print(f"{name:<14} {result['seconds'] * 1000:>10.1f} {result['peak_mib']:>11.1f} {result['records']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Time GitHandler methods and panel refreshes against a synthetic repository.
+
+Usage:
+    python benchmarks/bench_suite.py [--repo PATH] [--preset small|large] [--output FILE]
+
+Without --repo, a repository is generated with synthrepo.py (the shape
+options are the same) in a temporary directory. Each GitHandler method is
+timed cold (first call, starting from empty caches) and warm (best of
+--repeat calls), with the peak Python allocation of one more call. Panel refreshes are then
+timed through Textual's headless pilot: the first full load, a full
+refresh, and a refresh of each snapshot panel on its own.
+
+Results are written as JSON, along with the repository shape and the
+versions of git, Python and Textual, so runs can be compared over time.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import textual  # noqa: E402
+
+from synthrepo import HUGE_PATH, add_shape_arguments, generate, shape_from_arguments  # noqa: E402
+
+# Screen size for the headless app
+SCREEN_SIZE = (160, 50)
+
+
+def repository_context(git) -> Dict[str, Any]:
+    """Commits and paths for the timed calls to work on."""
+    changed = [entry.path for entry in git.get_snapshot().entries]
+    total = git.count_commits()
+    return {
+        "head": git.get_commit_page(0, 1)[0].hash,
+        "total": total,
+        "middle": git.get_commit_page(total // 2, 1)[0].hash,
+        "modified": next((path for path in changed if path.endswith(".txt") and path != HUGE_PATH), None),
+        "huge": HUGE_PATH if HUGE_PATH in changed else None,
+    }
+
+
+def handler_cases(git, ctx: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any]]]:
+    """The GitHandler calls to time."""
+    head, total, huge = ctx["head"], ctx["total"], ctx["huge"]
+    cases = [
+        ("get_snapshot", git.get_snapshot),
+        ("get_status", git.get_status),
+        ("get_current_branch", git.get_current_branch),
+        ("get_branch_index", git.get_branch_index),
+        ("get_branches", git.get_branches),
+        ("count_commits", git.count_commits),
+        ("get_commit_page[0:200]", lambda: git.get_commit_page(0, 200)),
+        ("get_commit_page[middle]", lambda: git.get_commit_page(total // 2, 200)),
+        ("get_commit_history", git.get_commit_history),
+        ("find_commit_offset", lambda: git.find_commit_offset(ctx["middle"])),
+        ("get_commit_details", lambda: git.get_commit_details(head)),
+        ("get_commit_diff", lambda: git.get_commit_diff(f"{head}~1", head)),
+        ("get_repo_status_summary", git.get_repo_status_summary),
+    ]
+    if ctx["modified"] is not None:
+        cases.append(("get_file_diff", lambda: git.get_file_diff(ctx["modified"])))
+    if huge is not None:
+        cases.extend([
+            ("probe_file_diff[huge]", lambda: git.probe_file_diff(huge)),
+            ("get_file_diff_stat[huge]", lambda: git.get_file_diff_stat(huge)),
+            ("get_file_diff[huge]", lambda: git.get_file_diff(huge)),
+        ])
+    return cases
+
+
+def time_call(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _remove_cache(git) -> None:
+    """Delete the commit cache database, so the next handler starts cold."""
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(git.commit_cache.path + suffix)
+        except OSError:
+            pass
+
+
+def bench_handler(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time each GitHandler method cold, warm and under tracemalloc."""
+    from gitx.git.handler import GitHandler
+
+    setup = GitHandler()
+    ctx = repository_context(setup)
+    setup.close()
+    _remove_cache(setup)
+
+    git = GitHandler()
+    try:
+        results = {}
+        for name, func in handler_cases(git, ctx):
+            # The first call runs with whatever earlier cases left in the caches,
+            # like the first refresh after startup does
+            cold = time_call(func)
+            warm = min(time_call(func) for _ in range(repeat))
+            tracemalloc.start()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {"cold_ms": cold * 1000, "warm_ms": warm * 1000, "peak_kib": peak / 1024}
+        return results
+    finally:
+        git.close()
+        _remove_cache(git)
+
+
+async def _settle(app, pilot) -> None:
+    """Wait until no worker is running, then for the screen to update."""
+    while any(worker.is_running for worker in app.workers):
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+    await pilot.pause()
+
+
+async def _bench_panels(repeat: int) -> Dict[str, float]:
+    from gitx.app import SNAPSHOT_PANELS, GitxApp
+
+    results: Dict[str, float] = {}
+    start = time.perf_counter()
+    app = GitxApp()
+    try:
+        async with app.run_test(size=SCREEN_SIZE) as pilot:
+            await _settle(app, pilot)
+            results["first_load_ms"] = (time.perf_counter() - start) * 1000
+
+            panels: List[Tuple[str, Optional[List[type]]]] = [("full_refresh", None)]
+            panels.extend((panel.__name__, [panel]) for panel in SNAPSHOT_PANELS)
+            for name, panel_types in panels:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    app.refresh_repository(panel_types)
+                    await _settle(app, pilot)
+                    best = min(best, time.perf_counter() - start)
+                results[f"{name}_ms"] = best * 1000
+    finally:
+        if app.git is not None:
+            app.git.close()
+    return results
+
+
+def bench_panels(repeat: int) -> Dict[str, float]:
+    """Time panel loads and refreshes in the headless app."""
+    return asyncio.run(_bench_panels(repeat))
+
+
+def max_rss_mib() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def environment() -> Dict[str, str]:
+    here = os.path.dirname(os.path.abspath(__file__))
+    revision = subprocess.run(["git", "-C", here, "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    return {
+        "gitx_revision": revision,
+        "git": subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip(),
+        "python": platform.python_version(),
+        "textual": textual.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", help="benchmark an existing repository instead of generating one")
+    add_shape_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions (best is reported)")
+    parser.add_argument("--output", default="bench-results.json", help="where to write the JSON results")
+    parser.add_argument("--skip-panels", action="store_true", help="only time GitHandler methods")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="gitx-bench-") as scratch:
+        # Keep the commit cache of the benchmark away from the real one
+        os.environ["GITX_CACHE_DIR"] = os.path.join(scratch, "cache")
+        repo = args.repo
+        if repo is None:
+            repo = os.path.join(scratch, "repo")
+            start = time.perf_counter()
+            generate(repo, **shape_from_arguments(args))
+            print(f"generated {repo} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        repo = os.path.abspath(repo)
+
+        shape: Dict[str, Any] = {}
+        git_dir = subprocess.run(
+            ["git", "-C", repo, "rev-parse", "--absolute-git-dir"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        if os.path.exists(os.path.join(git_dir, "synthrepo.json")):
+            with open(os.path.join(git_dir, "synthrepo.json")) as f:
+                shape = json.load(f)
+
+        cwd = os.getcwd()
+        os.chdir(repo)
+        try:
+            handler = bench_handler(args.repeat)
+            panels = {} if args.skip_panels else bench_panels(args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "repository": {"path": args.repo, "shape": shape},
+        "handler": handler,
+        "panels": panels,
+        "max_rss_mib": max_rss_mib(),
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'GitHandler method':<28} {'cold (ms)':>10} {'warm (ms)':>10} {'peak (KiB)':>11}")
+    for name, result in handler.items():
+        print(f"{name:<28} {result['cold_ms']:>10.1f} {result['warm_ms']:>10.1f} {result['peak_kib']:>11.0f}")
+    if panels:
+        print(f"\n{'panel':<28} {'time (ms)':>10}")
+        for name, value in panels.items():
+            print(f"{name[:-3]:<28} {value:>10.1f}")
+    print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
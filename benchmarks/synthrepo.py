@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Generate a deterministic synthetic repository for benchmarks.
+
+Usage:
+    python benchmarks/synthrepo.py PATH [--preset small|large] [--files N] [--commits N] ...
+
+History is written with a single `git fast-import` stream, so even the
+large preset (100k files, 50k commits, 10k branches) takes a minute or two
+rather than hours. The same options and seed always produce the same
+commit ids. After the history is written, the work tree is checked out and
+dirtied with modified, staged and untracked files and one huge diff.
+
+The shape of the repository is saved to .git/synthrepo.json, where
+bench_suite.py picks it up.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+from typing import Dict, List
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    "small": {
+        "files": 2_000,
+        "commits": 1_000,
+        "branches": 200,
+        "remote_branches": 200,
+        "huge_diff_mb": 4,
+        "modified": 200,
+        "untracked": 500,
+    },
+    "large": {
+        "files": 100_000,
+        "commits": 50_000,
+        "branches": 10_000,
+        "remote_branches": 10_000,
+        "huge_diff_mb": 64,
+        "modified": 5_000,
+        "untracked": 20_000,
+    },
+}
+
+# Files per directory, and directories per top-level directory
+DIR_FILES = 50
+DIR_FANOUT = 20
+
+# Fixed identity and clock, so ids only depend on the options
+IDENT = "Bench Author <bench@example.com>"
+EPOCH = 1_600_000_000
+
+HUGE_PATH = "data/huge.txt"
+
+
+def file_path(i: int) -> str:
+    directory = i // DIR_FILES
+    return f"src/pkg{directory // DIR_FANOUT:03}/mod{directory % DIR_FANOUT:02}/file{i}.txt"
+
+
+def file_content(i: int, revision: int, rng: random.Random) -> bytes:
+    lines = [f"file {i} revision {revision}"]
+    lines.extend(f"line {n} {rng.getrandbits(32):08x}" for n in range(rng.randint(3, 12)))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def huge_content(size: int, rng: random.Random, salt: str = "") -> bytes:
+    """About size bytes of text; a salt changes every other line."""
+    lines: List[bytes] = []
+    total = n = 0
+    while total < size:
+        tag = salt if salt and n % 2 else ""
+        line = f"{n:08} {rng.getrandbits(64):016x}{tag}\n".encode()
+        lines.append(line)
+        total += len(line)
+        n += 1
+    return b"".join(lines)
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def _commit(stream, mark: int, parent: int, when: int, message: str, changes: List[bytes]) -> None:
+    stream.write(b"commit refs/heads/main\n")
+    stream.write(b"mark :%d\n" % mark)
+    stream.write(f"author {IDENT} {when} +0000\n".encode())
+    stream.write(f"committer {IDENT} {when} +0000\n".encode())
+    stream.write(_data(message.encode()))
+    if parent:
+        stream.write(b"from :%d\n" % parent)
+    for change in changes:
+        stream.write(change)
+    stream.write(b"\n")
+
+
+def git(path: str, *args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", "-C", path, *args], check=True, **kwargs)
+
+
+def generate(
+    path: str,
+    files: int,
+    commits: int,
+    branches: int = 0,
+    remote_branches: int = 0,
+    huge_diff_mb: int = 0,
+    modified: int = 0,
+    untracked: int = 0,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """Create the repository at path, replacing anything already there.
+
+    Returns:
+        The shape of the repository, as saved to .git/synthrepo.json
+    """
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    git(path, "config", "user.name", "Bench Author")
+    git(path, "config", "user.email", "bench@example.com")
+
+    importer = subprocess.Popen(
+        ["git", "-C", path, "fast-import", "--quiet", "--date-format=raw"],
+        stdin=subprocess.PIPE,
+    )
+    stream = importer.stdin
+    revisions = [0] * files
+
+    # The first commit adds every file; each later one edits a few of them
+    changes = [b"M 100644 inline %s\n%s" % (file_path(i).encode(), _data(file_content(i, 0, rng))) for i in range(files)]
+    if huge_diff_mb:
+        huge = huge_content(huge_diff_mb * 1024 * 1024, random.Random(seed))
+        changes.append(b"M 100644 inline %s\n%s" % (HUGE_PATH.encode(), _data(huge)))
+    _commit(stream, 1, 0, EPOCH, "Initial commit", changes)
+
+    for mark in range(2, commits + 1):
+        changes = []
+        for i in rng.sample(range(files), min(files, rng.randint(1, 3))):
+            revisions[i] += 1
+            content = file_content(i, revisions[i], rng)
+            changes.append(b"M 100644 inline %s\n%s" % (file_path(i).encode(), _data(content)))
+        _commit(stream, mark, mark - 1, EPOCH + mark * 60, f"Change {mark}\n\nEdits {len(changes)} files.", changes)
+
+    # Branches point at commits spread over the history
+    for i in range(branches):
+        stream.write(f"reset refs/heads/feature/team{i % 20}/topic-{i}\nfrom :{rng.randint(1, commits)}\n\n".encode())
+    for i in range(remote_branches):
+        stream.write(f"reset refs/remotes/origin/team{i % 20}/work-{i}\nfrom :{rng.randint(1, commits)}\n\n".encode())
+
+    stream.close()
+    if importer.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+
+    git(path, "reset", "--hard", "-q", "main")
+
+    # Dirty the work tree: modified files, a quarter of them staged, one huge diff
+    edited = sorted(rng.sample(range(files), min(files, modified)))
+    for i in edited:
+        with open(os.path.join(path, file_path(i)), "ab") as f:
+            f.write(b"local edit\n")
+    staged = [file_path(i) for i in edited[::4]]
+    if staged:
+        git(path, "add", "--pathspec-from-file=-", "--pathspec-file-nul", input="\0".join(staged).encode())
+    if huge_diff_mb:
+        with open(os.path.join(path, HUGE_PATH), "wb") as f:
+            # Same random lines as the committed version, with every other one changed
+            f.write(huge_content(huge_diff_mb * 1024 * 1024, random.Random(seed), salt=" edited"))
+
+    for i in range(untracked):
+        untracked_path = os.path.join(path, "untracked", f"dir{i // DIR_FILES:04}", f"new{i}.txt")
+        os.makedirs(os.path.dirname(untracked_path), exist_ok=True)
+        with open(untracked_path, "w") as f:
+            f.write(f"untracked {i}\n")
+
+    shape = {
+        "files": files,
+        "commits": commits,
+        "branches": branches,
+        "remote_branches": remote_branches,
+        "huge_diff_mb": huge_diff_mb,
+        "modified": len(edited),
+        "staged": len(staged),
+        "untracked": untracked,
+        "seed": seed,
+    }
+    git_dir = git(path, "rev-parse", "--absolute-git-dir", capture_output=True, text=True).stdout.strip()
+    with open(os.path.join(git_dir, "synthrepo.json"), "w") as f:
+        json.dump(shape, f, indent=2)
+    return shape
+
+
+def add_shape_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the preset and shape options, shared with bench_suite.py."""
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="starting shape")
+    for name in PRESETS["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f"override the preset's {name}")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+
+
+def shape_from_arguments(args: argparse.Namespace) -> Dict[str, int]:
+    shape = dict(PRESETS[args.preset])
+    for name in shape:
+        value = getattr(args, name)
+        if value is not None:
+            shape[name] = value
+    shape["seed"] = args.seed
+    return shape
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="where to create the repository (replaced if it exists)")
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+
+    shape = generate(args.path, **shape_from_arguments(args))
+    print(json.dumps(shape, indent=2))
+
+
+if __name__ == "__main__":
+    main()
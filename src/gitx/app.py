@@ -1,16 +1,70 @@
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, Iterable, Optional, Set, Tuple
+
+from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.containers import Container, Grid
-from textual.widgets import Header, Footer, Static, Input, Tree
+from textual.css.query import NoMatches
+from textual.widgets import Header, Footer, Static, Input
 from textual.screen import Screen
+from textual.worker import Worker
 
 from gitx.widgets.status_panel import StatusPanel
 from gitx.widgets.file_tree import FileTree
-from gitx.widgets.commit_log import CommitLog
+from gitx.widgets.commit_log import CommitList, CommitLog
 from gitx.widgets.branches_panel import BranchesPanel
 from gitx.widgets.command_panel import CommandPanel
 from gitx.widgets.main_panel import MainPanel
-from gitx.git.handler import GitHandler
+from gitx.git.session import Session, load_session, read_ref_tips, save_session
+from gitx.git.snapshot import RepoSnapshot
+from gitx.git.watcher import INDEX, REFS, WORKTREE, RepoWatcher
+from gitx.trace import RenderTimer, trigger_scope
+from gitx.utils.helpers import user_cache_dir
+
+if TYPE_CHECKING:
+    from gitx.git.async_handler import AsyncGitHandler
+    from gitx.git.handler import GitHandler
+
+# Panels that render from the repository snapshot
+SNAPSHOT_PANELS = (StatusPanel, FileTree, CommitLog, BranchesPanel)
+
+# Panels affected by each kind of change reported by the watcher
+WATCHED_PANELS = {
+    WORKTREE: (StatusPanel, FileTree),
+    INDEX: (StatusPanel, FileTree),
+    REFS: (StatusPanel, BranchesPanel, CommitLog),
+}
+
+# Seconds between file tree updates while untracked files are being listed
+UNTRACKED_REFRESH_INTERVAL = 0.25
+
+# Panels whose render time is traced
+TRACED_PANELS = (StatusPanel, FileTree, BranchesPanel, CommitLog, MainPanel, CommandPanel)
+
+# Actions that do nothing until the repository is open
+REPOSITORY_ACTIONS = {
+    "stage_file", "unstage_file", "commit", "push", "pull", "fetch", "cancel_job",
+    "new_branch", "refresh", "goto_commit", "full_diff", "export_trace",
+}
+
+
+def open_repository() -> Tuple["GitHandler", "AsyncGitHandler"]:
+    """Locate the repository in the current directory and read its settings.
+
+    The git layer is imported here rather than at startup, since it is only
+    needed once the first frame is up.
+
+    Raises:
+        ValueError: If the current directory is not in a git repository
+    """
+    from gitx.git.async_handler import AsyncGitHandler
+    from gitx.git.handler import GitHandler
+
+    git = GitHandler()
+    return git, AsyncGitHandler(git)
 
 
 class GitxApp(App):
@@ -26,15 +80,42 @@ class GitxApp(App):
         Binding(key="c", action="commit", description="Commit"),
         Binding(key="p", action="push", description="Push"),
         Binding(key="f", action="pull", description="Pull (fetch)"),
+        Binding(key="F", action="fetch", description="Fetch", show=False),
+        Binding(key="x", action="cancel_job", description="Cancel", show=False),
         Binding(key="b", action="new_branch", description="New branch"),
         Binding(key="r", action="refresh", description="Refresh"),
+        Binding(key="g", action="goto_commit", description="Go to commit"),
+        Binding(key="L", action="full_diff", description="Full diff", show=False),
+        Binding(key="T", action="toggle_trace", description="Trace", show=False),
+        Binding(key="E", action="export_trace", description="Export trace", show=False),
         Binding(key="?", action="toggle_help", description="Help"),
         Binding(key="^p", action="palette", description="Command palette"),
     ]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.git = GitHandler()
+        # Set once the repository is open, which happens after the first frame
+        self.git: Optional["GitHandler"] = None
+        self.git_async: Optional["AsyncGitHandler"] = None
+        self.watcher: Optional[RepoWatcher] = None
+        # Why the repository could not be opened
+        self._open_error: Optional[Exception] = None
+        self.snapshot: Optional[RepoSnapshot] = None
+        # The last session in this directory, shown until the repository is open and revalidated
+        self._session: Optional[Session] = None
+        self._pending_panels: Set[type] = set()
+        # Whether every pending refresh may be skipped when a quick stat check finds nothing changed
+        self._pending_verify = False
+        self.render_timer = RenderTimer(TRACED_PANELS)
+        self._remote_job: Optional[Worker] = None
+        # The running stage or unstage, which is never cancelled as git holds the index lock
+        self._index_job: Optional[Worker] = None
+        # Lists the untracked files of a snapshot taken without them
+        self._untracked_job: Optional[Worker] = None
+        # Timeout of push, pull and fetch in seconds, none by default
+        self.remote_timeout: Optional[float] = None
+        # Seconds between background fetches, 0 to disable them
+        self.fetch_interval = 0.0
 
     def compose(self) -> ComposeResult:
         """Compose the app layout."""
@@ -72,6 +153,7 @@ class GitxApp(App):
 
     def on_mount(self) -> None:
         """Initial setup when app is mounted."""
+        self.render_timer.install()
         self.title = "GitXApp"
         self.dark = True
 
@@ -79,12 +161,215 @@ class GitxApp(App):
         main_panel = self.query_one(MainPanel)
         main_panel.show_welcome()
 
+        # The panels show the last session, or placeholders, until their data is loaded
+        self._restore_session()
+        with trigger_scope("startup"):
+            self._open_repository()
+
+    def _restore_session(self) -> None:
+        """Show what the panels showed when gitx last ran in this directory, marked as stale."""
+        session = load_session(os.getcwd())
+        if session is None:
+            return
+        self._session = session
+        self.snapshot = session.snapshot
+        self.query_one(StatusPanel).update_snapshot(session.snapshot)
+        self.query_one(FileTree).update_snapshot(session.snapshot)
+        self.query_one(BranchesPanel).show_index(session.branches)
+        self.query_one(CommitLog).restore(session.commits, session.total, session.snapshot.current_branch)
+
+    @work(group="startup")
+    async def _open_repository(self) -> None:
+        """Open the repository in a thread, then load all panels at once.
+
+        A restored session is revalidated meanwhile: its ref tips are read
+        from the repository files, and the log and the branches are only
+        reloaded if they changed.
+        """
+        session, self._session = self._session, None
+        refs = None
+        try:
+            if session is not None:
+                (self.git, self.git_async), refs = await asyncio.gather(
+                    asyncio.to_thread(open_repository), asyncio.to_thread(read_ref_tips, session.git_dir)
+                )
+            else:
+                self.git, self.git_async = await asyncio.to_thread(open_repository)
+        except (ValueError, OSError) as e:
+            self._open_error = e
+            self.query_one(StatusPanel).show_error(e)
+            self.notify(str(e), severity="error")
+            return
+
+        self.remote_timeout = self.git.config.get_float("remoteTimeout", 0) or None
+        self.fetch_interval = self.git.config.get_float("fetchInterval", 0)
+        self.query_one(CommandPanel).apply_config(self.git.config)
+        self.query_one(FileTree).apply_config(self.git.config)
+
+        if refs is None or session.git_dir != self.git.pool.git_dir:
+            # Nothing to revalidate against
+            session = None
+
+        # Everything loads now, including panels whose refresh was asked for in the meantime.
+        # The log and the branches don't need the status snapshot, so they load alongside it
+        self._pending_panels.clear()
+        if session is not None and session.log_is_current(refs):
+            self.query_one(CommitLog).keep_restored()
+        else:
+            # HEAD is read from its file, so the branch label is there right away
+            self.query_one(CommitLog).load(self.git.refs.current_branch())
+        if session is None or not session.branches_are_current(refs):
+            self.query_one(BranchesPanel).load()
+        self.refresh_repository([StatusPanel, FileTree])
+
+        if self.fetch_interval > 0:
+            self.set_interval(self.fetch_interval, self._periodic_fetch)
+
+    def _start_watching(self) -> None:
+        """Start the watcher, once the first snapshot is shown.
+
+        Walking the work tree to add watches holds the GIL for a while, so it
+        waits until the first data is on screen.
+        """
+        if self.watcher is None:
+            with trigger_scope("watcher"):
+                self.watcher = RepoWatcher(self.git, self._on_repository_changed)
+                self.watcher.start()
+
+    def on_unmount(self) -> None:
+        """Stop watching the repository."""
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.render_timer.uninstall()
+
+    async def action_quit(self) -> None:
+        """Save the session while the panels are still there, then quit."""
+        self._save_session()
+        await super().action_quit()
+
+    def _save_session(self) -> None:
+        """Save what the panels show, to be shown right away on the next start."""
+        if self.git is None or self.snapshot is None or self.snapshot.stale:
+            return
+        commit_list = self.query_one(CommitList)
+        branches = self.query_one(BranchesPanel).index
+        session = Session(
+            self.git.pool.git_dir, self.snapshot, branches, commit_list.first_page, commit_list.total
+        )
+        save_session(self.git.repo_path, session)
+
+    async def run_action(self, action, default_namespace=None) -> bool:
+        """Run an action, attributing the git commands it starts to it."""
+        name = action if isinstance(action, str) else action[1]
+        if name in REPOSITORY_ACTIONS and self.git is None:
+            # Refused here rather than disabled with check_action(), which
+            # would make the footer redraw twice during startup
+            if self._open_error is not None:
+                self.notify(str(self._open_error), severity="error")
+            else:
+                self.notify("The repository is still loading", severity="warning")
+            return False
+        with trigger_scope(f"action:{name}"):
+            return await super().run_action(action, default_namespace)
+
+    def _on_repository_changed(self, kinds: Set[str]) -> None:
+        """Refresh the panels affected by a burst of changes (called from the watcher thread)."""
+        panels = {panel for kind in kinds for panel in WATCHED_PANELS.get(kind, ())}
+        try:
+            self.call_from_thread(self._refresh_changed, panels)
+        except RuntimeError:
+            # The app is shutting down
+            pass
+
+    def _refresh_changed(self, panels: Set[type]) -> None:
+        with trigger_scope("watcher"):
+            # Many events, like editors writing swap files or builds touching
+            # ignored files, leave the status as it was
+            self.refresh_repository(panels, verify=True)
+
+    def refresh_repository(self, panels: Optional[Iterable[type]] = None, verify: bool = False) -> None:
+        """Take a new repository snapshot and hand it to the given panels.
+
+        Panels requested by a superseded refresh are carried over, so no update is lost.
+
+        Args:
+            panels: Panel classes to update, all snapshot panels if None
+            verify: First check the index and work tree against the last
+                snapshot without running git, and skip the refresh if nothing
+                changed; only done if every pending refresh asked for it
+        """
+        self._pending_verify = verify and (self._pending_verify or not self._pending_panels)
+        self._pending_panels.update(panels or SNAPSHOT_PANELS)
+        if self.git_async is None:
+            # Loaded once the repository is open
+            return
+        self._load_snapshot()
+
+    @work(exclusive=True, group="snapshot")
+    async def _load_snapshot(self) -> None:
+        """Load a repository snapshot in a worker, cancelling any previous load."""
+        if self._pending_verify and self.snapshot is not None and not self.snapshot.stale and (
+            # Untracked files still missing must be left to the scan listing them
+            self.snapshot.untracked_listed or self._untracked_job is not None and self._untracked_job.is_running
+        ):
+            if await self.git_async.status_unchanged():
+                self._pending_panels.clear()
+                self._pending_verify = False
+                return
+        try:
+            snapshot = await self.git_async.get_snapshot()
+        except Exception as e:
+            self.query_one(StatusPanel).show_error(e)
+            self._start_watching()
+            return
+
+        previous, self.snapshot = self.snapshot, snapshot
+        panels, self._pending_panels = self._pending_panels, set()
+        self._pending_verify = False
+        if previous is not None and previous.stale and snapshot.same_status(previous):
+            # The file tree restored from the last session is still right
+            panels.discard(FileTree)
+        for panel_type in SNAPSHOT_PANELS:
+            if panel_type in panels:
+                with trigger_scope(panel_type.__name__):
+                    self.query_one(panel_type).update_snapshot(snapshot)
+        if CommitLog not in panels:
+            # The log's branch label follows every snapshot, also when the log is not reloaded
+            self.query_one(CommitLog).show_branch(snapshot.current_branch)
+        if not snapshot.untracked_listed:
+            self._untracked_job = self._list_untracked(snapshot)
+        self._start_watching()
+
+    @work(exclusive=True, group="untracked")
+    async def _list_untracked(self, snapshot: RepoSnapshot) -> None:
+        """List the untracked files of a snapshot taken without them, adding them to the file tree as they come.
+
+        A newer snapshot starts its own listing, which cancels this one.
+        """
+        file_tree = self.query_one(FileTree)
+        shown = time.monotonic()
+
+        def on_paths(paths) -> None:
+            nonlocal shown
+            # Untracked files come by the thousand, so the tree is updated a few times a second at most
+            if self.snapshot is snapshot and time.monotonic() - shown >= UNTRACKED_REFRESH_INTERVAL:
+                with trigger_scope(FileTree.__name__):
+                    file_tree.update_snapshot(snapshot)
+                shown = time.monotonic()
+
+        try:
+            await self.git_async.list_untracked(snapshot, on_paths)
+        except Exception as e:
+            self.notify(f"Failed to list untracked files: {e}", severity="error")
+            return
+        if self.snapshot is snapshot:
+            for panel_type in (StatusPanel, FileTree):
+                with trigger_scope(panel_type.__name__):
+                    self.query_one(panel_type).update_snapshot(snapshot)
+
     def action_refresh(self) -> None:
         """Refresh all panels with the latest git data."""
-        self.query_one(StatusPanel).refresh_status()
-        self.query_one(FileTree).refresh_tree()
-        self.query_one(CommitLog).refresh_log()
-        self.query_one(BranchesPanel).refresh_branches()
+        self.refresh_repository()
         self.notify("Refreshed all panels")
 
     def action_toggle_theme(self) -> None:
@@ -92,32 +377,41 @@ class GitxApp(App):
         self.dark = not self.dark
 
     def action_stage_file(self) -> None:
-        """Stage the selected file."""
-        file_tree = self.query_one(FileTree)
-        tree = file_tree.query_one(Tree)
-
-        if tree.cursor_node and hasattr(tree.cursor_node, 'data') and tree.cursor_node.data:
-            file_path = tree.cursor_node.data.get("path")
-            if file_path:
-                if self.git.stage_file(file_path):
-                    self.notify(f"Staged: {file_path}")
-                    self.action_refresh()
-                else:
-                    self.notify(f"Failed to stage: {file_path}", severity="error")
+        """Stage the selected files, or the file or group under the cursor."""
+        self._start_index_update(stage=True)
 
     def action_unstage_file(self) -> None:
-        """Unstage the selected file."""
+        """Unstage the selected files, or the file or group under the cursor."""
+        self._start_index_update(stage=False)
+
+    def _start_index_update(self, stage: bool) -> None:
+        """Stage or unstage unless an earlier stage or unstage is still running."""
+        if self._index_job is not None and self._index_job.is_running:
+            self.notify("Still updating the index, try again when it is done", severity="warning")
+            return
+        self._index_job = self._update_index(stage)
+
+    @work(group="index")
+    async def _update_index(self, stage: bool) -> None:
+        """Stage or unstage the target files with one git call and refresh once."""
         file_tree = self.query_one(FileTree)
-        tree = file_tree.query_one(Tree)
+        paths = list(dict.fromkeys(path for _, path in file_tree.target_files()))
+        if not paths:
+            return
 
-        if tree.cursor_node and hasattr(tree.cursor_node, 'data') and tree.cursor_node.data:
-            file_path = tree.cursor_node.data.get("path")
-            if file_path:
-                if self.git.unstage_file(file_path):
-                    self.notify(f"Unstaged: {file_path}")
-                    self.action_refresh()
-                else:
-                    self.notify(f"Failed to unstage: {file_path}", severity="error")
+        if stage:
+            success, error = await self.git_async.stage_files(paths)
+        else:
+            success, error = await self.git_async.unstage_files(paths)
+
+        verb = "Staged" if stage else "Unstaged"
+        what = paths[0] if len(paths) == 1 else f"{len(paths)} files"
+        if success:
+            file_tree.selected.clear()
+            self.notify(f"{verb}: {what}")
+        else:
+            self.notify(f"Failed to {verb.lower()[:-1]}: {what}\n{error or ''}".rstrip(), severity="error")
+        self.refresh_repository([StatusPanel, FileTree])
 
     def action_commit(self) -> None:
         """Commit staged changes."""
@@ -140,33 +434,122 @@ class GitxApp(App):
                     commit_msg = self.query_one("#commit-message").value
                     if commit_msg.strip():
                         self.app.pop_screen()
-                        if self.app.git.commit(commit_msg):
-                            self.app.notify(f"Committed: {commit_msg}")
-                            self.app.action_refresh()
-                        else:
-                            self.app.notify("Commit failed", severity="error")
+                        self.app._commit(commit_msg)
                     else:
                         self.app.notify("Please enter a commit message", severity="warning")
 
         self.push_screen(CommitScreen())
 
-    def action_push(self) -> None:
-        """Push changes to remote."""
-        success, output = self.git.push()
-        if success:
-            self.notify("Successfully pushed to remote")
+    @work(group="commit")
+    async def _commit(self, message: str) -> None:
+        """Commit in a worker, as git may be retried while another process holds the index lock."""
+        if await self.git_async.commit(message):
+            self.notify(f"Committed: {message}")
+            self.action_refresh()
         else:
-            self.notify(f"Push failed: {output}", severity="error")
-        self.action_refresh()
+            self.notify("Commit failed", severity="error")
+
+    def action_push(self) -> None:
+        """Push changes to remote in the background."""
+        self._start_remote("push")
 
     def action_pull(self) -> None:
-        """Pull changes from remote."""
-        success, output = self.git.pull()
+        """Pull changes from remote in the background."""
+        self._start_remote("pull")
+
+    def action_fetch(self) -> None:
+        """Fetch from remote in the background."""
+        self._start_remote("fetch")
+
+    def action_cancel_job(self) -> None:
+        """Cancel the running push, pull or fetch, or else the running command."""
+        command_panel = self.query_one(CommandPanel)
+        if self._remote_job is not None and self._remote_job.is_running:
+            self._remote_job.cancel()
+        elif command_panel.running:
+            command_panel.action_cancel_command()
+        else:
+            self.notify("No job to cancel")
+
+    def _periodic_fetch(self) -> None:
+        with trigger_scope("periodic fetch"):
+            self._start_remote("fetch", quiet=True)
+
+    def _start_remote(self, operation: str, quiet: bool = False) -> None:
+        """Start a remote operation unless one is already running.
+
+        Args:
+            operation: "push", "pull" or "fetch"
+            quiet: Log the outcome without progress or notifications, for periodic fetches
+        """
+        if self._remote_job is not None and self._remote_job.is_running:
+            if not quiet:
+                self.notify("A remote operation is already running, press x to cancel it", severity="warning")
+            return
+        self._remote_job = self._run_remote(operation, quiet)
+
+    @work(group="remote")
+    async def _run_remote(self, operation: str, quiet: bool) -> None:
+        """Run a remote operation, streaming its progress into the command log."""
+        panel = self.query_one(CommandPanel)
+        name = operation.capitalize()
+        panel.begin_job(f"git {operation}" + (" (background)" if quiet else " (press x to cancel)"))
+        if not quiet:
+            self.notify(f"{name} started...")
+
+        start = time.monotonic()
+        run = getattr(self.git_async, operation)
+        try:
+            success, output = await run(
+                timeout=self.remote_timeout,
+                on_progress=None if quiet else panel.show_progress,
+            )
+        except asyncio.CancelledError:
+            panel.end_job(False, f"{name} cancelled")
+            self.notify(f"{name} cancelled", severity="warning")
+            raise
+
+        elapsed = time.monotonic() - start
         if success:
-            self.notify("Successfully pulled from remote")
+            panel.end_job(True, f"{name} finished in {elapsed:.1f}s")
+            if not quiet:
+                self.notify(f"{name} finished")
         else:
-            self.notify(f"Pull failed: {output}", severity="error")
-        self.action_refresh()
+            panel.end_job(False, f"{name} failed after {elapsed:.1f}s: {output or ''}".rstrip())
+            if not quiet:
+                self.notify(f"{name} failed: {output}", severity="error")
+        self.refresh_repository()
+
+    async def action_toggle_trace(self) -> None:
+        """Show or hide the performance overlay, creating it the first time."""
+        try:
+            overlay = self.query_one("#trace-overlay")
+        except NoMatches:
+            from gitx.widgets.trace_overlay import TraceOverlay
+
+            overlay = TraceOverlay(id="trace-overlay")
+            await self.mount(overlay)
+        overlay.toggle()
+
+    def action_export_trace(self) -> None:
+        """Write the recorded git calls and render times as JSON and as a Chrome trace."""
+        import json
+
+        from gitx.trace import export_chrome_trace, export_json
+
+        directory = os.path.join(user_cache_dir(), "traces")
+        stem = os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S"))
+        calls = list(self.git.pool.timings)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(stem + ".json", "w") as f:
+                json.dump(export_json(calls, self.render_timer.stats), f)
+            with open(stem + ".chrome.json", "w") as f:
+                json.dump(export_chrome_trace(calls, self.render_timer.stats), f)
+        except OSError as e:
+            self.notify(f"Failed to export trace: {e}", severity="error")
+            return
+        self.notify(f"Trace written to {stem}.json and {stem}.chrome.json")
 
     def action_new_branch(self) -> None:
         """Create a new branch."""
@@ -189,16 +572,56 @@ class GitxApp(App):
                     branch_name = self.query_one("#branch-name").value
                     if branch_name.strip():
                         self.app.pop_screen()
-                        if self.app.git.create_branch(branch_name):
-                            self.app.notify(f"Created and switched to branch: {branch_name}")
-                            self.app.action_refresh()
-                        else:
-                            self.app.notify(f"Failed to create branch: {branch_name}", severity="error")
+                        self.app._create_branch(branch_name)
                     else:
                         self.app.notify("Please enter a branch name", severity="warning")
 
         self.push_screen(BranchScreen())
 
+    @work(group="commit")
+    async def _create_branch(self, branch_name: str) -> None:
+        """Create and switch to a branch in a worker, off the event loop like _commit."""
+        if await self.git_async.create_branch(branch_name):
+            self.notify(f"Created and switched to branch: {branch_name}")
+            self.action_refresh()
+        else:
+            self.notify(f"Failed to create branch: {branch_name}", severity="error")
+
+    def action_full_diff(self) -> None:
+        """Load the full diff of a file shown as a summary."""
+        if not self.query_one(MainPanel).show_full_diff():
+            self.notify("The current diff is already shown in full")
+
+    def action_goto_commit(self) -> None:
+        """Jump the commit log to a commit hash or offset."""
+        from textual.widgets import Label
+
+        class GotoScreen(Screen):
+            def compose(self) -> ComposeResult:
+                yield Container(
+                    Label("[bold]Go to commit (hash, revision or offset):[/bold]"),
+                    Input(id="goto-target", placeholder="e.g. a1b2c3d, v1.0 or 500"),
+                    Static("Press Enter to jump, Esc to cancel"),
+                    id="goto-dialog"
+                )
+
+            def on_key(self, event):
+                if event.key == "escape":
+                    self.app.pop_screen()
+                elif event.key == "enter":
+                    target = self.query_one("#goto-target").value.strip()
+                    if not target:
+                        self.app.notify("Please enter a commit or offset", severity="warning")
+                        return
+                    self.app.pop_screen()
+                    commit_log = self.app.query_one(CommitLog)
+                    if target.isdigit() and len(target) < 7:
+                        commit_log.jump_to_offset(int(target))
+                    else:
+                        commit_log.jump_to_commit(target)
+
+        self.push_screen(GotoScreen())
+
     def action_toggle_help(self) -> None:
         """Toggle help screen."""
         from textual.widgets import Label  # Add this import
@@ -210,13 +633,26 @@ class GitxApp(App):
                     Static("[bold]Keyboard Shortcuts:[/bold]"),
                     Static("q - Quit"),
                     Static("t - Toggle theme"),
-                    Static("s - Stage selected file"),
-                    Static("u - Unstage selected file"),
+                    Static("s - Stage selected files"),
+                    Static("u - Unstage selected files"),
+                    Static("v - Select file, directory or whole group (in the file tree)"),
+                    Static("d - Select all files in the same directory"),
+                    Static("` - Show files by directory or as a flat list"),
+                    Static("Esc - Clear file selection"),
                     Static("c - Commit staged changes"),
                     Static("p - Push to remote"),
                     Static("f - Pull from remote"),
+                    Static("F - Fetch from remote"),
+                    Static("x - Cancel a running push, pull, fetch or command"),
+                    Static("Esc - Cancel a running command (in the command panel)"),
                     Static("b - Create new branch"),
                     Static("r - Refresh all panels"),
+                    Static("g - Go to a commit by hash or offset in the log"),
+                    Static("[ / ] - Previous / next hunk in a diff"),
+                    Static("/ - Filter branches by name (in the branches panel)"),
+                    Static("L - Load the full diff of a file shown as a summary"),
+                    Static("T - Toggle the performance overlay"),
+                    Static("E - Export git calls and render times (JSON and Chrome trace)"),
                     Static("? - Toggle this help screen"),
                     Static("^p - Command palette"),
                     Static(""),
@@ -233,7 +669,11 @@ class GitxApp(App):
 def main() -> None:
     """Run the app."""
     app = GitxApp()
-    app.run()
+    try:
+        app.run()
+    finally:
+        if app.git is not None:
+            app.git.close()
 
 
 if __name__ == "__main__":
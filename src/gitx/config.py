@@ -0,0 +1,80 @@
+import subprocess
+from typing import Dict, Optional
+
+# Multipliers for the k/m/g suffixes git accepts on integer settings
+_UNITS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+class GitxConfig:
+    """gitx settings, read from the `gitx.*` keys of git config.
+
+    Settings live in git config so they can be set globally or per
+    repository, e.g. `git config gitx.diffCacheSize 64m`. Keys are case
+    insensitive like all git config keys.
+    """
+
+    def __init__(self, values: Optional[Dict[str, str]] = None):
+        """Initialize the config.
+
+        Args:
+            values: Setting values keyed by lowercased name without the "gitx." prefix
+        """
+        self.values = values or {}
+
+    @classmethod
+    def load(cls, pool) -> "GitxConfig":
+        """Read the settings of a repository.
+
+        Args:
+            pool: The GitProcessPool of the repository
+        """
+        try:
+            result = pool.run("config", "-z", "--get-regexp", r"^gitx\.")
+        except subprocess.CalledProcessError:
+            # Exit status 1 means no gitx settings
+            return cls()
+
+        values = {}
+        for entry in result.stdout.split("\0"):
+            key, _, value = entry.partition("\n")
+            if key:
+                # The last value of a multi-valued key wins, as with `git config --get`
+                values[key[len("gitx."):].lower()] = value
+        return cls(values)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key.lower(), default)
+
+    def get_int(self, key: str, default: int) -> int:
+        """Read an integer setting, accepting git's k/m/g suffixes."""
+        value = self.get(key)
+        if value is None:
+            return default
+        value = value.strip().lower()
+        try:
+            if value and value[-1] in _UNITS:
+                return int(value[:-1]) * _UNITS[value[-1]]
+            return int(value)
+        except ValueError:
+            return default
+
+    def get_float(self, key: str, default: float) -> float:
+        value = self.get(key)
+        if value is None:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            return default
+
+    def get_bool(self, key: str, default: bool) -> bool:
+        """Read a boolean setting the way git does (true/yes/on/1, false/no/off/0)."""
+        value = self.get(key)
+        if value is None:
+            return default
+        value = value.strip().lower()
+        if value in ("", "true", "yes", "on", "1"):
+            return True
+        if value in ("false", "no", "off", "0"):
+            return False
+        return default
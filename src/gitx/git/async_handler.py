@@ -0,0 +1,848 @@
+import asyncio
+import contextvars
+import os
+import re
+import signal
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from gitx.git.handler import (
+    STAGE_ARGS,
+    UNSTAGE_ARGS,
+    GitHandler,
+    commit_details,
+    commit_diff_args,
+    file_diff_args,
+    is_full_hash,
+    pathspec_input,
+)
+from gitx.git.branches import BRANCH_ARGS, REMOTE_ARGS, BranchIndex, parse_branch_refs
+from gitx.git.diff import DiffBuffer, DiffProbe
+from gitx.git.diff_cache import commit_diff_key
+from gitx.git.history import METADATA_ARGS, CommitMetadata, CommitRecord, page_args, parse_metadata
+from gitx.git.pool import LOCK_RETRY_DELAYS, lock_held
+from gitx.git.snapshot import SNAPSHOT_ARGS, PorcelainV2Parser, RepoSnapshot, UntrackedParser
+from gitx.trace import clock
+
+# Line ends in command output; "\r" alone redraws a progress line
+_LINE_END = re.compile(rb"(\r\n|\r|\n)")
+
+
+async def _read_lines(
+    stream: asyncio.StreamReader,
+    emit: Callable[[bytes, bool], None],
+    chunk_size: int = 64 * 1024,
+) -> None:
+    """Hand each line of a stream to emit, with whether it ended in a lone carriage return."""
+    pending = b""
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk
+        # A trailing "\r" may be the first half of "\r\n"
+        cut = len(data) - 1 if data.endswith(b"\r") else len(data)
+        parts = _LINE_END.split(data[:cut])
+        pending = parts.pop() + data[cut:]
+        for i in range(0, len(parts), 2):
+            emit(parts[i], parts[i + 1] == b"\r")
+    if pending.rstrip(b"\r"):
+        emit(pending.rstrip(b"\r"), False)
+
+
+class AsyncGitHandler:
+    """Asyncio counterpart of GitHandler.
+
+    Commands run through `asyncio.create_subprocess_exec`, so awaiting them
+    never blocks the event loop. Each call has a timeout, and cancelling the
+    awaiting task kills the git process.
+    """
+
+    def __init__(self, git: GitHandler, timeout: Optional[float] = 30.0):
+        """Initialize the async handler.
+
+        Args:
+            git: The synchronous handler whose repository and process pool are shared
+            timeout: Default timeout in seconds for read commands, None to wait forever.
+                Commands that change the repository never time out.
+        """
+        self.git = git
+        self.timeout = timeout
+        # Created on first use, inside the event loop
+        self._abbrev_lock: Optional[asyncio.Lock] = None
+        # Commands writing to the repository that are still running
+        self._mutations: Set["asyncio.Future[subprocess.CompletedProcess]"] = set()
+
+    async def _run_git_command(
+        self,
+        *args: str,
+        timeout: Optional[float] = None,
+        input: Optional[str] = None,
+        use_default_timeout: bool = True,
+        text: bool = True,
+    ) -> subprocess.CompletedProcess:
+        """Run a git command without blocking the event loop.
+
+        Args:
+            *args: Arguments to pass to git
+            timeout: Timeout in seconds, falls back to the handler default
+            input: Optional text to feed to the command's stdin
+            use_default_timeout: Whether to apply the default timeout when timeout is None
+            text: Decode output as text, otherwise return raw bytes
+
+        Returns:
+            The completed process with decoded output
+
+        Raises:
+            subprocess.CalledProcessError: If git exits with a non-zero status
+            subprocess.TimeoutExpired: If the command does not finish in time
+        """
+        if timeout is None and use_default_timeout:
+            timeout = self.timeout
+
+        cmd = self.git.pool.cmd_prefix + list(args)
+        start = clock()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self.git.pool.env,
+            # Own process group, so helpers git spawns (ssh, hooks) die with it
+            start_new_session=os.name == "posix",
+        )
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(input.encode() if input is not None else None), timeout
+            )
+        except asyncio.TimeoutError:
+            await self._kill(proc)
+            self.git.pool.record(args, start, proc.returncode)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            self.git.pool.record(args, start, proc.returncode)
+            raise
+
+        self.git.pool.record(args, start, proc.returncode, len(stdout), len(stderr))
+        if text:
+            stdout, stderr = stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        result = subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+        result.check_returncode()
+        return result
+
+    async def _run_mutating_command(self, *args: str, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        """Run a git command that changes the repository, retrying with backoff while a lock is held.
+
+        Such commands hold a lock (index.lock, a ref lock) while they run,
+        and killing them would leave it behind and make every later write
+        fail. So no timeout applies, and cancelling the caller does not stop
+        the command: it runs to the end in the background.
+
+        Args:
+            *args: Arguments to pass to git
+            input: Optional text to feed to the command's stdin
+
+        Returns:
+            The completed process with decoded output
+
+        Raises:
+            subprocess.CalledProcessError: If git fails for another reason, or still finds
+                the lock held after the last retry
+        """
+        task = asyncio.ensure_future(self._retry_while_locked(*args, input=input))
+        # Keep a reference, so a command the caller stopped waiting for is not collected
+        self._mutations.add(task)
+        task.add_done_callback(self._mutations.discard)
+        return await asyncio.shield(task)
+
+    async def _retry_while_locked(self, *args: str, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        for delay in LOCK_RETRY_DELAYS:
+            try:
+                return await self._run_git_command(*args, input=input, use_default_timeout=False)
+            except subprocess.CalledProcessError as e:
+                if not lock_held(e.stderr):
+                    raise
+            await asyncio.sleep(delay)
+        return await self._run_git_command(*args, input=input, use_default_timeout=False)
+
+    async def _stream_git_command(
+        self,
+        *args: str,
+        on_chunk: Callable[[bytes], Optional[bool]],
+        timeout: Optional[float] = None,
+        use_default_timeout: bool = True,
+        chunk_size: int = 64 * 1024,
+    ) -> subprocess.CompletedProcess:
+        """Run a git command, handing its stdout to a callback chunk by chunk.
+
+        Args:
+            *args: Arguments to pass to git
+            on_chunk: Called with each chunk of raw stdout as it arrives. Returning True
+                stops reading; the process is then killed and its exit status not checked.
+            timeout: Timeout in seconds for the whole command, falls back to the handler default
+            use_default_timeout: Whether to apply the default timeout when timeout is None
+            chunk_size: Maximum size of each chunk in bytes
+
+        Returns:
+            The completed process, with stdout set to None and decoded stderr
+
+        Raises:
+            subprocess.CalledProcessError: If git exits with a non-zero status
+            subprocess.TimeoutExpired: If the command does not finish in time
+        """
+        if timeout is None and use_default_timeout:
+            timeout = self.timeout
+
+        cmd = self.git.pool.cmd_prefix + list(args)
+        start = clock()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self.git.pool.env,
+            start_new_session=os.name == "posix",
+        )
+
+        stopped = False
+        size = 0
+
+        async def pump() -> bytes:
+            nonlocal stopped, size
+            stderr_task = asyncio.ensure_future(proc.stderr.read())
+            try:
+                while True:
+                    chunk = await proc.stdout.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if on_chunk(chunk):
+                        stopped = True
+                        await self._kill(proc)
+                        return b""
+                await proc.wait()
+                return await stderr_task
+            finally:
+                stderr_task.cancel()
+
+        try:
+            stderr = await asyncio.wait_for(pump(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(proc)
+            self.git.pool.record(args, start, proc.returncode, size)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except BaseException:
+            # Cancelled, or the callback raised
+            await self._kill(proc)
+            self.git.pool.record(args, start, proc.returncode, size)
+            raise
+
+        self.git.pool.record(args, start, proc.returncode, size, len(stderr))
+        result = subprocess.CompletedProcess(cmd, proc.returncode, None, stderr.decode(errors="replace"))
+        if not stopped:
+            result.check_returncode()
+        return result
+
+    @staticmethod
+    async def _in_thread(func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the default executor, keeping the trigger of the caller."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, contextvars.copy_context().run, func, *args)
+
+    @staticmethod
+    async def _kill(proc: asyncio.subprocess.Process) -> None:
+        try:
+            if os.name == "posix":
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        await proc.wait()
+
+    async def get_status(self) -> Dict[str, List[str]]:
+        """Get the status of the repository."""
+        snapshot = await self.get_snapshot()
+        if not snapshot.untracked_listed:
+            await self.list_untracked(snapshot)
+        return snapshot.status_groups()
+
+    async def get_current_branch(self) -> str:
+        """Get the name of the current branch, from the HEAD file where possible."""
+        branch = self.git.refs.current_branch()
+        if branch is not None:
+            return branch
+        result = await self._run_git_command("rev-parse", "--abbrev-ref", "HEAD")
+        return result.stdout.strip()
+
+    async def get_snapshot(self) -> RepoSnapshot:
+        """Capture branch, upstream and file status with a single git call.
+
+        The NUL-delimited output is parsed incrementally as git writes it.
+        Untracked files are left to list_untracked() if untracked_scan() is set.
+        """
+        baseline = await self._in_thread(self.git.status_baseline)
+        args = await self._in_thread(self.git.snapshot_args)
+        parser = PorcelainV2Parser()
+        await self._stream_git_command(*args, on_chunk=parser.feed)
+        snapshot = parser.close()
+        snapshot.untracked_listed = args == SNAPSHOT_ARGS
+        return self.git._snapshot_taken(snapshot, baseline)
+
+    async def list_untracked(
+        self, snapshot: RepoSnapshot, on_paths: Optional[Callable[[List[str]], None]] = None
+    ) -> None:
+        """Add the untracked files to a snapshot taken without them.
+
+        Args:
+            snapshot: A snapshot from get_snapshot() with untracked_listed unset
+            on_paths: Called with each batch of paths as they are added
+        """
+        args = self.git.untracked_scan()
+        parser = UntrackedParser(porcelain=args[0] == "status")
+
+        def on_chunk(chunk: bytes) -> None:
+            self.git._untracked_found(snapshot, parser.feed(chunk), on_paths)
+
+        # Walking a huge work tree is what this runs apart from status for, so it has no timeout
+        await self._stream_git_command(*args, on_chunk=on_chunk, use_default_timeout=False)
+        self.git._untracked_found(snapshot, parser.close(), on_paths)
+        snapshot.untracked_listed = True
+
+    async def status_unchanged(self) -> bool:
+        """Whether a quick stat check shows that status would still give the last snapshot."""
+        return await self._in_thread(self.git.status_unchanged)
+
+    async def get_branches(self) -> List[Dict[str, Any]]:
+        """Get all branches in the repository.
+
+        Returns:
+            List of local branch dictionaries with name, current, remote (the
+            configured upstream), ahead, behind, tip and date
+        """
+        return [branch.as_dict() for branch in (await self.get_branch_index()).local]
+
+    async def get_branch_index(self) -> BranchIndex:
+        """Read every local and remote-tracking branch with a single `for-each-ref`.
+
+        Each branch comes with its HEAD marker, configured upstream,
+        ahead/behind counts, tip and commit date. The configured remotes are
+        listed too, as a remote name may contain "/". The listing is reused
+        while HEAD, the branch tips and the config are unchanged.
+        """
+        state, index = await self._in_thread(self.git.cached_branch_index)
+        if index is None:
+            result, remotes = await asyncio.gather(
+                self._run_git_command(*BRANCH_ARGS), self._run_git_command(*REMOTE_ARGS)
+            )
+            index = parse_branch_refs(result.stdout, remotes.stdout.split())
+            self.git.branch_index_read(state, index)
+        return index
+
+    async def get_commit_history(self, count: int = 20) -> List[Dict[str, str]]:
+        """Get commit history.
+
+        Args:
+            count: Number of commits to retrieve
+
+        Returns:
+            List of commit dictionaries with hash, author, date, and message
+        """
+        return [record.as_dict() for record in await self.get_commit_page(0, count)]
+
+    async def get_commit_page(self, skip: int, count: int, rev: str = "HEAD") -> List[CommitRecord]:
+        """Get one page of the commit log without formatting the commits before it.
+
+        Args:
+            skip: Number of commits to skip from the tip
+            count: Maximum number of commits to return
+            rev: Revision to walk from
+
+        Returns:
+            The commit records of the page
+        """
+        objects = self.git.object_backend()
+        if objects is not None:
+            # The abbreviation length is only looked up once, alongside the first page
+            commits, abbrev = await asyncio.gather(
+                self._in_thread(objects.commit_page, skip, count, rev), self.abbrev_length()
+            )
+            if commits is not None:
+                return [commit.record(abbrev) for commit in commits]
+
+        try:
+            result, abbrev = await asyncio.gather(
+                self._run_git_command(*page_args(skip, count, rev)), self.abbrev_length()
+            )
+        except subprocess.CalledProcessError:
+            # e.g. no commits yet
+            return []
+
+        hashes = result.stdout.split()
+        commits = await self.get_commit_metadata(hashes)
+        return [commits[h].record(abbrev) for h in hashes if h in commits]
+
+    async def abbrev_length(self) -> int:
+        """Length git abbreviates commit hashes to in this repository."""
+        if self._abbrev_lock is None:
+            self._abbrev_lock = asyncio.Lock()
+        # Concurrent page loads wait for the first lookup instead of repeating it
+        async with self._abbrev_lock:
+            if self.git._abbrev is None:
+                try:
+                    result = await self._run_git_command("rev-parse", "--short", "HEAD")
+                except subprocess.CalledProcessError:
+                    return 7
+                self.git._abbrev = len(result.stdout.strip())
+        return self.git._abbrev
+
+    async def get_commit_metadata(self, hashes: List[str]) -> Dict[str, CommitMetadata]:
+        """Get the metadata of commits, reading the commit cache first.
+
+        Commits missing from the cache are read with a single `git log` call
+        and added to it.
+
+        Args:
+            hashes: Full commit hashes
+
+        Returns:
+            The metadata by hash
+        """
+        cache = self.git.commit_cache
+        commits = await self._in_thread(cache.get_many, hashes)
+        missing = [h for h in hashes if h not in commits]
+        if missing:
+            result = await self._run_git_command(*METADATA_ARGS, input="\n".join(missing) + "\n")
+            fetched = parse_metadata(result.stdout)
+            await self._in_thread(cache.put_many, fetched)
+            commits.update((commit.hash, commit) for commit in fetched)
+        return commits
+
+    async def count_commits(self, rev: str = "HEAD") -> int:
+        """Count the commits reachable from a revision."""
+        try:
+            result = await self._run_git_command("rev-list", "--count", rev, "--", use_default_timeout=False)
+        except subprocess.CalledProcessError:
+            return 0
+        return int(result.stdout.strip() or 0)
+
+    async def find_commit_offset(self, commit: str, rev: str = "HEAD") -> Optional[int]:
+        """Find the position of a commit in the log of a revision.
+
+        Only commit ids are streamed until the commit is found, nothing is formatted.
+
+        Args:
+            commit: Full or abbreviated commit hash, or any revision naming a commit
+            rev: Revision whose log to search
+
+        Returns:
+            The zero-based offset, or None if the commit is not in the log
+        """
+        info = await self._in_thread(self.git.pool.object_info, f"{commit}^{{commit}}")
+        if info is None:
+            return None
+        target = info[0].encode()
+
+        found: Optional[int] = None
+        offset = 0
+        tail = b""
+
+        def on_chunk(chunk: bytes) -> bool:
+            nonlocal found, offset, tail
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            if target in lines:
+                found = offset + lines.index(target)
+                return True
+            offset += len(lines)
+            return False
+
+        try:
+            await self._stream_git_command("rev-list", rev, "--", on_chunk=on_chunk, use_default_timeout=False)
+        except subprocess.CalledProcessError:
+            return None
+        return found
+
+    async def get_commit_details(self, commit_hash: str) -> Dict[str, Any]:
+        """Get detailed information about a specific commit.
+
+        Args:
+            commit_hash: The commit hash to get details for
+
+        Returns:
+            Dictionary with commit details including full hash, author, date, message, and changed files
+        """
+        cache = self.git.commit_cache
+        objects = self.git.object_backend()
+        renames = await self._in_thread(self.git.rename_detection)
+        commit = None
+        if is_full_hash(commit_hash):
+            commit = await self._in_thread(cache.get, commit_hash, renames)
+            if commit is None and objects is not None:
+                commit = await self._in_thread(objects.read_commit, commit_hash)
+        if commit is None:
+            obj = await self._in_thread(self.git.pool.cat_file, commit_hash)
+            if obj is None or obj[1] != "commit":
+                return {}
+            commit = CommitMetadata.from_object(obj[0], obj[2])
+            if commit is None:
+                return {}
+
+        if commit.files is None:
+            files = None
+            if objects is not None:
+                files = await self._in_thread(objects.changed_files, commit, renames)
+            if files is None:
+                files = (await self._run_git_command("show", "--name-status", "--pretty=format:", commit.hash)).stdout
+            commit.files = files
+            await self._in_thread(cache.put, commit, renames)
+
+        return commit_details(commit)
+
+    async def get_repo_status_summary(self) -> Dict[str, str]:
+        """Get a summary of the repository status."""
+        return (await self.get_snapshot()).summary()
+
+    async def get_file_diff(self, file_path: str, staged: bool = False) -> str:
+        """Get the diff for a specific file.
+
+        Args:
+            file_path: Path to the file
+            staged: Whether to get the staged diff
+
+        Returns:
+            Diff output as a string
+        """
+        cache = self.git.diff_cache
+        key = self.git.file_diff_key(file_path, staged)
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = await self._run_git_command(*file_diff_args(file_path, staged))
+        if key is not None:
+            cache.put(key, result.stdout)
+        return result.stdout
+
+    async def probe_file_diff(self, file_path: str, staged: bool = False) -> DiffProbe:
+        """Find the size of both sides of a file diff and whether it is binary, without diffing.
+
+        See GitHandler.probe_file_diff.
+        """
+        return await self._in_thread(self.git.probe_file_diff, file_path, staged)
+
+    async def get_file_diff_stat(self, file_path: str, staged: bool = False) -> str:
+        """Get the `--stat --summary` of a file diff."""
+        result = await self._run_git_command(*file_diff_args(file_path, staged, stat=True))
+        return result.stdout
+
+    async def stream_file_diff(self, file_path: str, staged: bool, buffer: DiffBuffer) -> None:
+        """Feed the diff of a file into a buffer as git writes it.
+
+        Cached diffs are fed from the diff cache, and diffs that are small
+        relative to its budget are added to it. The diff can be of any size,
+        so no timeout applies.
+
+        Args:
+            file_path: Path to the file
+            staged: Whether to get the staged diff
+            buffer: The buffer to fill
+        """
+        cache = self.git.diff_cache
+        key = self.git.file_diff_key(file_path, staged)
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            buffer.feed(cached.encode())
+        else:
+            await self._stream_git_command(
+                *file_diff_args(file_path, staged), on_chunk=buffer.feed, use_default_timeout=False
+            )
+            if key is not None and buffer.size <= cache.max_bytes // 8:
+                cache.put(key, buffer.text())
+        buffer.finish()
+
+    async def get_commit_diff(self, old: str, new: str, file_path: Optional[str] = None) -> str:
+        """Get the diff between two commits.
+
+        Diffs between full commit hashes are cached, since they never change.
+
+        Args:
+            old: The commit to diff from
+            new: The commit to diff to
+            file_path: Limit the diff to this path
+
+        Returns:
+            Diff output as a string
+        """
+        cache = self.git.diff_cache
+        key = commit_diff_key(old, new, file_path) if is_full_hash(old) and is_full_hash(new) else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = await self._run_git_command(*commit_diff_args(old, new, file_path))
+        if key is not None:
+            cache.put(key, result.stdout)
+        return result.stdout
+
+    async def stage_files(self, file_paths: List[str]) -> Tuple[bool, Optional[str]]:
+        """Stage files with a single `git add`, however many there are.
+
+        Args:
+            file_paths: Paths to stage
+
+        Returns:
+            Tuple of (success, error output)
+        """
+        try:
+            await self._run_mutating_command(*STAGE_ARGS, input=pathspec_input(file_paths))
+            return True, None
+        except subprocess.CalledProcessError as e:
+            return False, e.stderr
+        except subprocess.TimeoutExpired as e:
+            return False, f"timed out after {e.timeout:g}s"
+
+    async def unstage_files(self, file_paths: List[str]) -> Tuple[bool, Optional[str]]:
+        """Unstage files with a single `git reset`, however many there are.
+
+        Args:
+            file_paths: Paths to unstage
+
+        Returns:
+            Tuple of (success, error output)
+        """
+        try:
+            await self._run_mutating_command(*UNSTAGE_ARGS, input=pathspec_input(file_paths))
+            return True, None
+        except subprocess.CalledProcessError as e:
+            return False, e.stderr
+        except subprocess.TimeoutExpired as e:
+            return False, f"timed out after {e.timeout:g}s"
+
+    async def commit(self, message: str) -> bool:
+        """Commit staged changes, waiting for a held index lock without blocking the event loop.
+
+        Hooks and signing may take long; the commit is never timed out or killed.
+
+        Args:
+            message: Commit message
+
+        Returns:
+            True if successful
+        """
+        try:
+            await self._run_mutating_command("commit", "-m", message)
+            return True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return False
+
+    async def create_branch(self, branch_name: str) -> bool:
+        """Create a new branch and switch to it.
+
+        Args:
+            branch_name: Name of the branch to create
+
+        Returns:
+            True if successful
+        """
+        try:
+            await self._run_mutating_command("checkout", "-b", branch_name)
+            return True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            return False
+
+    async def _run_remote_command(
+        self,
+        *args: str,
+        on_progress: Optional[Callable[[str, bool], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run a command that talks to a remote, streaming its stderr as it arrives.
+
+        Progress meters redraw one line by ending it with a carriage return
+        instead of a newline. Each line of stderr is handed to on_progress
+        along with whether it is such a transient line; only the other lines
+        are kept in the result's stderr. Credential prompts are disabled,
+        since there is no terminal to answer them. Unlike other commands that
+        change the repository, these are not retried when a lock is held, as
+        they may already have transferred data with the remote.
+
+        Args:
+            *args: Arguments to pass to git
+            on_progress: Called with each line of stderr and whether it is transient
+            timeout: Timeout in seconds for the whole command, None to wait forever
+
+        Returns:
+            The completed process with decoded output
+
+        Raises:
+            subprocess.CalledProcessError: If git exits with a non-zero status
+            subprocess.TimeoutExpired: If the command does not finish in time
+        """
+        cmd = self.git.pool.cmd_prefix + list(args)
+        start = clock()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=dict(self.git.pool.user_env, GIT_TERMINAL_PROMPT="0"),
+            start_new_session=os.name == "posix",
+        )
+        lines: List[str] = []
+
+        def emit(data: bytes, transient: bool) -> None:
+            line = data.decode(errors="replace")
+            if not transient:
+                lines.append(line)
+            if on_progress is not None:
+                on_progress(line, transient)
+
+        async def run() -> bytes:
+            stdout, _ = await asyncio.gather(proc.stdout.read(), _read_lines(proc.stderr, emit))
+            await proc.wait()
+            return stdout
+
+        try:
+            stdout = await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(proc)
+            self.git.pool.record(args, start, proc.returncode)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except BaseException:
+            # Cancelled, or the callback raised
+            await self._kill(proc)
+            self.git.pool.record(args, start, proc.returncode)
+            raise
+
+        self.git.pool.record(args, start, proc.returncode, len(stdout), sum(map(len, lines)))
+        result = subprocess.CompletedProcess(cmd, proc.returncode, stdout.decode(errors="replace"), "\n".join(lines))
+        result.check_returncode()
+        return result
+
+    async def _remote(
+        self,
+        *args: str,
+        on_progress: Optional[Callable[[str, bool], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[bool, Optional[str]]:
+        try:
+            result = await self._run_remote_command(*args, "--progress", on_progress=on_progress, timeout=timeout)
+            return True, result.stdout or result.stderr
+        except subprocess.CalledProcessError as e:
+            return False, e.stderr
+        except subprocess.TimeoutExpired:
+            return False, f"timed out after {timeout:g}s"
+
+    async def pull(
+        self,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[str, bool], None]] = None,
+    ) -> Tuple[bool, Optional[str]]:
+        """Pull changes from remote.
+
+        Args:
+            timeout: Timeout in seconds, None to wait until the remote answers
+            on_progress: Called with each line of progress output and whether it is transient
+
+        Returns:
+            Tuple of (success, output_or_error_message)
+        """
+        return await self._remote("pull", on_progress=on_progress, timeout=timeout)
+
+    async def push(
+        self,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[str, bool], None]] = None,
+    ) -> Tuple[bool, Optional[str]]:
+        """Push changes to remote.
+
+        Args:
+            timeout: Timeout in seconds, None to wait until the remote answers
+            on_progress: Called with each line of progress output and whether it is transient
+
+        Returns:
+            Tuple of (success, output_or_error_message)
+        """
+        return await self._remote("push", on_progress=on_progress, timeout=timeout)
+
+    async def fetch(
+        self,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[str, bool], None]] = None,
+    ) -> Tuple[bool, Optional[str]]:
+        """Fetch from the default remote without touching the work tree.
+
+        Args:
+            timeout: Timeout in seconds, None to wait until the remote answers
+            on_progress: Called with each line of progress output and whether it is transient
+
+        Returns:
+            Tuple of (success, output_or_error_message)
+        """
+        return await self._remote("fetch", on_progress=on_progress, timeout=timeout)
+
+    async def run_command(
+        self,
+        args: List[str],
+        on_output: Callable[[str, bool], None],
+        timeout: Optional[float] = None,
+    ) -> int:
+        """Run a user-entered git command, streaming its output line by line.
+
+        The command runs with the environment of pool.user_env: it may take
+        optional locks like git in a terminal, and is not retried when it
+        finds a lock held.
+
+        Args:
+            args: Arguments to pass to git, e.g. from parse_command
+            on_output: Called with each line of output and whether it came from stderr
+            timeout: Timeout in seconds, None to wait forever
+
+        Returns:
+            The exit status of the command
+
+        Raises:
+            subprocess.TimeoutExpired: If the command does not finish in time
+        """
+        cmd = self.git.pool.cmd_prefix + list(args)
+        start = clock()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=dict(self.git.pool.user_env, GIT_TERMINAL_PROMPT="0"),
+            start_new_session=os.name == "posix",
+        )
+
+        # Bytes of stdout and stderr, without line ends
+        sizes = [0, 0]
+
+        def emit(stderr: bool) -> Callable[[bytes, bool], None]:
+            def emit_line(data: bytes, _: bool) -> None:
+                sizes[stderr] += len(data)
+                on_output(data.decode(errors="replace"), stderr)
+            return emit_line
+
+        async def run() -> None:
+            await asyncio.gather(_read_lines(proc.stdout, emit(False)), _read_lines(proc.stderr, emit(True)))
+            await proc.wait()
+
+        try:
+            await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(proc)
+            self.git.pool.record(tuple(args), start, proc.returncode, *sizes)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        except BaseException:
+            await self._kill(proc)
+            self.git.pool.record(tuple(args), start, proc.returncode, *sizes)
+            raise
+
+        self.git.pool.record(tuple(args), start, proc.returncode, *sizes)
+        return proc.returncode
@@ -0,0 +1,239 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# One line per ref, fields separated by NUL. Ref names cannot contain
+# newlines or NUL, and the track field is the only free-form one.
+BRANCH_FORMAT = (
+    "--format=%(refname)%00%(symref)%00%(HEAD)%00%(upstream)%00"
+    "%(upstream:track,nobracket)%00%(objectname)%00%(committerdate:unix)"
+)
+
+# Arguments for the single for-each-ref call that lists every branch
+BRANCH_ARGS = ("for-each-ref", BRANCH_FORMAT, "refs/heads/", "refs/remotes/")
+
+# Arguments listing the configured remotes, one per line
+REMOTE_ARGS = ("remote",)
+
+_HEADS = "refs/heads/"
+_REMOTES = "refs/remotes/"
+
+
+def short_ref_name(refname: str) -> str:
+    """Shorten a full ref name the way %(refname:short) does for branches."""
+    if refname.startswith(_HEADS):
+        return refname[len(_HEADS):]
+    if refname.startswith(_REMOTES):
+        return refname[len(_REMOTES):]
+    return refname
+
+
+def remote_of(name: str, remotes: Iterable[str] = ()) -> str:
+    """The remote a remote-tracking branch belongs to, from its short name.
+
+    Remote names may contain "/", so the longest configured remote that
+    prefixes the name wins. Without one the name is split at the first "/".
+    """
+    best = ""
+    for remote in remotes:
+        if len(remote) > len(best) and name.startswith(remote + "/"):
+            best = remote
+    return best or name.split("/", 1)[0]
+
+
+class Branch:
+    """A local or remote-tracking branch.
+
+    Attributes:
+        refname: Full ref name, e.g. refs/heads/main
+        name: Short name, e.g. main or origin/main
+        remote: Remote name for remote-tracking branches, None for local ones
+        is_head: Whether HEAD points at this branch
+        upstream: Short name of the configured upstream, if any
+        ahead: Commits ahead of the upstream
+        behind: Commits behind the upstream
+        gone: Whether the configured upstream no longer exists
+        tip: Object name of the tip commit
+        date: Committer date of the tip as a Unix timestamp
+    """
+
+    __slots__ = ("refname", "name", "remote", "is_head", "upstream", "ahead", "behind", "gone", "tip", "date")
+
+    def __init__(
+        self,
+        refname: str,
+        is_head: bool = False,
+        upstream: Optional[str] = None,
+        ahead: int = 0,
+        behind: int = 0,
+        gone: bool = False,
+        tip: str = "",
+        date: int = 0,
+        remote: Optional[str] = None,
+    ):
+        self.refname = refname
+        self.name = short_ref_name(refname)
+        if refname.startswith(_REMOTES):
+            self.remote = remote or remote_of(self.name)
+        else:
+            self.remote = None
+        self.is_head = is_head
+        self.upstream = upstream
+        self.ahead = ahead
+        self.behind = behind
+        self.gone = gone
+        self.tip = tip
+        self.date = date
+
+    @property
+    def is_remote(self) -> bool:
+        return self.remote is not None
+
+    def as_dict(self) -> Dict[str, object]:
+        """The dictionary form returned by GitHandler.get_branches."""
+        return {
+            "name": self.name,
+            "current": self.is_head,
+            "remote": self.upstream,
+            "ahead": self.ahead,
+            "behind": self.behind,
+            "tip": self.tip,
+            "date": self.date,
+        }
+
+    def __repr__(self) -> str:
+        return f"Branch({self.name!r}{' HEAD' if self.is_head else ''})"
+
+
+class BranchIndex:
+    """All branches of a repository, indexed by name for O(1) lookups."""
+
+    def __init__(self, branches: Optional[List[Branch]] = None):
+        self.local: List[Branch] = []
+        self.remote: List[Branch] = []
+        self.head: Optional[Branch] = None
+        self._by_name: Dict[str, Branch] = {}
+        self._by_refname: Dict[str, Branch] = {}
+        # Sorted search keys and the ref names they belong to, built on the first search
+        self._search_keys: Optional[List[str]] = None
+        self._search_refs: List[str] = []
+        for branch in branches or ():
+            self.add(branch)
+
+    def add(self, branch: Branch) -> None:
+        (self.remote if branch.is_remote else self.local).append(branch)
+        self._by_refname[branch.refname] = branch
+        # A local branch wins over a remote-tracking branch of the same short name
+        if branch.name not in self._by_name or not branch.is_remote:
+            self._by_name[branch.name] = branch
+        if branch.is_head:
+            self.head = branch
+        self._search_keys = None
+
+    def get(self, name: str) -> Optional[Branch]:
+        """Look up a branch by short or full ref name."""
+        return self._by_name.get(name) or self._by_refname.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __len__(self) -> int:
+        return len(self._by_refname)
+
+    def __iter__(self) -> Iterator[Branch]:
+        yield from self.local
+        yield from self.remote
+
+    def _build_search_index(self) -> List[str]:
+        """Index every branch under its full short name and each suffix after a "/"."""
+        pairs = []
+        for branch in self:
+            name = branch.name.lower()
+            start = 0
+            while True:
+                pairs.append((name[start:], branch.refname))
+                slash = name.find("/", start)
+                if slash < 0:
+                    break
+                start = slash + 1
+        pairs.sort()
+        self._search_keys = [key for key, _ in pairs]
+        self._search_refs = [refname for _, refname in pairs]
+        return self._search_keys
+
+    def search(self, text: str, limit: Optional[int] = None) -> List[Branch]:
+        """Find branches whose name, or any part of it after a "/", starts with text.
+
+        Matching is case insensitive and uses a sorted prefix index, so it
+        costs a binary search plus the number of matches.
+
+        Args:
+            text: The prefix to look for
+            limit: Maximum number of branches to return
+
+        Returns:
+            Matching branches, local before remote
+        """
+        keys = self._search_keys if self._search_keys is not None else self._build_search_index()
+        text = text.lower()
+        matched: Dict[str, None] = {}
+        for i in range(bisect_left(keys, text), len(keys)):
+            if not keys[i].startswith(text):
+                break
+            matched[self._search_refs[i]] = None
+
+        branches = sorted((self._by_refname[refname] for refname in matched), key=lambda b: (b.is_remote, b.name))
+        return branches[:limit] if limit is not None else branches
+
+    def upstream_of(self, name: str) -> Optional[Branch]:
+        """The upstream branch of a local branch, if it is configured and exists."""
+        branch = self.get(name)
+        if branch is None or branch.upstream is None:
+            return None
+        return self.get(branch.upstream)
+
+
+def _parse_track(track: str) -> Tuple[int, int, bool]:
+    """Parse %(upstream:track,nobracket), e.g. "ahead 1, behind 2" or "gone"."""
+    ahead = behind = 0
+    if track == "gone":
+        return 0, 0, True
+    for part in track.split(", "):
+        word, _, count = part.partition(" ")
+        if word == "ahead":
+            ahead = int(count)
+        elif word == "behind":
+            behind = int(count)
+    return ahead, behind, False
+
+
+def parse_branch_refs(output: str, remotes: Iterable[str] = ()) -> BranchIndex:
+    """Parse `git for-each-ref` output produced with BRANCH_ARGS.
+
+    Args:
+        output: The for-each-ref output
+        remotes: Names of the configured remotes, as listed with REMOTE_ARGS
+    """
+    remotes = list(remotes)
+    index = BranchIndex()
+    # Not splitlines(), which also splits on characters allowed in ref names
+    for line in output.split("\n"):
+        fields = line.split("\0")
+        if len(fields) != 7:
+            continue
+        refname, symref, head, upstream, track, tip, date = fields
+        if symref:
+            # e.g. refs/remotes/origin/HEAD
+            continue
+        ahead, behind, gone = _parse_track(track)
+        index.add(Branch(
+            refname,
+            is_head=head == "*",
+            upstream=short_ref_name(upstream) if upstream else None,
+            ahead=ahead,
+            behind=behind,
+            gone=gone,
+            tip=tip,
+            date=int(date) if date else 0,
+            remote=remote_of(short_ref_name(refname), remotes) if refname.startswith(_REMOTES) else None,
+        ))
+    return index
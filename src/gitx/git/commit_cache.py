@@ -0,0 +1,268 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from gitx.git.history import CommitMetadata
+from gitx.utils.helpers import user_cache_dir
+
+# Bumped whenever the schema changes; an older cache is dropped and rebuilt
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    hash TEXT PRIMARY KEY,
+    tree TEXT NOT NULL,
+    parents TEXT NOT NULL,
+    author_name TEXT NOT NULL,
+    author_email TEXT NOT NULL,
+    author_time INTEGER NOT NULL,
+    author_tz TEXT NOT NULL,
+    committer_name TEXT NOT NULL,
+    committer_email TEXT NOT NULL,
+    committer_time INTEGER NOT NULL,
+    committer_tz TEXT NOT NULL,
+    message TEXT NOT NULL,
+    files TEXT,
+    files_mode TEXT,
+    size INTEGER NOT NULL,
+    accessed INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS commits_accessed ON commits (accessed);
+CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS commits_insert AFTER INSERT ON commits BEGIN
+    UPDATE totals SET size = size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS commits_delete AFTER DELETE ON commits BEGIN
+    UPDATE totals SET size = size - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS commits_resize AFTER UPDATE OF size ON commits BEGIN
+    UPDATE totals SET size = size - old.size + new.size;
+END;
+"""
+
+_COLUMNS = (
+    "hash, tree, parents, author_name, author_email, author_time, author_tz, "
+    "committer_name, committer_email, committer_time, committer_tz, message, files"
+)
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+# Reads only refresh a row's access time when it is older than this, so
+# browsing the log does not turn every lookup into a write
+_TOUCH_INTERVAL = 3600
+
+
+def _row_size(commit: CommitMetadata) -> int:
+    """Approximate storage cost of a commit, used for the size limit."""
+    text = (commit.message, commit.author_name, commit.author_email, commit.committer_name, commit.committer_email)
+    return 200 + sum(map(len, text)) + 41 * len(commit.parents) + len(commit.files or "")
+
+
+class CommitCache:
+    """Persistent store of commit metadata, keyed by full commit hash.
+
+    Commits never change, so their metadata can be kept across sessions and
+    repositories in one SQLite database in the user cache dir. Changed files
+    do depend on the repository's rename detection, so they are stored with
+    the rename mode they were listed in and only returned for that mode. The
+    database runs in WAL mode with a busy timeout, so several gitx instances
+    can read and write it at once. When the stored size passes max_bytes, the
+    least recently used commits are evicted.
+
+    Any database error disables the cache instead of failing the caller.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        """Initialize the cache. The database is opened on first use.
+
+        Args:
+            path: Database file, defaults to commits.sqlite3 in the user cache dir
+            max_bytes: Approximate size limit of the stored metadata
+        """
+        self.path = path or os.path.join(user_cache_dir(), "commits.sqlite3")
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return not self._disabled
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is not None or self._disabled:
+            return self._conn
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                conn.executescript(
+                    "BEGIN IMMEDIATE; DROP TABLE IF EXISTS commits; DROP TABLE IF EXISTS totals;"
+                    f"PRAGMA user_version = {SCHEMA_VERSION};" + _SCHEMA + "COMMIT;"
+                )
+            else:
+                conn.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error):
+            self._disabled = True
+            return None
+        self._conn = conn
+        return conn
+
+    def _fail(self) -> None:
+        """Stop using the database after an error."""
+        self._disabled = True
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+    def get_many(self, hashes: Iterable[str], files_mode: Optional[str] = None) -> Dict[str, CommitMetadata]:
+        """Look up commits.
+
+        Args:
+            hashes: Full commit hashes
+            files_mode: Rename mode the changed files are wanted in, see rename_detection;
+                files listed in another mode, or when None, are left out
+
+        Returns:
+            The cached commits by hash; missing commits are left out
+        """
+        hashes = list(hashes)
+        found: Dict[str, CommitMetadata] = {}
+        if not hashes:
+            return found
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return found
+            now = int(time.time())
+            stale: List[str] = []
+            try:
+                for start in range(0, len(hashes), _BATCH):
+                    batch = hashes[start:start + _BATCH]
+                    rows = conn.execute(
+                        f"SELECT {_COLUMNS}, files_mode, accessed FROM commits "
+                        f"WHERE hash IN ({','.join('?' * len(batch))})",
+                        batch,
+                    )
+                    for row in rows:
+                        files = row[12] if files_mode is not None and row[13] == files_mode else None
+                        found[row[0]] = CommitMetadata(row[0], row[1], row[2].split(), *row[3:12], files)
+                        if row[14] < now - _TOUCH_INTERVAL:
+                            stale.append(row[0])
+                for start in range(0, len(stale), _BATCH):
+                    batch = stale[start:start + _BATCH]
+                    conn.execute(
+                        f"UPDATE commits SET accessed = ? WHERE hash IN ({','.join('?' * len(batch))})",
+                        [now, *batch],
+                    )
+            except sqlite3.Error:
+                self._fail()
+        return found
+
+    def get(self, commit_hash: str, files_mode: Optional[str] = None) -> Optional[CommitMetadata]:
+        """Look up a single commit by full hash."""
+        return self.get_many([commit_hash], files_mode).get(commit_hash)
+
+    def put_many(self, commits: Iterable[CommitMetadata], files_mode: Optional[str] = None) -> None:
+        """Store commits, filling in changed files for commits cached without them or in another mode.
+
+        Args:
+            commits: Commit metadata to store
+            files_mode: Rename mode the changed files were listed in; required to store them
+        """
+        rows = [
+            (
+                c.hash, c.tree, " ".join(c.parents), c.author_name, c.author_email, c.author_time, c.author_tz,
+                c.committer_name, c.committer_email, c.committer_time, c.committer_tz, c.message,
+                c.files if files_mode is not None else None, files_mode if c.files is not None else None,
+                _row_size(c),
+            )
+            for c in commits
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            now = int(time.time())
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO commits ({_COLUMNS}, files_mode, size, accessed) "
+                    f"VALUES ({','.join('?' * 16)})",
+                    [row + (now,) for row in rows],
+                )
+                conn.executemany(
+                    "UPDATE commits SET files = ?, files_mode = ?, size = ? "
+                    "WHERE hash = ? AND (files IS NULL OR files_mode IS NOT ?)",
+                    [(row[12], row[13], row[14], row[0], row[13]) for row in rows if row[12] is not None],
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                self._fail()
+
+    def put(self, commit: CommitMetadata, files_mode: Optional[str] = None) -> None:
+        """Store a single commit."""
+        self.put_many([commit], files_mode)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used commits until the size is below 90% of the limit."""
+        total = conn.execute("SELECT size FROM totals").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 9 // 10
+        while total > target:
+            rows = conn.execute(
+                "SELECT hash, size FROM commits ORDER BY accessed LIMIT ?", (_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            victims: List[str] = []
+            for commit_hash, size in rows:
+                victims.append(commit_hash)
+                total -= size
+                if total <= target:
+                    break
+            conn.execute(f"DELETE FROM commits WHERE hash IN ({','.join('?' * len(victims))})", victims)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of cached commits and their approximate size in bytes."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return {"commits": 0, "bytes": 0}
+            try:
+                count = conn.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+                size = conn.execute("SELECT size FROM totals").fetchone()[0]
+            except sqlite3.Error:
+                self._fail()
+                return {"commits": 0, "bytes": 0}
+        return {"commits": count, "bytes": size}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
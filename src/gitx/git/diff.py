@@ -0,0 +1,114 @@
+import tempfile
+from array import array
+from typing import Optional
+
+# git treats content with a NUL in its first 8000 bytes as binary
+BINARY_SNIFF_BYTES = 8000
+
+
+def looks_binary(data: bytes) -> bool:
+    """Whether content would be treated as binary by git's diff heuristic."""
+    return b"\0" in data[:BINARY_SNIFF_BYTES]
+
+
+class DiffProbe:
+    """What is known about a file diff before fetching the patch.
+
+    Attributes:
+        old_size: Size in bytes of the old side, 0 if it does not exist
+        new_size: Size in bytes of the new side, 0 if it does not exist
+        binary: Whether git will show the diff as binary
+    """
+
+    __slots__ = ("old_size", "new_size", "binary")
+
+    def __init__(self, old_size: int, new_size: int, binary: bool):
+        self.old_size = old_size
+        self.new_size = new_size
+        self.binary = binary
+
+    @property
+    def size(self) -> int:
+        return max(self.old_size, self.new_size)
+
+    def __repr__(self) -> str:
+        return f"DiffProbe({self.old_size} -> {self.new_size}, binary={self.binary})"
+
+
+class DiffBuffer:
+    """Diff output spooled to a temporary file, with an index of lines and hunks.
+
+    Output is fed in chunks as git writes it. Only the byte offset of each
+    line (and the line number of each hunk header) is kept in memory, so any
+    line can be read back without holding the whole diff.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        # Start offset of every line, plus the start of the line being written
+        self.offsets = array("q", [0])
+        # Line numbers of "@@" hunk headers
+        self.hunks = array("q")
+        self.size = 0
+        # Length in bytes of the longest line
+        self.width = 0
+        self.complete = False
+        # A line start whose first bytes were not yet written when it was found
+        self._unchecked: Optional[int] = 0
+
+    @property
+    def line_count(self) -> int:
+        if self.offsets[-1] == self.size:
+            return len(self.offsets) - 1
+        return len(self.offsets)
+
+    def _read(self, offset: int, length: int) -> bytes:
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def feed(self, chunk: bytes) -> None:
+        """Append a chunk of diff output and index its lines."""
+        base = self.size
+        self._file.seek(0, 2)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+        offsets, hunks = self.offsets, self.hunks
+        if self._unchecked is not None and self._unchecked + 2 <= self.size:
+            if self._read(self._unchecked, 2) == b"@@":
+                hunks.append(len(offsets) - 1)
+            self._unchecked = None
+
+        width = self.width
+        length = len(chunk)
+        pos = chunk.find(b"\n")
+        while pos >= 0:
+            start = base + pos + 1
+            if start - 1 - offsets[-1] > width:
+                width = start - 1 - offsets[-1]
+            offsets.append(start)
+            if pos + 3 <= length:
+                if chunk[pos + 1] == 64 and chunk[pos + 2] == 64:  # "@@"
+                    hunks.append(len(offsets) - 1)
+            else:
+                self._unchecked = start
+            pos = chunk.find(b"\n", pos + 1)
+        self.width = max(width, self.size - offsets[-1])
+
+    def finish(self) -> None:
+        """Mark the diff as fully read."""
+        self.complete = True
+
+    def line(self, index: int, max_bytes: int = 4096) -> str:
+        """Read a line without its newline, truncated to max_bytes."""
+        start = self.offsets[index]
+        end = self.offsets[index + 1] - 1 if index + 1 < len(self.offsets) else self.size
+        data = self._read(start, min(end - start, max_bytes))
+        return data.decode("utf-8", errors="replace")
+
+    def text(self) -> str:
+        """The whole diff as a string."""
+        return self._read(0, self.size).decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,119 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from gitx.git.snapshot import RepoSnapshot
+
+# Rough per-entry overhead of the key and bookkeeping, in bytes
+_ENTRY_OVERHEAD = 256
+
+
+def _index_oids(snapshot: RepoSnapshot, path: str) -> Tuple[Optional[str], Optional[str]]:
+    """HEAD and index object ids of a path, (None, None) if it is unchanged."""
+    i = snapshot.entries.find(path)
+    if i is None:
+        return None, None
+    entry = snapshot.entries[i]
+    return entry.head_oid, entry.index_oid
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def file_diff_key(snapshot: RepoSnapshot, work_tree: str, path: str, staged: bool) -> Tuple:
+    """Cache key of a file diff against the state captured by a snapshot.
+
+    A staged diff (HEAD to index) is identified by the HEAD commit and the
+    path's HEAD and index blob ids. A work tree diff (index to file) is
+    identified by the index blob id and the file's mtime, size and inode.
+    """
+    head_oid, index_oid = _index_oids(snapshot, path)
+    if staged:
+        return ("staged", path, snapshot.oid, head_oid, index_oid)
+    return ("worktree", path, index_oid, _stat_key(os.path.join(work_tree, path)))
+
+
+def commit_diff_key(old: str, new: str, path: Optional[str] = None) -> Tuple:
+    """Cache key of a diff between two commits, which never changes."""
+    return ("commits", old, new, path)
+
+
+class DiffCache:
+    """LRU cache of diff output bounded by a memory budget.
+
+    Keys come from file_diff_key and commit_diff_key. Entries for files
+    are also dropped by invalidate() when a new snapshot shows the path's
+    blobs have changed.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Approximate memory budget for cached diffs, 0 disables caching
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Look up a diff, marking it as recently used."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: Hashable, text: str) -> None:
+        """Store a diff, evicting the least recently used ones to stay within the budget."""
+        cost = len(text) + _ENTRY_OVERHEAD
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old) + _ENTRY_OVERHEAD
+            self._entries[key] = text
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted) + _ENTRY_OVERHEAD
+
+    def invalidate(self, snapshot: RepoSnapshot) -> None:
+        """Drop file diffs whose blobs differ in a new snapshot.
+
+        Commit diffs are never invalidated. Work tree diffs whose file changed
+        without the index changing are left to miss on their stat key.
+        """
+        with self._lock:
+            stale = []
+            for key in self._entries:
+                kind = key[0]
+                if kind == "staged":
+                    if key[2] != snapshot.oid or key[3:] != _index_oids(snapshot, key[1]):
+                        stale.append(key)
+                elif kind == "worktree":
+                    if key[2] != _index_oids(snapshot, key[1])[1]:
+                        stale.append(key)
+            for key in stale:
+                self.size -= len(self._entries.pop(key)) + _ENTRY_OVERHEAD
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -1,7 +1,128 @@
 import os
+import shlex
 import subprocess
+import time
 # Remove or use Path
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Callable
+
+from gitx.config import GitxConfig
+from gitx.git.branches import BRANCH_ARGS, REMOTE_ARGS, BranchIndex, parse_branch_refs
+from gitx.git.commit_cache import CommitCache
+from gitx.git.diff import BINARY_SNIFF_BYTES, DiffBuffer, DiffProbe, looks_binary
+from gitx.git.diff_cache import DiffCache, commit_diff_key, file_diff_key
+from gitx.git.history import (
+    METADATA_ARGS,
+    CommitMetadata,
+    CommitRecord,
+    format_git_date,
+    page_args,
+    parse_metadata,
+)
+from gitx.git.index import GitIndex, StatusBaseline
+from gitx.git.objects import PackBackend, rename_detection
+from gitx.git.pool import GitProcessPool
+from gitx.git.refs import RefReader, ref_reader
+from gitx.git.snapshot import SNAPSHOT_ARGS, PorcelainV2Parser, RepoSnapshot, UntrackedParser
+
+
+# Largest index blob read to check whether a staged file is binary
+BINARY_SNIFF_BLOB_LIMIT = 1024 * 1024
+
+
+def is_full_hash(value: str) -> bool:
+    """Whether a string is a full SHA-1 or SHA-256 object name."""
+    return len(value) in (40, 64) and all(c in "0123456789abcdef" for c in value)
+
+
+def commit_details(commit: CommitMetadata) -> Dict[str, Any]:
+    """Build the dictionary returned by GitHandler.get_commit_details."""
+    return {
+        "hash": commit.hash,
+        "author": f"{commit.author_name} <{commit.author_email}>",
+        "date": format_git_date(commit.author_time, commit.author_tz),
+        "message": commit.message,
+        "parents": commit.parents,
+        "changed_files": parse_name_status(commit.files or "")
+    }
+
+
+def parse_name_status(output: str) -> Dict[str, List[str]]:
+    """Parse `--name-status` output into added/modified/deleted lists."""
+    changed_files = {
+        "added": [],
+        "modified": [],
+        "deleted": []
+    }
+
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+
+        parts_file = line.split()
+        if len(parts_file) >= 2:
+            status, file_path = parts_file[0], " ".join(parts_file[1:])
+
+            if status == "A":
+                changed_files["added"].append(file_path)
+            elif status == "M":
+                changed_files["modified"].append(file_path)
+            elif status == "D":
+                changed_files["deleted"].append(file_path)
+
+    return changed_files
+
+
+def file_diff_args(file_path: str, staged: bool = False, stat: bool = False) -> List[str]:
+    """Build the `git diff` arguments for a single file, or its summary if stat is set."""
+    args = ["diff", "--color=never"]
+
+    if staged:
+        args.append("--staged")
+    if stat:
+        args.extend(["--stat", "--summary"])
+
+    args.append("--")
+    args.append(file_path)
+    return args
+
+
+def commit_diff_args(old: str, new: str, file_path: Optional[str] = None) -> List[str]:
+    """Build the arguments for a diff between two commits."""
+    args = ["diff", old, new, "--"]
+    if file_path is not None:
+        args.append(file_path)
+    return args
+
+
+# Batched index updates read their paths from stdin, so any number of
+# files costs one process and no command line length limit applies
+_PATHSPEC_STDIN = ("--pathspec-from-file=-", "--pathspec-file-nul")
+STAGE_ARGS = ("add", *_PATHSPEC_STDIN)
+# Without a commit, so an unborn branch is reset to the empty tree
+UNSTAGE_ARGS = ("reset", "--quiet", *_PATHSPEC_STDIN)
+
+
+def pathspec_input(file_paths: List[str]) -> str:
+    """NUL-separated literal pathspecs, so names with glob characters match only themselves.
+
+    Paths are relative to the top of the work tree, as status lists them,
+    while git runs in the directory gitx was started from.
+    """
+    return "".join(f":(top,literal){path}\0" for path in file_paths)
+
+
+def parse_command(command: str) -> List[str]:
+    """Split a command line into git arguments with shell quoting rules.
+
+    A leading "git" is dropped, so both "log -1" and "git log -1" work.
+
+    Raises:
+        ValueError: If the quoting is unbalanced
+    """
+    args = shlex.split(command)
+    if args and args[0] == "git":
+        args = args[1:]
+    return args
 
 
 class GitHandler:
@@ -14,14 +135,35 @@ class GitHandler:
             repo_path: Path to the Git repository. Uses current directory if None.
         """
         self.repo_path = repo_path or os.getcwd()
+        self.pool = GitProcessPool(self.repo_path)
+        self._abbrev: Optional[int] = None
+        # The most recent snapshot, which keys and invalidates cached diffs
+        self.last_snapshot: Optional[RepoSnapshot] = None
+        # The last branch listing and the ref state it was read in
+        self._branch_index: Optional[Tuple[Tuple, BranchIndex]] = None
+        # The parsed index file, replaced when the file changes
+        self._index: Optional[GitIndex] = None
+        # Taken before the last status call, for status_unchanged()
+        self._status_baseline: Optional[StatusBaseline] = None
+        # Reads commits and trees in process, see object_backend()
+        self._objects: Optional[PackBackend] = None
+        # How diff.renames makes git pair changed files, read when first needed
+        self._renames: Optional[str] = None
+        # The command listing untracked files after status, () if status lists them; see untracked_scan()
+        self._untracked_scan: Optional[Tuple[str, ...]] = None
 
         # Verify this is a git repository
         self._check_git_repository()
+        self.refs: RefReader = ref_reader(self.pool.git_dir)
+
+        self.config = GitxConfig.load(self.pool)
+        self.commit_cache = CommitCache(max_bytes=self.config.get_int("commitCacheSize", 64 * 1024 * 1024))
+        self.diff_cache = DiffCache(max_bytes=self.config.get_int("diffCacheSize", 32 * 1024 * 1024))
 
     def _check_git_repository(self) -> None:
         """Check if the current directory is a git repository."""
         try:
-            self._run_git_command("rev-parse", "--is-inside-work-tree")
+            self.pool.discover()
         except subprocess.CalledProcessError:
             # Fix f-string missing placeholder issue
             raise ValueError(f"The directory '{self.repo_path}' is not a Git repository")
@@ -36,91 +178,263 @@ class GitHandler:
         Returns:
             The completed process with output if capture_output is True
         """
-        cmd = ["git", "-C", self.repo_path] + list(args)
+        return self.pool.run(*args, capture_output=capture_output)
 
-        return subprocess.run(
-            cmd,
-            capture_output=capture_output,
-            text=True,
-            check=True
-        )
+    def _run_mutating_command(self, *args: str, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        """Run a git command that changes the repository, retrying while another process holds its lock.
+
+        Args:
+            *args: Arguments to pass to git
+            input: Optional text to feed to the command's stdin
+
+        Returns:
+            The completed process with captured output
+        """
+        return self.pool.run_mutating(*args, input=input)
+
+    def _run_remote_command(self, *args: str) -> subprocess.CompletedProcess:
+        """Run a command that talks to a remote, like AsyncGitHandler._run_remote_command.
+
+        It is not retried when a lock is held, as it may already have
+        transferred data with the remote, and runs in pool.user_env without
+        credential prompts.
+
+        Args:
+            *args: Arguments to pass to git
+
+        Returns:
+            The completed process with captured output
+        """
+        return self.pool.run(*args, env=dict(self.pool.user_env, GIT_TERMINAL_PROMPT="0"))
+
+    def close(self) -> None:
+        """Release the pooled git processes, the mapped packs and the commit cache."""
+        self.pool.close()
+        if self._objects is not None:
+            self._objects.close()
+        self.commit_cache.close()
+
+    def object_backend(self) -> Optional[PackBackend]:
+        """The in-process reader of commits and trees, None if objects are read with git.
+
+        Set `gitx.objectBackend` to "git" to always run git. Until HEAD
+        points at a commit there is nothing to read and the hash size of the
+        repository is not known, so None is returned then too.
+        """
+        if self._objects is None:
+            if self.config.get("objectBackend", "pack").lower() != "pack" or not self.refs.supported:
+                return None
+            head_oid = self.refs.head()[1]
+            if head_oid is None:
+                return None
+            self._objects = PackBackend(
+                self.refs,
+                hash_size=len(head_oid) // 2,
+                cache_bytes=self.config.get_int("deltaBaseCacheSize", 32 * 1024 * 1024),
+            )
+        return self._objects
+
+    def rename_detection(self) -> str:
+        """How `git show` pairs added files with others here, from diff.renames."""
+        if self._renames is None:
+            try:
+                value = self._run_git_command("config", "--get", "diff.renames").stdout
+            except subprocess.CalledProcessError:
+                value = None
+            self._renames = rename_detection(value)
+        return self._renames
+
+    def untracked_scan(self) -> Optional[Tuple[str, ...]]:
+        """The command that lists untracked files after a status without them, None if status lists them.
+
+        By default one status call lists everything. With
+        `gitx.untrackedScan` set to "background", the snapshot is taken with
+        `--untracked-files=no` so tracked changes show up without waiting for
+        the walk of the work tree, and untracked files are listed by this
+        command afterwards. That is `ls-files --others`, or a second status
+        when core.untrackedCache or core.fsmonitor is set, as only status
+        uses them. status.showUntrackedFiles is followed either way.
+        """
+        if self._untracked_scan is None:
+            self._untracked_scan = ()
+            if self.config.get("untrackedScan", "inline").lower() == "background":
+                settings = self._untracked_settings()
+                mode = settings.get("status.showuntrackedfiles", "normal").strip().lower()
+                if mode in ("no", "false", "off", "0"):
+                    # Status lists no untracked files to begin with
+                    return None
+                mode = "all" if mode == "all" else "normal"
+                if any(
+                    settings.get(key, "false").strip().lower() not in ("false", "no", "off", "0", "")
+                    for key in ("core.untrackedcache", "core.fsmonitor")
+                ):
+                    self._untracked_scan = (
+                        "status", "--porcelain=v2", "-z", f"--untracked-files={mode}", "--ignore-submodules=all"
+                    )
+                else:
+                    # Paths from the top of the work tree, wherever gitx was started
+                    self._untracked_scan = (
+                        "ls-files", "--others", "--exclude-standard", "-z", "--full-name",
+                        *(("--directory", "--no-empty-directory") if mode == "normal" else ()), "--", ":/",
+                    )
+        return self._untracked_scan or None
+
+    def _untracked_settings(self) -> Dict[str, str]:
+        """The git settings that decide how untracked files are listed, keyed by lowercased name."""
+        try:
+            result = self._run_git_command(
+                "config", "-z", "--get-regexp", r"^(status\.showuntrackedfiles|core\.untrackedcache|core\.fsmonitor)$"
+            )
+        except subprocess.CalledProcessError:
+            # Exit status 1 means none of them is set
+            return {}
+        settings = {}
+        for entry in result.stdout.split("\0"):
+            key, _, value = entry.partition("\n")
+            if key:
+                settings[key.lower()] = value
+        return settings
+
+    def snapshot_args(self) -> Tuple[str, ...]:
+        """The status call a snapshot is taken with, leaving out untracked files if untracked_scan() lists them."""
+        if self.untracked_scan() is not None:
+            return SNAPSHOT_ARGS + ("--untracked-files=no",)
+        return SNAPSHOT_ARGS
 
     def get_status(self) -> Dict[str, List[str]]:
         """Get the status of the repository."""
-        result = self._run_git_command("status", "--porcelain")
-
-        status = {
-            "untracked": [],
-            "modified": [],
-            "staged": [],
-            "deleted": [],
-            "renamed": []
-        }
-
-        for line in result.stdout.splitlines():
-            if not line:
-                continue
-
-            # The first two characters represent the status
-            code = line[:2]
-            file_path = line[3:]
-
-            # Parse the status code
-            # M = modified, A = added, R = renamed, D = deleted, ?? = untracked
-            if code == "??":
-                status["untracked"].append(file_path)
-            elif code[0] == "M" or code[1] == "M":
-                if code[0] != " ":  # Changes in the staging area
-                    status["staged"].append(file_path)
-                if code[1] != " ":  # Changes in the working directory
-                    status["modified"].append(file_path)
-            elif code[0] == "A":
-                status["staged"].append(file_path)
-            elif code[0] == "D" or code[1] == "D":
-                if code[0] != " ":  # Deleted in the staging area
-                    status["staged"].append(file_path)
-                if code[1] != " ":  # Deleted in the working directory
-                    status["deleted"].append(file_path)
-            elif code[0] == "R":
-                status["renamed"].append(file_path)
-
-        return status
+        snapshot = self.get_snapshot()
+        if not snapshot.untracked_listed:
+            self.list_untracked(snapshot)
+        return snapshot.status_groups()
 
-    def get_branches(self) -> List[Dict[str, Any]]:
-        """Get all branches in the repository."""
-        # Get local branches
-        result = self._run_git_command("branch", "--format=%(refname:short)")
-        local_branches = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    def get_snapshot(self) -> RepoSnapshot:
+        """Capture branch, upstream and file status with a single git call.
+
+        The NUL-delimited output is parsed incrementally as git writes it.
+        Untracked files are left to list_untracked() if untracked_scan() is set.
+        """
+        baseline = self.status_baseline()
+        args = self.snapshot_args()
+        parser = PorcelainV2Parser()
+        for chunk in self.pool.stream(*args):
+            parser.feed(chunk)
+        snapshot = parser.close()
+        snapshot.untracked_listed = args == SNAPSHOT_ARGS
+        return self._snapshot_taken(snapshot, baseline)
+
+    def list_untracked(self, snapshot: RepoSnapshot, on_paths: Optional[Callable[[List[str]], None]] = None) -> None:
+        """Add the untracked files to a snapshot taken without them.
+
+        Args:
+            snapshot: A snapshot from get_snapshot() with untracked_listed unset
+            on_paths: Called with each batch of paths as they are added
+        """
+        args = self.untracked_scan()
+        parser = UntrackedParser(porcelain=args[0] == "status")
+        for chunk in self.pool.stream(*args):
+            self._untracked_found(snapshot, parser.feed(chunk), on_paths)
+        self._untracked_found(snapshot, parser.close(), on_paths)
+        snapshot.untracked_listed = True
+
+    @staticmethod
+    def _untracked_found(
+        snapshot: RepoSnapshot, paths: List[str], on_paths: Optional[Callable[[List[str]], None]]
+    ) -> None:
+        if paths:
+            snapshot.add_untracked(paths)
+            if on_paths is not None:
+                on_paths(paths)
+
+    def _snapshot_taken(self, snapshot: RepoSnapshot, baseline: Optional[StatusBaseline] = None) -> RepoSnapshot:
+        """Record a new snapshot and drop the cached diffs it makes stale."""
+        self.last_snapshot = snapshot
+        self._status_baseline = baseline
+        self.diff_cache.invalidate(snapshot)
+        return snapshot
+
+    def status_baseline(self) -> StatusBaseline:
+        """Note the state of the refs and the index right before a status call."""
+        return StatusBaseline(
+            self.refs.git_dir, self.pool.work_tree or self.repo_path, self.refs.branch_state(), time.time_ns()
+        )
 
-        # Get current branch
+    def read_index(self) -> Optional[GitIndex]:
+        """The index file, parsed again only when it changes; None if it cannot be read."""
+        path = os.path.join(self.refs.git_dir, "index")
         try:
-            current_branch = self.get_current_branch()
-        except subprocess.CalledProcessError:
-            current_branch = "HEAD detached"
+            st = os.stat(path)
+        except OSError:
+            return None
+        index = self._index
+        if index is None or index.stat_key != (st.st_mtime_ns, st.st_size, st.st_ino):
+            head_oid = self.refs.head()[1] if self.refs.supported else None
+            try:
+                index = GitIndex(path, hash_size=len(head_oid) // 2 if head_oid else 20)
+            except (OSError, ValueError):
+                return None
+            self._index = index
+        return index
+
+    def status_unchanged(self) -> bool:
+        """Whether a quick stat check shows that status would still give the last snapshot.
+
+        No git process is started: the index is read directly and the work
+        tree files are compared with it, see StatusBaseline. False means
+        something may have changed and a full status is needed.
+        """
+        baseline, snapshot = self._status_baseline, self.last_snapshot
+        if baseline is None or snapshot is None:
+            return False
+        index = self.read_index()
+        if not baseline.completed:
+            baseline.complete(snapshot, index)
+        return baseline.unchanged(index, self.refs.branch_state())
 
-        # Get remote branches
-        result = self._run_git_command("branch", "-r", "--format=%(refname:short)")
-        remote_branches = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    def get_branches(self) -> List[Dict[str, Any]]:
+        """Get all branches in the repository.
 
-        branches = []
-        for branch in local_branches:
-            remote = None
-            # Find the corresponding remote branch if it exists
-            for remote_branch in remote_branches:
-                if remote_branch.endswith("/" + branch):
-                    remote = remote_branch
-                    break
+        Returns:
+            List of local branch dictionaries with name, current, remote (the
+            configured upstream), ahead, behind, tip and date
+        """
+        return [branch.as_dict() for branch in self.get_branch_index().local]
+
+    def get_branch_index(self) -> BranchIndex:
+        """Read every local and remote-tracking branch with a single `for-each-ref`.
 
-            branches.append({
-                "name": branch,
-                "current": branch == current_branch,
-                "remote": remote
-            })
+        Each branch comes with its HEAD marker, configured upstream,
+        ahead/behind counts, tip and commit date. The configured remotes are
+        listed too, as a remote name may contain "/". The listing is reused
+        while HEAD, the branch tips and the config are unchanged.
+        """
+        state, index = self.cached_branch_index()
+        if index is None:
+            remotes = self._run_git_command(*REMOTE_ARGS).stdout.split()
+            index = parse_branch_refs(self._run_git_command(*BRANCH_ARGS).stdout, remotes)
+            self.branch_index_read(state, index)
+        return index
+
+    def cached_branch_index(self) -> Tuple[Optional[Tuple], Optional[BranchIndex]]:
+        """The current ref state, and the last branch listing if it was read in the same state.
+
+        The state is read before listing the branches, so a change made
+        while they are listed is seen on the next call.
+        """
+        state = self.refs.branch_state()
+        if state is not None and self._branch_index is not None and self._branch_index[0] == state:
+            return state, self._branch_index[1]
+        return state, None
 
-        return branches
+    def branch_index_read(self, state: Optional[Tuple], index: BranchIndex) -> None:
+        """Keep a branch listing along with the ref state from cached_branch_index()."""
+        self._branch_index = (state, index) if state is not None else None
 
     def get_current_branch(self) -> str:
-        """Get the name of the current branch."""
+        """Get the name of the current branch, from the HEAD file where possible."""
+        branch = self.refs.current_branch()
+        if branch is not None:
+            return branch
         result = self._run_git_command("rev-parse", "--abbrev-ref", "HEAD")
         return result.stdout.strip()
 
@@ -133,26 +447,107 @@ class GitHandler:
         Returns:
             List of commit dictionaries with hash, author, date, and message
         """
-        # Format: hash, author name, author email, date, subject
-        format_str = "--pretty=format:%h|%an|%ae|%ar|%s"
-        result = self._run_git_command("log", "-n", str(count), format_str)
+        return [record.as_dict() for record in self.get_commit_page(0, count)]
+
+    def get_commit_page(self, skip: int, count: int, rev: str = "HEAD") -> List[CommitRecord]:
+        """Get one page of the commit log without formatting the commits before it.
+
+        Args:
+            skip: Number of commits to skip from the tip
+            count: Maximum number of commits to return
+            rev: Revision to walk from
+
+        Returns:
+            The commit records of the page
+        """
+        objects = self.object_backend()
+        commits = objects.commit_page(skip, count, rev) if objects is not None else None
+        if commits is not None:
+            abbrev = self.abbrev_length()
+            return [commit.record(abbrev) for commit in commits]
+
+        try:
+            result = self._run_git_command(*page_args(skip, count, rev))
+        except subprocess.CalledProcessError:
+            # e.g. no commits yet
+            return []
+
+        hashes = result.stdout.split()
+        commits = self.get_commit_metadata(hashes)
+        abbrev = self.abbrev_length()
+        return [commits[h].record(abbrev) for h in hashes if h in commits]
+
+    def abbrev_length(self) -> int:
+        """Length git abbreviates commit hashes to in this repository."""
+        if self._abbrev is None:
+            try:
+                self._abbrev = len(self._run_git_command("rev-parse", "--short", "HEAD").stdout.strip())
+            except subprocess.CalledProcessError:
+                return 7
+        return self._abbrev
 
-        commits = []
-        for line in result.stdout.splitlines():
-            if not line:
-                continue
+    def get_commit_metadata(self, hashes: List[str]) -> Dict[str, CommitMetadata]:
+        """Get the metadata of commits, reading the commit cache first.
 
-            parts = line.split("|")
-            if len(parts) >= 5:
-                commits.append({
-                    "hash": parts[0],
-                    "author": f"{parts[1]} <{parts[2]}>",
-                    "date": parts[3],
-                    "message": parts[4]
-                })
+        Commits missing from the cache are read with a single `git log` call
+        and added to it.
 
+        Args:
+            hashes: Full commit hashes
+
+        Returns:
+            The metadata by hash
+        """
+        commits = self.commit_cache.get_many(hashes)
+        missing = [h for h in hashes if h not in commits]
+        if missing:
+            result = self.pool.run(*METADATA_ARGS, input="\n".join(missing) + "\n")
+            fetched = parse_metadata(result.stdout)
+            self.commit_cache.put_many(fetched)
+            commits.update((commit.hash, commit) for commit in fetched)
         return commits
 
+    def count_commits(self, rev: str = "HEAD") -> int:
+        """Count the commits reachable from a revision."""
+        try:
+            result = self._run_git_command("rev-list", "--count", rev, "--")
+        except subprocess.CalledProcessError:
+            return 0
+        return int(result.stdout.strip() or 0)
+
+    def find_commit_offset(self, commit: str, rev: str = "HEAD") -> Optional[int]:
+        """Find the position of a commit in the log of a revision.
+
+        Only commit ids are streamed until the commit is found, nothing is formatted.
+
+        Args:
+            commit: Full or abbreviated commit hash, or any revision naming a commit
+            rev: Revision whose log to search
+
+        Returns:
+            The zero-based offset, or None if the commit is not in the log
+        """
+        info = self.pool.object_info(f"{commit}^{{commit}}")
+        if info is None:
+            return None
+        target = info[0].encode()
+
+        offset = 0
+        tail = b""
+        stream = self.pool.stream("rev-list", rev, "--")
+        try:
+            for chunk in stream:
+                lines = (tail + chunk).split(b"\n")
+                tail = lines.pop()
+                if target in lines:
+                    return offset + lines.index(target)
+                offset += len(lines)
+        except subprocess.CalledProcessError:
+            return None
+        finally:
+            stream.close()
+        return offset if tail == target else None
+
     def get_commit_details(self, commit_hash: str) -> Dict[str, Any]:
         """Get detailed information about a specific commit.
 
@@ -162,70 +557,33 @@ class GitHandler:
         Returns:
             Dictionary with commit details including full hash, author, date, message, and changed files
         """
-        # Get basic commit info
-        format_str = "--pretty=format:%H|%an|%ae|%ad|%s"
-        result = self._run_git_command("show", "--no-patch", format_str, commit_hash)
-
-        parts = result.stdout.strip().split("|")
-        if len(parts) < 5:
-            return {}
-
-        # Get changed files
-        files_result = self._run_git_command("show", "--name-status", "--pretty=format:", commit_hash)
-
-        changed_files = {
-            "added": [],
-            "modified": [],
-            "deleted": []
-        }
-
-        for line in files_result.stdout.splitlines():
-            if not line.strip():
-                continue
-
-            parts_file = line.split()
-            if len(parts_file) >= 2:
-                status, file_path = parts_file[0], " ".join(parts_file[1:])
-
-                if status == "A":
-                    changed_files["added"].append(file_path)
-                elif status == "M":
-                    changed_files["modified"].append(file_path)
-                elif status == "D":
-                    changed_files["deleted"].append(file_path)
-
-        return {
-            "hash": parts[0],
-            "author": f"{parts[1]} <{parts[2]}>",
-            "date": parts[3],
-            "message": parts[4],
-            "changed_files": changed_files
-        }
+        objects = self.object_backend()
+        renames = self.rename_detection()
+        commit = self.commit_cache.get(commit_hash, renames) if is_full_hash(commit_hash) else None
+        if commit is None and objects is not None:
+            commit = objects.read_commit(commit_hash)
+        if commit is None:
+            # Read the commit object through the persistent cat-file process
+            obj = self.pool.cat_file(commit_hash)
+            if obj is None or obj[1] != "commit":
+                return {}
+            commit = CommitMetadata.from_object(obj[0], obj[2])
+            if commit is None:
+                return {}
+
+        if commit.files is None:
+            # Get changed files, by comparing the trees here where git would list the same
+            files = objects.changed_files(commit, renames) if objects is not None else None
+            if files is None:
+                files = self._run_git_command("show", "--name-status", "--pretty=format:", commit.hash).stdout
+            commit.files = files
+            self.commit_cache.put(commit, renames)
+
+        return commit_details(commit)
 
     def get_repo_status_summary(self) -> Dict[str, str]:
         """Get a summary of the repository status."""
-        status = self.get_status()
-        current_branch = self.get_current_branch()
-
-        # Check if working directory is clean
-        is_clean = not (status["modified"] or status["untracked"] or status["deleted"])
-        status_text = "✓ clean" if is_clean else "! modified"
-
-        # Get ahead/behind info
-        try:
-            ahead_behind = self._run_git_command(
-                "rev-list", "--left-right", "--count", "@{u}...HEAD"
-            )
-            behind, ahead = ahead_behind.stdout.strip().split()
-            remote_status = f"origin (ahead:{ahead}, behind:{behind})"
-        except (subprocess.CalledProcessError, ValueError):
-            remote_status = "no upstream branch"
-
-        return {
-            "branch": current_branch,
-            "status": status_text,
-            "remote": remote_status
-        }
+        return self.get_snapshot().summary()
 
     def get_file_diff(self, file_path: str, staged: bool = False) -> str:
         """Get the diff for a specific file.
@@ -237,15 +595,108 @@ class GitHandler:
         Returns:
             Diff output as a string
         """
-        args = ["diff", "--color=never"]
+        key = self.file_diff_key(file_path, staged)
+        if key is not None:
+            cached = self.diff_cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self._run_git_command(*file_diff_args(file_path, staged))
+        if key is not None:
+            self.diff_cache.put(key, result.stdout)
+        return result.stdout
+
+    def probe_file_diff(self, file_path: str, staged: bool = False) -> DiffProbe:
+        """Find the size of both sides of a file diff and whether it is binary, without diffing.
+
+        Sizes come from the persistent cat-file process and a stat of the
+        file. Binary detection follows the `diff` attribute and git's NUL
+        heuristic on the start of the new side; an index blob is only read
+        for this when it is small.
+
+        Args:
+            file_path: Path to the file
+            staged: Whether to probe the staged diff
+        """
+        old = self.pool.object_info(f"HEAD:{file_path}" if staged else f":{file_path}")
+        old_size = old[2] if old else 0
 
+        head = b""
         if staged:
-            args.append("--staged")
+            new = self.pool.object_info(f":{file_path}")
+            new_size = new[2] if new else 0
+            if new and new_size <= BINARY_SNIFF_BLOB_LIMIT:
+                blob = self.pool.cat_file(new[0])
+                head = blob[2][:BINARY_SNIFF_BYTES] if blob else b""
+        else:
+            path = os.path.join(self.pool.work_tree or self.repo_path, file_path)
+            try:
+                new_size = os.path.getsize(path)
+                with open(path, "rb") as f:
+                    head = f.read(BINARY_SNIFF_BYTES)
+            except OSError:
+                new_size = 0
+
+        binary = looks_binary(head)
+        if not binary:
+            result = self._run_git_command("check-attr", "-z", "diff", "--", file_path)
+            binary = result.stdout.split("\0")[2:3] == ["unset"]
+        return DiffProbe(old_size, new_size, binary)
+
+    def get_file_diff_stat(self, file_path: str, staged: bool = False) -> str:
+        """Get the `--stat --summary` of a file diff."""
+        return self._run_git_command(*file_diff_args(file_path, staged, stat=True)).stdout
+
+    def stream_file_diff(self, file_path: str, staged: bool, buffer: DiffBuffer) -> None:
+        """Feed the diff of a file into a buffer as git writes it.
+
+        Cached diffs are fed from the diff cache, and diffs that are small
+        relative to its budget are added to it.
 
-        args.append("--")
-        args.append(file_path)
+        Args:
+            file_path: Path to the file
+            staged: Whether to get the staged diff
+            buffer: The buffer to fill
+        """
+        key = self.file_diff_key(file_path, staged)
+        cached = self.diff_cache.get(key) if key is not None else None
+        if cached is not None:
+            buffer.feed(cached.encode())
+        else:
+            for chunk in self.pool.stream(*file_diff_args(file_path, staged)):
+                buffer.feed(chunk)
+            if key is not None and buffer.size <= self.diff_cache.max_bytes // 8:
+                self.diff_cache.put(key, buffer.text())
+        buffer.finish()
+
+    def file_diff_key(self, file_path: str, staged: bool = False) -> Optional[tuple]:
+        """Diff cache key of a file diff, or None before the first snapshot."""
+        if self.last_snapshot is None:
+            return None
+        return file_diff_key(self.last_snapshot, self.pool.work_tree or self.repo_path, file_path, staged)
+
+    def get_commit_diff(self, old: str, new: str, file_path: Optional[str] = None) -> str:
+        """Get the diff between two commits.
+
+        Diffs between full commit hashes are cached, since they never change.
 
-        result = self._run_git_command(*args)
+        Args:
+            old: The commit to diff from
+            new: The commit to diff to
+            file_path: Limit the diff to this path
+
+        Returns:
+            Diff output as a string
+        """
+        key = commit_diff_key(old, new, file_path) if is_full_hash(old) and is_full_hash(new) else None
+        if key is not None:
+            cached = self.diff_cache.get(key)
+            if cached is not None:
+                return cached
+
+        result = self._run_git_command(*commit_diff_args(old, new, file_path))
+        if key is not None:
+            self.diff_cache.put(key, result.stdout)
         return result.stdout
 
     def stage_file(self, file_path: str) -> bool:
@@ -254,26 +705,48 @@ class GitHandler:
         Args:
             file_path: Path to the file to stage
 
+        Returns:
+            True if successful
+        """
+        return self.stage_files([file_path])
+
+    def unstage_file(self, file_path: str) -> bool:
+        """Unstage a file.
+
+        Args:
+            file_path: Path to the file to unstage
+
+        Returns:
+            True if successful
+        """
+        return self.unstage_files([file_path])
+
+    def stage_files(self, file_paths: List[str]) -> bool:
+        """Stage files with a single `git add`, however many there are.
+
+        Args:
+            file_paths: Paths to stage
+
         Returns:
             True if successful
         """
         try:
-            self._run_git_command("add", "--", file_path, capture_output=False)
+            self._run_mutating_command(*STAGE_ARGS, input=pathspec_input(file_paths))
             return True
         except subprocess.CalledProcessError:
             return False
 
-    def unstage_file(self, file_path: str) -> bool:
-        """Unstage a file.
+    def unstage_files(self, file_paths: List[str]) -> bool:
+        """Unstage files with a single `git reset`, however many there are.
 
         Args:
-            file_path: Path to the file to unstage
+            file_paths: Paths to unstage
 
         Returns:
             True if successful
         """
         try:
-            self._run_git_command("reset", "HEAD", "--", file_path, capture_output=False)
+            self._run_mutating_command(*UNSTAGE_ARGS, input=pathspec_input(file_paths))
             return True
         except subprocess.CalledProcessError:
             return False
@@ -288,7 +761,7 @@ class GitHandler:
             True if successful
         """
         try:
-            self._run_git_command("commit", "-m", message, capture_output=False)
+            self._run_mutating_command("commit", "-m", message)
             return True
         except subprocess.CalledProcessError:
             return False
@@ -303,7 +776,7 @@ class GitHandler:
             True if successful
         """
         try:
-            self._run_git_command("checkout", branch_name, capture_output=False)
+            self._run_mutating_command("checkout", branch_name)
             return True
         except subprocess.CalledProcessError:
             return False
@@ -318,7 +791,7 @@ class GitHandler:
             True if successful
         """
         try:
-            self._run_git_command("checkout", "-b", branch_name, capture_output=False)
+            self._run_mutating_command("checkout", "-b", branch_name)
             return True
         except subprocess.CalledProcessError:
             return False
@@ -333,7 +806,7 @@ class GitHandler:
             Tuple of (success, error_message)
         """
         try:
-            result = self._run_git_command("merge", branch_name)
+            result = self._run_mutating_command("merge", branch_name)
             return True, result.stdout
         except subprocess.CalledProcessError as e:
             return False, e.stderr
@@ -345,7 +818,7 @@ class GitHandler:
             Tuple of (success, output_or_error_message)
         """
         try:
-            result = self._run_git_command("pull")
+            result = self._run_remote_command("pull")
             return True, result.stdout
         except subprocess.CalledProcessError as e:
             return False, e.stderr
@@ -357,24 +830,19 @@ class GitHandler:
             Tuple of (success, output_or_error_message)
         """
         try:
-            result = self._run_git_command("push")
+            result = self._run_remote_command("push")
             return True, result.stdout
         except subprocess.CalledProcessError as e:
             return False, e.stderr
 
-    def execute_command(self, command: str) -> Tuple[bool, str]:
-        """Execute a custom git command.
-
-        Args:
-            command: Git command to execute (without 'git' prefix)
+    def fetch(self) -> Tuple[bool, Optional[str]]:
+        """Fetch from the default remote without touching the work tree.
 
         Returns:
             Tuple of (success, output_or_error_message)
         """
         try:
-            # Split the command into arguments
-            args = command.split()
-            result = self._run_git_command(*args)
+            result = self._run_remote_command("fetch")
             return True, result.stdout
         except subprocess.CalledProcessError as e:
             return False, e.stderr
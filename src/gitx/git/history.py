@@ -0,0 +1,206 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Fields are separated by US (\x1f) and commits by NUL (-z). The message
+# comes last, so it may contain anything but NUL.
+METADATA_FORMAT = "--format=%H%x1f%T%x1f%P%x1f%an%x1f%ae%x1f%ad%x1f%cn%x1f%ce%x1f%cd%x1f%B"
+
+# `git log` arguments that read commit ids on stdin and print their metadata
+METADATA_ARGS = ("log", "--no-walk=unsorted", "--stdin", "-z", "--date=raw", METADATA_FORMAT)
+
+
+def format_git_date(timestamp: int, tz_offset: str) -> str:
+    """Format a raw commit timestamp like git's default date format."""
+    sign = -1 if tz_offset.startswith("-") else 1
+    minutes = sign * (int(tz_offset[1:3]) * 60 + int(tz_offset[3:5]))
+    dt = datetime.fromtimestamp(timestamp, timezone(timedelta(minutes=minutes)))
+    return f"{dt:%a %b} {dt.day} {dt:%H:%M:%S %Y} {tz_offset}"
+
+
+def _plural(count: int, unit: str) -> str:
+    return f"{count} {unit}" if count == 1 else f"{count} {unit}s"
+
+
+def format_relative_date(timestamp: int, now: Optional[float] = None) -> str:
+    """Format a timestamp relative to now, the way `git log --format=%ar` does."""
+    diff = int((time.time() if now is None else now) - timestamp)
+    if diff < 0:
+        return "in the future"
+    if diff < 90:
+        return _plural(diff, "second") + " ago"
+    diff = (diff + 30) // 60
+    if diff < 90:
+        return _plural(diff, "minute") + " ago"
+    diff = (diff + 30) // 60
+    if diff < 36:
+        return _plural(diff, "hour") + " ago"
+    diff = (diff + 12) // 24
+    if diff < 14:
+        return _plural(diff, "day") + " ago"
+    if diff < 70:
+        return _plural((diff + 3) // 7, "week") + " ago"
+    if diff < 365:
+        return _plural((diff + 15) // 30, "month") + " ago"
+    if diff < 1825:
+        total_months = (diff * 12 * 2 + 365) // (365 * 2)
+        years, months = divmod(total_months, 12)
+        if months:
+            return f"{_plural(years, 'year')}, {_plural(months, 'month')} ago"
+        return _plural(years, "year") + " ago"
+    return _plural((diff + 183) // 365, "year") + " ago"
+
+
+def _split_ident(value: str) -> Tuple[str, str, int, str]:
+    """Split "Name <email> timestamp tz" into its parts."""
+    ident, _, rest = value.rpartition("> ")
+    timestamp, _, tz_offset = rest.partition(" ")
+    name, _, email = ident.partition(" <")
+    return name, email, int(timestamp or 0), tz_offset or "+0000"
+
+
+class CommitRecord:
+    """One row of the commit log."""
+
+    __slots__ = ("hash", "short_hash", "author_name", "author_email", "date", "subject")
+
+    def __init__(self, hash: str, short_hash: str, author_name: str, author_email: str, date: str, subject: str):
+        self.hash = hash
+        self.short_hash = short_hash
+        self.author_name = author_name
+        self.author_email = author_email
+        self.date = date
+        self.subject = subject
+
+    @property
+    def author(self) -> str:
+        return f"{self.author_name} <{self.author_email}>"
+
+    def as_dict(self) -> Dict[str, str]:
+        """The dictionary form returned by GitHandler.get_commit_history."""
+        return {
+            "hash": self.short_hash,
+            "author": self.author,
+            "date": self.date,
+            "message": self.subject
+        }
+
+    def __repr__(self) -> str:
+        return f"CommitRecord({self.short_hash} {self.subject!r})"
+
+
+class CommitMetadata:
+    """Everything gitx shows about a commit.
+
+    Commits are immutable, so once read this never needs to be fetched
+    again; see CommitCache. `files` is the `--name-status` output against
+    the first parent, or None until the commit's details were first shown.
+    """
+
+    __slots__ = (
+        "hash", "tree", "parents",
+        "author_name", "author_email", "author_time", "author_tz",
+        "committer_name", "committer_email", "committer_time", "committer_tz",
+        "message", "files",
+    )
+
+    def __init__(
+        self,
+        hash: str,
+        tree: str,
+        parents: List[str],
+        author_name: str,
+        author_email: str,
+        author_time: int,
+        author_tz: str,
+        committer_name: str,
+        committer_email: str,
+        committer_time: int,
+        committer_tz: str,
+        message: str,
+        files: Optional[str] = None,
+    ):
+        self.hash = hash
+        self.tree = tree
+        self.parents = parents
+        self.author_name = author_name
+        self.author_email = author_email
+        self.author_time = author_time
+        self.author_tz = author_tz
+        self.committer_name = committer_name
+        self.committer_email = committer_email
+        self.committer_time = committer_time
+        self.committer_tz = committer_tz
+        self.message = message
+        self.files = files
+
+    @classmethod
+    def from_object(cls, oid: str, data: bytes) -> Optional["CommitMetadata"]:
+        """Parse a raw commit object as returned by `git cat-file commit`.
+
+        Returns:
+            The metadata, or None if the object has no author
+        """
+        text = data.decode("utf-8", errors="replace")
+        header, _, message = text.partition("\n\n")
+
+        tree = ""
+        parents: List[str] = []
+        idents: Dict[str, Tuple[str, str, int, str]] = {}
+        for line in header.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "tree":
+                tree = value
+            elif key == "parent":
+                parents.append(value)
+            elif key in ("author", "committer"):
+                idents[key] = _split_ident(value)
+
+        if "author" not in idents:
+            return None
+        author = idents["author"]
+        committer = idents.get("committer", author)
+        return cls(oid, tree, parents, *author, *committer, message.strip())
+
+    @property
+    def subject(self) -> str:
+        return self.message.split("\n", 1)[0]
+
+    def record(self, abbrev: int = 7, now: Optional[float] = None) -> CommitRecord:
+        """Build the commit log row for this commit.
+
+        Args:
+            abbrev: Length of the abbreviated hash
+            now: Reference time for the relative date
+        """
+        return CommitRecord(
+            self.hash, self.hash[:abbrev], self.author_name, self.author_email,
+            format_relative_date(self.author_time, now), self.subject
+        )
+
+    def __repr__(self) -> str:
+        return f"CommitMetadata({self.hash[:12]} {self.subject!r})"
+
+
+def page_args(skip: int, count: int, rev: str = "HEAD") -> List[str]:
+    """Build the `git rev-list` arguments for the commit ids of one log page."""
+    return ["rev-list", f"--skip={skip}", f"--max-count={count}", rev, "--"]
+
+
+def parse_metadata(output: str) -> List[CommitMetadata]:
+    """Parse `git log` output produced with METADATA_ARGS."""
+    commits = []
+    for record in output.split("\0"):
+        fields = record.split("\x1f", 9)
+        if len(fields) != 10:
+            continue
+        oid, tree, parents, a_name, a_email, a_date, c_name, c_email, c_date, message = fields
+        a_time, _, a_tz = a_date.partition(" ")
+        c_time, _, c_tz = c_date.partition(" ")
+        commits.append(CommitMetadata(
+            oid.strip(), tree, parents.split(),
+            a_name, a_email, int(a_time or 0), a_tz or "+0000",
+            c_name, c_email, int(c_time or 0), c_tz or "+0000",
+            message.strip()
+        ))
+    return commits
@@ -0,0 +1,374 @@
+import mmap
+import os
+import stat
+from array import array
+from struct import unpack_from
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from gitx.git.snapshot import RepoSnapshot
+
+# Entry flags
+_NAME_MASK = 0x0FFF
+_EXTENDED = 0x4000
+# Extended flags (index version 3 and later)
+_SKIP_WORKTREE = 0x4000
+_INTENT_TO_ADD = 0x2000
+
+# Mode of submodule entries
+_GITLINK = 0o160000
+
+# Work tree files modified this close to the start of a status call may
+# have changed while git was reading them; they are never trusted
+RACY_MARGIN_NS = 2 * 1_000_000_000
+
+_StatKey = Tuple[int, int, int]
+
+
+class IndexEntry:
+    """One entry of the index, with the stat data git uses to spot changed files.
+
+    Times are in nanoseconds, and like all stat fields truncated to 32 bits
+    the way git stores them.
+    """
+
+    __slots__ = ("path", "ctime", "mtime", "dev", "ino", "mode", "uid", "gid", "size", "oid", "flags", "extended")
+
+    def __init__(self, path, ctime, mtime, dev, ino, mode, uid, gid, size, oid, flags, extended):
+        self.path = path
+        self.ctime = ctime
+        self.mtime = mtime
+        self.dev = dev
+        self.ino = ino
+        self.mode = mode
+        self.uid = uid
+        self.gid = gid
+        self.size = size
+        self.oid = oid
+        self.flags = flags
+        self.extended = extended
+
+    @property
+    def stage(self) -> int:
+        """Merge stage, 0 unless the path is unmerged."""
+        return (self.flags >> 12) & 3
+
+    @property
+    def skip_worktree(self) -> bool:
+        return bool(self.extended & _SKIP_WORKTREE)
+
+    @property
+    def intent_to_add(self) -> bool:
+        return bool(self.extended & _INTENT_TO_ADD)
+
+    def __repr__(self) -> str:
+        return f"IndexEntry({self.path!r} {self.mode:o} {self.oid[:7]})"
+
+
+class GitIndex:
+    """The index file (.git/index), memory-mapped and parsed on demand.
+
+    Opening it walks the entries once to find their offsets and paths;
+    stat data and object names are unpacked only for the entries asked
+    for. Versions 2 and 3 (padded entries, optional extended flags) and 4
+    (prefix-compressed paths) are read. Extensions follow the entries and
+    are only located when extensions() is called.
+    """
+
+    def __init__(self, path: str, hash_size: int = 20):
+        """Map and index an index file.
+
+        Args:
+            path: Path of the index file
+            hash_size: Size of object names in bytes, 20 for SHA-1 and 32 for SHA-256
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If it is not an index file of a supported version
+        """
+        self.path = path
+        self.hash_size = hash_size
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.stat_key: _StatKey = (st.st_mtime_ns, st.st_size, st.st_ino)
+            self.mtime_ns = st.st_mtime_ns
+            # An empty file cannot be mapped, and is not an index either
+            if st.st_size < 12:
+                raise ValueError(f"{path} is not a git index")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature, self.version, count = unpack_from(">4sII", self._map, 0)
+        if signature != b"DIRC" or self.version not in (2, 3, 4):
+            self._map.close()
+            raise ValueError(f"{path} is not a git index of version 2, 3 or 4")
+        self.paths: List[str] = []
+        # Offset of each entry in the file
+        self._offsets = array("q")
+        try:
+            self._extensions_offset = self._scan(count)
+        except Exception:
+            self._map.close()
+            raise
+        self._positions: Optional[Dict[str, int]] = None
+
+    def _scan(self, count: int) -> int:
+        """Record the offset and path of every entry; returns where the extensions start."""
+        data = self._map
+        flags_at = 40 + self.hash_size
+        v4 = self.version == 4
+        pos = 12
+        previous = b""
+        paths = self.paths
+        offsets = self._offsets
+        for _ in range(count):
+            offsets.append(pos)
+            flags = (data[pos + flags_at] << 8) | data[pos + flags_at + 1]
+            name_at = pos + flags_at + (4 if flags & _EXTENDED else 2)
+            if v4:
+                # A varint of bytes to drop from the previous path, then the rest of the path
+                strip = data[name_at] & 0x7F
+                while data[name_at] & 0x80:
+                    name_at += 1
+                    strip = ((strip + 1) << 7) | (data[name_at] & 0x7F)
+                name_at += 1
+                end = data.find(b"\0", name_at)
+                name = previous[:len(previous) - strip] + data[name_at:end]
+                previous = name
+                pos = end + 1
+            else:
+                length = flags & _NAME_MASK
+                end = name_at + length if length < _NAME_MASK else data.find(b"\0", name_at)
+                name = data[name_at:end]
+                # Entries are padded with 1 to 8 NULs to a multiple of 8 bytes
+                pos += (end - pos + 8) & ~7
+            paths.append(name.decode("utf-8", errors="surrogateescape"))
+        return pos
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        for i in range(len(self.paths)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> IndexEntry:
+        pos = self._offsets[i]
+        fields = unpack_from(">10I", self._map, pos)
+        flags_at = pos + 40 + self.hash_size
+        flags = unpack_from(">H", self._map, flags_at)[0]
+        extended = unpack_from(">H", self._map, flags_at + 2)[0] if flags & _EXTENDED else 0
+        return IndexEntry(
+            self.paths[i],
+            fields[0] * 1_000_000_000 + fields[1],
+            fields[2] * 1_000_000_000 + fields[3],
+            fields[4], fields[5], fields[6], fields[7], fields[8], fields[9],
+            self._map[pos + 40:flags_at].hex(),
+            flags,
+            extended,
+        )
+
+    def find(self, path: str) -> Optional[int]:
+        """Position of the first entry for a path, or None if it is not tracked."""
+        if self._positions is None:
+            self._positions = {}
+            for i, p in enumerate(self.paths):
+                self._positions.setdefault(p, i)
+        return self._positions.get(path)
+
+    def extensions(self) -> Iterator[Tuple[bytes, int, int]]:
+        """Locate the extensions, e.g. TREE, REUC or UNTR.
+
+        Yields:
+            (signature, offset, size) of each extension's data
+        """
+        end = len(self._map) - self.hash_size
+        pos = self._extensions_offset
+        while pos + 8 <= end:
+            signature, size = unpack_from(">4sI", self._map, pos)
+            yield signature, pos + 8, size
+            pos += 8 + size
+
+    def stat_matches(self, i: int, st: os.stat_result) -> bool:
+        """Whether a work tree file's lstat still matches entry i, the way git compares them.
+
+        Modification and change times, size and inode are compared as
+        truncated to 32 bits, and the file type and executable bit against
+        the recorded mode.
+        """
+        pos = self._offsets[i]
+        ctime_s, ctime_ns, mtime_s, mtime_ns, _, ino, mode, _, _, size = unpack_from(">10I", self._map, pos)
+        if (st.st_mtime_ns // 1_000_000_000) & 0xFFFFFFFF != mtime_s or st.st_mtime_ns % 1_000_000_000 != mtime_ns:
+            return False
+        if (st.st_ctime_ns // 1_000_000_000) & 0xFFFFFFFF != ctime_s or st.st_ctime_ns % 1_000_000_000 != ctime_ns:
+            return False
+        if st.st_size & 0xFFFFFFFF != size or st.st_ino & 0xFFFFFFFF != ino:
+            return False
+        if stat.S_ISLNK(st.st_mode):
+            return stat.S_IFMT(mode) == stat.S_IFLNK
+        if stat.S_IFMT(mode) != stat.S_IFREG or not stat.S_ISREG(st.st_mode):
+            return False
+        return bool(st.st_mode & 0o100) == bool(mode & 0o100)
+
+    def is_gitlink(self, i: int) -> bool:
+        return unpack_from(">I", self._map, self._offsets[i] + 24)[0] & 0o170000 == _GITLINK
+
+    def skips_worktree(self, i: int) -> bool:
+        pos = self._offsets[i] + 40 + self.hash_size
+        flags = unpack_from(">H", self._map, pos)[0]
+        return bool(flags & _EXTENDED) and bool(unpack_from(">H", self._map, pos + 2)[0] & _SKIP_WORKTREE)
+
+
+def _stat_key(path: str) -> Optional[_StatKey]:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _full_stat(st: os.stat_result) -> Tuple[int, int, int, int, int]:
+    """Everything git compares a file by: both times, size, inode and mode."""
+    return (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino, st.st_mode)
+
+
+def _directories(paths: List[str]) -> Set[str]:
+    """Every directory holding one of the paths, the root ("") included."""
+    dirs = {""}
+    for path in paths:
+        slash = path.rfind("/")
+        while slash > 0:
+            parent = path[:slash]
+            if parent in dirs:
+                break
+            dirs.add(parent)
+            slash = parent.rfind("/")
+    return dirs
+
+
+class StatusBaseline:
+    """What the work tree looked like when a status snapshot was taken.
+
+    Started just before each `git status` call and completed on the first
+    quick check, it tells from stat calls alone that running status again
+    would give the same result:
+
+    - the index, HEAD, the branch tips and info/exclude are unchanged
+    - every tracked file the snapshot shows as unchanged still matches its
+      index entry, and every file it lists as changed has the same stat
+      as when it was listed. Status runs without optional locks, so it does
+      not write refreshed stat data back to the index: an unchanged file
+      whose entry is out of date (e.g. touched) is compared with its full
+      stat as of the snapshot instead
+    - no directory holding tracked files, nor any untracked directory
+      right below one, gained or lost an entry, which covers new and
+      removed untracked files
+
+    Anything modified after status started, or too close to the index
+    being written, is never trusted, which also makes completing the
+    baseline later safe. Repositories with submodules are not checked.
+    Deeper inside untracked directories only the first level is looked
+    at: status lists such a directory as one entry, so changes below it
+    only matter when it was empty, and the check is a shortcut for
+    watcher events rather than a replacement for status.
+    """
+
+    def __init__(self, git_dir: str, work_tree: str, ref_state: Optional[tuple], started_ns: int):
+        self.git_dir = git_dir
+        self.work_tree = work_tree
+        self.ref_state = ref_state
+        self.started_ns = started_ns
+        self.index_key = _stat_key(os.path.join(git_dir, "index"))
+        self.exclude_key = _stat_key(os.path.join(git_dir, "info", "exclude"))
+        # Stat keys of the files the snapshot lists as changed in the work tree
+        self.changed: Dict[str, Optional[_StatKey]] = {}
+        # Full stat of unchanged files that no longer match their index entry
+        self.refreshed: Dict[str, Tuple[int, int, int, int, int]] = {}
+        self.dirs: Dict[str, Optional[_StatKey]] = {}
+        self.completed = False
+        self.trusted = False
+
+    def complete(self, snapshot: RepoSnapshot, index: Optional[GitIndex]) -> None:
+        """Record the state of the files and directories the snapshot was taken from."""
+        self.completed = True
+        if index is None or index.stat_key != self.index_key or self.ref_state is None:
+            return
+        if snapshot.entries.submodules or any(index.is_gitlink(i) for i in range(len(index))):
+            return
+        limit = self.started_ns - RACY_MARGIN_NS
+        for path, kind, _, worktree in snapshot.entries.iter_codes():
+            if kind in b"12u" and worktree != ord("."):
+                key = _stat_key(os.path.join(self.work_tree, path))
+                if key is not None and key[0] >= limit:
+                    return
+                self.changed[path] = key
+        racy = index.mtime_ns - RACY_MARGIN_NS
+        for i, path in enumerate(index.paths):
+            if path in self.changed or index.skips_worktree(i):
+                continue
+            try:
+                st = os.lstat(os.path.join(self.work_tree, path))
+            except OSError:
+                # Gone since status ran, which unchanged() notices
+                continue
+            if st.st_mtime_ns >= racy or not index.stat_matches(i, st):
+                if st.st_mtime_ns >= limit or st.st_ctime_ns >= limit:
+                    return
+                self.refreshed[path] = _full_stat(st)
+        tracked_dirs = _directories(index.paths)
+        for directory in tracked_dirs:
+            path = os.path.join(self.work_tree, directory)
+            key = _stat_key(path)
+            if key is not None and key[0] >= limit:
+                return
+            self.dirs[directory] = key
+            try:
+                with os.scandir(path) as entries:
+                    children = [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+            for name in children:
+                child = f"{directory}/{name}" if directory else name
+                if child not in tracked_dirs and child != ".git":
+                    key = _stat_key(os.path.join(self.work_tree, child))
+                    if key is not None and key[0] >= limit:
+                        return
+                    self.dirs[child] = key
+        self.trusted = True
+
+    def unchanged(self, index: Optional[GitIndex], ref_state: Optional[tuple]) -> bool:
+        """Whether the work tree, index and refs still give the snapshot's status."""
+        if not self.trusted or index is None or ref_state != self.ref_state:
+            return False
+        if index.stat_key != self.index_key:
+            return False
+        if _stat_key(os.path.join(self.git_dir, "info", "exclude")) != self.exclude_key:
+            return False
+        for directory, key in self.dirs.items():
+            if _stat_key(os.path.join(self.work_tree, directory)) != key:
+                return False
+
+        # Files changed within a couple of seconds of the index being written
+        # can match its stat data and still differ
+        racy = index.mtime_ns - RACY_MARGIN_NS
+        changed, refreshed = self.changed, self.refreshed
+        work_tree = self.work_tree
+        lstat = os.lstat
+        for i, path in enumerate(index.paths):
+            if path in changed:
+                if _stat_key(os.path.join(work_tree, path)) != changed[path]:
+                    return False
+                continue
+            if index.skips_worktree(i):
+                continue
+            try:
+                st = lstat(os.path.join(work_tree, path))
+            except OSError:
+                return False
+            if path in refreshed:
+                if _full_stat(st) != refreshed[path]:
+                    return False
+            elif st.st_mtime_ns >= racy or not index.stat_matches(i, st):
+                return False
+        return True
@@ -0,0 +1,690 @@
+import heapq
+import mmap
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from struct import unpack_from
+from typing import Dict, List, Optional, Set, Tuple
+
+from gitx.git.history import CommitMetadata
+from gitx.git.refs import RefReader
+
+# Object types as stored in pack entry headers
+OBJ_COMMIT, OBJ_TREE, OBJ_BLOB, OBJ_TAG, OBJ_OFS_DELTA, OBJ_REF_DELTA = 1, 2, 3, 4, 6, 7
+TYPE_NAMES = {OBJ_COMMIT: "commit", OBJ_TREE: "tree", OBJ_BLOB: "blob", OBJ_TAG: "tag"}
+_TYPE_CODES = {name: code for code, name in TYPE_NAMES.items()}
+
+_IDX_MAGIC = b"\377tOc"
+
+# File type bits of tree entry modes
+_S_IFMT = 0o170000
+_S_IFDIR = 0o040000
+
+# Bytes `git diff --name-status` quotes in paths (with core.quotePath on)
+_QUOTED = frozenset(range(0x20)) | frozenset(range(0x7F, 0x100)) | {ord('"'), ord("\\")}
+
+# Values of diff.renames
+RENAMES_OFF, RENAMES_ON, RENAMES_COPIES = "off", "renames", "copies"
+
+# A log page further than this past the end of the paused walk is left to
+# `git rev-list`, which reads the commit-graph instead of every commit
+WALK_AHEAD_LIMIT = 5000
+
+
+def rename_detection(value: Optional[str]) -> str:
+    """Interpret a diff.renames value (None if unset) as RENAMES_OFF, RENAMES_ON or RENAMES_COPIES."""
+    value = (value or "true").strip().lower()
+    if value in ("copy", "copies"):
+        return RENAMES_COPIES
+    if value in ("false", "no", "off", "0"):
+        return RENAMES_OFF
+    return RENAMES_ON
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild an object from its delta base and a git delta."""
+
+    def size_at(pos: int) -> Tuple[int, int]:
+        size = shift = 0
+        while True:
+            c = delta[pos]
+            pos += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+            if not c & 0x80:
+                return size, pos
+
+    base_size, pos = size_at(0)
+    result_size, pos = size_at(pos)
+    if base_size != len(base):
+        raise ValueError("Delta does not apply to its base")
+
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            # Copy from the base: which offset and size bytes follow is given by the low bits
+            offset = size = 0
+            for bit in range(4):
+                if op & (1 << bit):
+                    offset |= delta[pos] << (8 * bit)
+                    pos += 1
+            for bit in range(3):
+                if op & (0x10 << bit):
+                    size |= delta[pos] << (8 * bit)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            # Insert the next op bytes of the delta
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("Invalid delta instruction")
+    if len(out) != result_size:
+        raise ValueError("Delta result has the wrong size")
+    return bytes(out)
+
+
+def _inflate(data, pos: int, size: int) -> bytes:
+    """Inflate a zlib stream of known inflated size starting at pos in data (bytes or mmap).
+
+    The stream's compressed length is not stored, so input is fed in chunks
+    until the stream ends.
+    """
+    inflater = zlib.decompressobj()
+    chunk = size + 64
+    parts = []
+    while not inflater.eof:
+        if pos >= len(data):
+            raise ValueError("Truncated object")
+        parts.append(inflater.decompress(data[pos:pos + chunk]))
+        pos += chunk
+    result = b"".join(parts)
+    if len(result) != size:
+        raise ValueError("Object has the wrong size")
+    return result
+
+
+class PackIndex:
+    """A pack's .idx file (version 1 or 2), memory-mapped.
+
+    Object names are looked up with the fan-out table and a binary search
+    over the sorted names, without reading the rest of the file.
+    """
+
+    def __init__(self, path: str, hash_size: int = 20):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._map
+        self.hash_size = hash_size
+        if data[:4] == _IDX_MAGIC:
+            if unpack_from(">I", data, 4)[0] != 2:
+                raise ValueError(f"Unsupported pack index version in {path}")
+            self._fanout = unpack_from(">256I", data, 8)
+            self.count = self._fanout[255]
+            # Names, then CRCs, then 31-bit offsets, then 64-bit offsets
+            self._names = 8 + 1024
+            self._stride = hash_size
+            self._offsets = self._names + self.count * (hash_size + 4)
+            self._large = self._offsets + self.count * 4
+            self.version = 2
+        else:
+            # Version 1: each entry is a 4-byte offset followed by the name
+            self._fanout = unpack_from(">256I", data, 0)
+            self.count = self._fanout[255]
+            self._names = 1024 + 4
+            self._stride = hash_size + 4
+            self.version = 1
+
+    def find(self, name: bytes) -> Optional[int]:
+        """The pack offset of an object, None if the pack does not hold it."""
+        first = name[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        data, base, stride, size = self._map, self._names, self._stride, self.hash_size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = base + mid * stride
+            current = data[at:at + size]
+            if current < name:
+                lo = mid + 1
+            elif current > name:
+                hi = mid
+            else:
+                return self._offset(mid)
+        return None
+
+    def _offset(self, i: int) -> int:
+        if self.version == 1:
+            return unpack_from(">I", self._map, 1024 + i * self._stride)[0]
+        offset = unpack_from(">I", self._map, self._offsets + i * 4)[0]
+        if offset & 0x80000000:
+            offset = unpack_from(">Q", self._map, self._large + (offset & 0x7FFFFFFF) * 8)[0]
+        return offset
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class Pack:
+    """A packfile and its index, both memory-mapped."""
+
+    def __init__(self, path: str, hash_size: int = 20):
+        """Open a pack.
+
+        Args:
+            path: The .pack file; its .idx must be next to it
+            hash_size: Length of object names in bytes
+        """
+        self.path = path
+        self.index = PackIndex(path[:-len(".pack")] + ".idx", hash_size)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != b"PACK":
+            self.close()
+            raise ValueError(f"Not a packfile: {path}")
+
+    def header(self, offset: int) -> Tuple[int, int, int]:
+        """Read an entry header.
+
+        Returns:
+            The entry type, the inflated size and the offset right after the header
+        """
+        data = self._map
+        c = data[offset]
+        offset += 1
+        kind = (c >> 4) & 7
+        size = c & 0x0F
+        shift = 4
+        while c & 0x80:
+            c = data[offset]
+            offset += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+        return kind, size, offset
+
+    def delta_base_offset(self, entry: int, pos: int) -> Tuple[int, int]:
+        """Read the base of an OBJ_OFS_DELTA entry, stored as a distance back from the entry.
+
+        Returns:
+            The offset of the base and the offset of the delta data
+        """
+        data = self._map
+        c = data[pos]
+        pos += 1
+        distance = c & 0x7F
+        while c & 0x80:
+            c = data[pos]
+            pos += 1
+            distance = ((distance + 1) << 7) | (c & 0x7F)
+        return entry - distance, pos
+
+    def data(self, pos: int, size: int) -> bytes:
+        """Inflate the data of an entry."""
+        return _inflate(self._map, pos, size)
+
+    def raw(self, pos: int, size: int) -> bytes:
+        return self._map[pos:pos + size]
+
+    def close(self) -> None:
+        self.index.close()
+        self._map.close()
+
+
+class DeltaBaseCache:
+    """Recently rebuilt objects by pack and offset, least recently used dropped first.
+
+    Deltas in a pack usually point from older objects to newer ones, so
+    walking the history back rebuilds each object from the one read just
+    before it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[int, bytes]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, int]) -> Optional[Tuple[int, bytes]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, int], kind: int, data: bytes) -> None:
+        if len(data) > self.max_bytes // 4 or key in self._entries:
+            return
+        self._entries[key] = (kind, data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self.size -= len(dropped)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+class ObjectStore:
+    """Reads objects from the packs and loose objects of a repository, in process.
+
+    Packs are found in objects/pack and in the object directories listed
+    in objects/info/alternates. The pack list is read again when an object
+    is not found and a pack directory changed, which is how git notices
+    packs written by a fetch or gc.
+    """
+
+    def __init__(self, objects_dir: str, hash_size: int = 20, cache_bytes: int = 32 * 1024 * 1024):
+        self.hash_size = hash_size
+        self.dirs = [objects_dir] + self._alternates(objects_dir)
+        self.cache = DeltaBaseCache(cache_bytes)
+        self._packs: Dict[str, Pack] = {}
+        self._pack_dirs_key: Optional[Tuple] = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _alternates(objects_dir: str, depth: int = 0) -> List[str]:
+        try:
+            with open(os.path.join(objects_dir, "info", "alternates")) as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return []
+        dirs = []
+        for line in lines:
+            if line and not line.startswith("#"):
+                path = os.path.normpath(os.path.join(objects_dir, line))
+                dirs.append(path)
+                # Git follows alternates of alternates up to five levels deep
+                if depth < 5:
+                    dirs.extend(ObjectStore._alternates(path, depth + 1))
+        return dirs
+
+    def _scan_packs(self) -> bool:
+        """Open packs added since the last scan and forget deleted ones.
+
+        Returns:
+            Whether any pack directory changed
+        """
+        stats = []
+        for directory in self.dirs:
+            try:
+                st = os.stat(os.path.join(directory, "pack"))
+                stats.append((st.st_mtime_ns, st.st_ino))
+            except OSError:
+                stats.append(None)
+        key = tuple(stats)
+        if key == self._pack_dirs_key:
+            return False
+        self._pack_dirs_key = key
+
+        found = set()
+        for directory in self.dirs:
+            pack_dir = os.path.join(directory, "pack")
+            try:
+                names = sorted(os.listdir(pack_dir))
+            except OSError:
+                continue
+            for name in names:
+                if name.endswith(".pack") and name[:-5] + ".idx" in names:
+                    path = os.path.join(pack_dir, name)
+                    found.add(path)
+                    if path not in self._packs:
+                        try:
+                            self._packs[path] = Pack(path, self.hash_size)
+                        except (OSError, ValueError):
+                            found.discard(path)
+        for path in list(self._packs):
+            if path not in found:
+                # Mappings of a deleted pack stay valid, but it is not searched any more
+                self._packs.pop(path).close()
+        return True
+
+    def read(self, oid: str) -> Optional[Tuple[str, bytes]]:
+        """Read an object.
+
+        Args:
+            oid: Full hex object name
+
+        Returns:
+            The type name and contents, or None if the object is not found
+        """
+        result = self.read_raw(bytes.fromhex(oid))
+        if result is None:
+            return None
+        return TYPE_NAMES[result[0]], result[1]
+
+    def read_raw(self, name: bytes) -> Optional[Tuple[int, bytes]]:
+        """Read an object by binary name, returning its type code and contents."""
+        with self._lock:
+            if self._pack_dirs_key is None:
+                self._scan_packs()
+            for attempt in range(2):
+                for pack in self._packs.values():
+                    offset = pack.index.find(name)
+                    if offset is not None:
+                        return self._read_packed(pack, offset)
+                loose = self._read_loose(name.hex())
+                if loose is not None:
+                    return loose
+                if attempt == 0 and not self._scan_packs():
+                    break
+        return None
+
+    def _read_loose(self, oid: str) -> Optional[Tuple[int, bytes]]:
+        for directory in self.dirs:
+            try:
+                with open(os.path.join(directory, oid[:2], oid[2:]), "rb") as f:
+                    compressed = f.read()
+            except OSError:
+                continue
+            try:
+                raw = zlib.decompress(compressed)
+            except zlib.error:
+                return None
+            header, _, data = raw.partition(b"\0")
+            kind, _, size = header.partition(b" ")
+            code = _TYPE_CODES.get(kind.decode("ascii", "replace"))
+            if code is None or int(size) != len(data):
+                return None
+            return code, data
+        return None
+
+    def _read_packed(self, pack: Pack, offset: int) -> Tuple[int, bytes]:
+        """Read a pack entry, following its delta chain to a cached or full base."""
+        cache = self.cache
+        chain: List[Tuple[int, int, int]] = []
+        while True:
+            cached = cache.get((pack.path, offset))
+            if cached is not None:
+                kind, data = cached
+                break
+            kind, size, pos = pack.header(offset)
+            if kind == OBJ_OFS_DELTA:
+                base, pos = pack.delta_base_offset(offset, pos)
+                chain.append((offset, pos, size))
+                offset = base
+            elif kind == OBJ_REF_DELTA:
+                base_name = pack.raw(pos, self.hash_size)
+                chain.append((offset, pos + self.hash_size, size))
+                base = pack.index.find(base_name)
+                if base is not None:
+                    offset = base
+                    continue
+                # The base lives elsewhere, as in packs completed after a thin fetch
+                found = self.read_raw(base_name)
+                if found is None:
+                    raise ValueError(f"Missing delta base {base_name.hex()}")
+                kind, data = found
+                break
+            elif kind in TYPE_NAMES:
+                data = pack.data(pos, size)
+                cache.put((pack.path, offset), kind, data)
+                break
+            else:
+                raise ValueError(f"Invalid pack entry type {kind} in {pack.path}")
+
+        for entry, pos, size in reversed(chain):
+            data = apply_delta(data, pack.data(pos, size))
+            cache.put((pack.path, entry), kind, data)
+        return kind, data
+
+    def close(self) -> None:
+        with self._lock:
+            for pack in self._packs.values():
+                pack.close()
+            self._packs.clear()
+            self._pack_dirs_key = None
+            self.cache.clear()
+
+
+def tree_entries(data: bytes, hash_size: int = 20) -> List[Tuple[bytes, int, bytes]]:
+    """Split a tree object into (name, mode, object name) entries, in tree order."""
+    entries = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        space = data.index(b" ", pos)
+        nul = data.index(b"\0", space)
+        entries.append((data[space + 1:nul], int(data[pos:space], 8), data[nul + 1:nul + 1 + hash_size]))
+        pos = nul + 1 + hash_size
+    return entries
+
+
+class _Walk:
+    """A log walk from one commit, paused after the commits listed so far.
+
+    Commits come out newest committer date first, ties in the order they
+    were reached, the way `git rev-list` orders them without a sort option.
+    """
+
+    __slots__ = ("tip", "listed", "queue", "queued", "seen", "recoded", "counter")
+
+    def __init__(self, tip: CommitMetadata, utf8: bool):
+        self.tip = tip.hash
+        self.listed: List[str] = []
+        self.queue: List[Tuple[int, int, str]] = []
+        # The parsed commits in the queue, which are read as they are reached
+        self.queued: Dict[str, CommitMetadata] = {}
+        self.seen: Set[str] = set()
+        # Commits whose message is not in UTF-8
+        self.recoded: Set[str] = set()
+        self.counter = 0
+        self.push(tip, utf8)
+
+    def push(self, commit: CommitMetadata, utf8: bool) -> None:
+        self.seen.add(commit.hash)
+        if not utf8:
+            self.recoded.add(commit.hash)
+        self.queued[commit.hash] = commit
+        heapq.heappush(self.queue, (-commit.committer_time, self.counter, commit.hash))
+        self.counter += 1
+
+    def pop(self) -> CommitMetadata:
+        oid = heapq.heappop(self.queue)[2]
+        self.listed.append(oid)
+        return self.queued.pop(oid)
+
+
+class PackBackend:
+    """Reads the commits of the log and the commit details without running git.
+
+    Commits and trees are read through an ObjectStore. Every method
+    returns None when it cannot answer exactly like the git commands it
+    replaces would, and the caller then runs those commands instead: for
+    revisions other than HEAD and full object names, in shallow
+    repositories, with grafts or replace refs, for commits with a message
+    encoding other than UTF-8, and for changes where git's rename or copy
+    detection could pair files.
+    """
+
+    def __init__(self, refs: RefReader, hash_size: int = 20, cache_bytes: int = 32 * 1024 * 1024):
+        self.refs = refs
+        self.hash_size = hash_size
+        self.store = ObjectStore(os.path.join(refs.common_dir, "objects"), hash_size, cache_bytes)
+        self._walk: Optional[_Walk] = None
+        self._lock = threading.Lock()
+
+    def usable(self) -> bool:
+        """Whether the objects read here are what git would show.
+
+        Shallow clones, grafts and replace refs change the history git sees.
+        """
+        common = self.refs.common_dir
+        if not self.refs.supported:
+            return False
+        if os.path.exists(os.path.join(common, "shallow")) or os.path.exists(os.path.join(common, "info", "grafts")):
+            return False
+        return not self.refs.list_refs(("refs/replace/",))
+
+    def _resolve(self, rev: str) -> Optional[str]:
+        if rev == "HEAD":
+            return self.refs.head()[1]
+        if len(rev) == self.hash_size * 2 and all(c in "0123456789abcdef" for c in rev):
+            return rev
+        return None
+
+    def read_commit(self, oid: str) -> Optional[CommitMetadata]:
+        """Read and parse a commit by full object name."""
+        if not self.usable() or self._resolve(oid) != oid:
+            return None
+        return self._commit(oid)
+
+    def _commit(self, oid: str) -> Optional[CommitMetadata]:
+        parsed = self._parse_commit(oid)
+        return parsed[0] if parsed is not None and parsed[1] else None
+
+    def _parse_commit(self, oid: str) -> Optional[Tuple[CommitMetadata, bool]]:
+        """Read a commit.
+
+        Returns:
+            The commit and whether its message is in UTF-8; git log would
+            re-encode other messages, so only their parents and dates are used
+        """
+        try:
+            obj = self.store.read(oid)
+        except (OSError, ValueError, IndexError, zlib.error):
+            return None
+        if obj is None or obj[0] != "commit":
+            return None
+        commit = CommitMetadata.from_object(oid, obj[1])
+        if commit is None:
+            return None
+        header = obj[1].partition(b"\n\n")[0]
+        encoding = header.partition(b"\nencoding ")[2].partition(b"\n")[0].lower()
+        return commit, encoding in (b"", b"utf-8", b"utf8")
+
+    def commit_page(self, skip: int, count: int, rev: str = "HEAD") -> Optional[List[CommitMetadata]]:
+        """One page of the log, as `git rev-list --skip=skip --max-count=count rev` lists it.
+
+        The walk is kept between calls, so reading the pages in order reads
+        every commit once.
+        """
+        if not self.usable():
+            return None
+        tip = self._resolve(rev)
+        if tip is None:
+            return [] if rev == "HEAD" else None
+
+        with self._lock:
+            walk = self._walk
+            if walk is None or walk.tip != tip:
+                first = self._parse_commit(tip)
+                if first is None:
+                    return None
+                walk = self._walk = _Walk(*first)
+            if skip > len(walk.listed) + WALK_AHEAD_LIMIT:
+                return None
+            read: Dict[str, CommitMetadata] = {}
+            while len(walk.listed) < skip + count and walk.queue:
+                commit = walk.pop()
+                read[commit.hash] = commit
+                for parent in commit.parents:
+                    if parent in walk.seen:
+                        continue
+                    parsed = self._parse_commit(parent)
+                    if parsed is None:
+                        # Start again next time rather than continue past a gap
+                        self._walk = None
+                        return None
+                    walk.push(*parsed)
+            page = walk.listed[skip:skip + count]
+            if not walk.recoded.isdisjoint(page):
+                return None
+
+        commits = []
+        for oid in page:
+            commit = read.get(oid) or self._commit(oid)
+            if commit is None:
+                return None
+            commits.append(commit)
+        return commits
+
+    def _tree(self, oid: bytes) -> Optional[List[Tuple[bytes, int, bytes]]]:
+        obj = self.store.read_raw(oid)
+        if obj is None or obj[0] != OBJ_TREE:
+            return None
+        return tree_entries(obj[1], self.hash_size)
+
+    def _diff_trees(
+        self, old: Optional[bytes], new: Optional[bytes], prefix: bytes, out: List[Tuple[str, bytes]]
+    ) -> bool:
+        """Append the changed paths between two trees in git's order; False if a tree is missing."""
+        old_entries = self._tree(old) if old is not None else []
+        new_entries = self._tree(new) if new is not None else []
+        if old_entries is None or new_entries is None:
+            return False
+
+        # Directories sort as if their name ended in "/"
+        def key(entry):
+            return entry[0] + b"/" if entry[1] & _S_IFMT == _S_IFDIR else entry[0]
+
+        i = j = 0
+        while i < len(old_entries) or j < len(new_entries):
+            a = old_entries[i] if i < len(old_entries) else None
+            b = new_entries[j] if j < len(new_entries) else None
+            if b is None or (a is not None and key(a) < key(b)):
+                if not self._side(a, prefix, "D", out):
+                    return False
+                i += 1
+            elif a is None or key(b) < key(a):
+                if not self._side(b, prefix, "A", out):
+                    return False
+                j += 1
+            else:
+                i += 1
+                j += 1
+                if a[1] == b[1] and a[2] == b[2]:
+                    continue
+                if a[1] & _S_IFMT == _S_IFDIR:
+                    if not self._diff_trees(a[2], b[2], prefix + a[0] + b"/", out):
+                        return False
+                else:
+                    out.append(("M" if a[1] & _S_IFMT == b[1] & _S_IFMT else "T", prefix + a[0]))
+        return True
+
+    def _side(self, entry, prefix: bytes, status: str, out: List[Tuple[str, bytes]]) -> bool:
+        """Append an entry present on one side only; directories are listed file by file."""
+        if entry[1] & _S_IFMT == _S_IFDIR:
+            old, new = (entry[2], None) if status == "D" else (None, entry[2])
+            return self._diff_trees(old, new, prefix + entry[0] + b"/", out)
+        out.append((status, prefix + entry[0]))
+        return True
+
+    def changed_files(self, commit: CommitMetadata, renames: str = RENAMES_ON) -> Optional[str]:
+        """The `git show --name-status --pretty=format:` output of a commit.
+
+        Args:
+            commit: A commit read by this backend or from git
+            renames: How diff.renames makes git pair added files with others
+        """
+        if len(commit.parents) > 1 or not self.usable():
+            # Merges are shown as combined diffs
+            return None
+        old_tree = None
+        if commit.parents:
+            parent = self._commit(commit.parents[0])
+            if parent is None:
+                return None
+            old_tree = bytes.fromhex(parent.tree)
+
+        changes: List[Tuple[str, bytes]] = []
+        try:
+            if not self._diff_trees(old_tree, bytes.fromhex(commit.tree), b"", changes):
+                return None
+        except (OSError, ValueError, IndexError, zlib.error):
+            return None
+
+        statuses = {status for status, _ in changes}
+        if "A" in statuses and (
+            (renames == RENAMES_ON and "D" in statuses) or (renames == RENAMES_COPIES and len(statuses) > 1)
+        ):
+            return None
+        if any(not _QUOTED.isdisjoint(path) for _, path in changes):
+            return None
+        return "".join(f"{status}\t{path.decode('ascii')}\n" for status, path in changes)
+
+    def close(self) -> None:
+        self.store.close()
+        self._walk = None
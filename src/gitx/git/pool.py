@@ -0,0 +1,381 @@
+import contextvars
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from gitx.trace import CallTiming, clock
+
+# Environment of every git call: reads never take optional locks, so a
+# status does not write refreshed stat data to the index under
+# index.lock while an IDE or build tool wants to update it
+READ_ENV = {"GIT_OPTIONAL_LOCKS": "0"}
+
+# Seconds to wait before each retry of a command that found a lock held
+LOCK_RETRY_DELAYS = (0.05, 0.1, 0.2, 0.4, 0.8)
+
+
+def lock_held(stderr: Optional[str]) -> bool:
+    """Whether git failed because another process holds a lock (index.lock, a ref lock)."""
+    return bool(stderr) and ".lock': File exists" in stderr
+
+
+class CatFileBatch:
+    """A long-lived `git cat-file --batch` (or `--batch-check`) process.
+
+    Objects are requested one per line on stdin, so the process start-up and
+    repository discovery cost is paid once instead of once per object read.
+    """
+
+    def __init__(self, cmd_prefix: List[str], env: Dict[str, str], check_only: bool = False):
+        """Initialize the batch reader.
+
+        Args:
+            cmd_prefix: The git command prefix (e.g. ["git", "-C", path])
+            env: Environment for the child process
+            check_only: Use --batch-check, which returns object info without contents
+        """
+        self._cmd = cmd_prefix + ["cat-file", "--batch-check" if check_only else "--batch"]
+        self._env = env
+        self._check_only = check_only
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                self._cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                env=self._env,
+            )
+        return self._proc
+
+    def query(self, rev: str) -> Optional[Tuple[str, str, int, Optional[bytes]]]:
+        """Look up an object.
+
+        Args:
+            rev: Any revision expression cat-file understands (hash, `HEAD`, `HEAD:path`...)
+
+        Returns:
+            Tuple of (object id, type, size, contents) or None if the object is missing.
+            Contents are None for --batch-check readers.
+        """
+        if "\n" in rev:
+            raise ValueError("Revision must not contain a newline")
+
+        with self._lock:
+            proc = self._ensure_started()
+            try:
+                proc.stdin.write(rev.encode() + b"\n")
+                proc.stdin.flush()
+                header = proc.stdout.readline()
+            except (BrokenPipeError, OSError):
+                self._kill()
+                raise
+
+            if not header:
+                self._kill()
+                raise OSError("git cat-file exited unexpectedly")
+
+            parts = header.decode(errors="replace").split()
+            if len(parts) != 3:
+                # "<rev> missing" or "<rev> ambiguous"
+                return None
+
+            oid, obj_type, size = parts[0], parts[1], int(parts[2])
+            if self._check_only:
+                return oid, obj_type, size, None
+
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing LF
+            return oid, obj_type, size, data
+
+    def _kill(self) -> None:
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait()
+            except OSError:
+                pass
+            self._proc = None
+
+    def close(self) -> None:
+        """Shut down the batch process."""
+        with self._lock:
+            if self._proc is not None:
+                try:
+                    self._proc.stdin.close()
+                    self._proc.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+                self._kill()
+
+
+class GitProcessPool:
+    """Pooled execution layer for git commands.
+
+    Repository discovery is done once and pinned through GIT_DIR/GIT_WORK_TREE,
+    object reads go through persistent cat-file processes, and other commands
+    can be dispatched concurrently on a reusable worker pool. Every call is timed
+    and recorded in `timings`.
+
+    Commands run without optional locks (see READ_ENV). Commands that change
+    the repository go through run_mutating(), which retries while another
+    process holds the lock they need.
+    """
+
+    def __init__(self, repo_path: str, max_workers: int = 4, history: int = 5000):
+        """Initialize the pool.
+
+        Args:
+            repo_path: Path to the Git repository
+            max_workers: Number of worker threads for concurrent commands
+            history: Number of call timings to keep
+        """
+        self.repo_path = repo_path
+        self.max_workers = max_workers
+        self.timings: Deque[CallTiming] = deque(maxlen=history)
+        self.git_dir: Optional[str] = None
+        self.work_tree: Optional[str] = None
+
+        self._env: Dict[str, str] = dict(os.environ, **READ_ENV)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batch: Optional[CatFileBatch] = None
+        self._batch_check: Optional[CatFileBatch] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cmd_prefix(self) -> List[str]:
+        return ["git", "-C", self.repo_path]
+
+    @property
+    def env(self) -> Dict[str, str]:
+        return self._env
+
+    @property
+    def user_env(self) -> Dict[str, str]:
+        """Environment for commands the user types: the pinned repository, without READ_ENV.
+
+        Such commands behave as in a terminal, taking optional locks, and a
+        failure on a held lock is shown to the user rather than retried.
+        """
+        env = dict(self._env)
+        for key in READ_ENV:
+            if key in os.environ:
+                env[key] = os.environ[key]
+            else:
+                env.pop(key, None)
+        return env
+
+    def record(
+        self,
+        args: Tuple[str, ...],
+        start: float,
+        returncode: int,
+        stdout_size: Optional[int] = None,
+        stderr_size: Optional[int] = None,
+        batched: bool = False,
+    ) -> None:
+        """Record a finished call that started at `start` on the trace clock."""
+        self.timings.append(
+            CallTiming(args, clock() - start, returncode, start, stdout_size, stderr_size, batched)
+        )
+
+    def discover(self) -> None:
+        """Locate the repository once and pin it for all later calls.
+
+        Raises:
+            subprocess.CalledProcessError: If repo_path is not inside a work tree
+        """
+        result = self.run("rev-parse", "--is-inside-work-tree", "--absolute-git-dir", "--show-toplevel")
+        lines = result.stdout.splitlines()
+        if len(lines) < 3 or lines[0] != "true":
+            raise subprocess.CalledProcessError(128, self.cmd_prefix + ["rev-parse"], result.stdout, result.stderr)
+
+        self.git_dir, self.work_tree = lines[1], lines[2]
+        self._env = dict(os.environ, GIT_DIR=self.git_dir, GIT_WORK_TREE=self.work_tree, **READ_ENV)
+
+    def run(
+        self,
+        *args: str,
+        capture_output: bool = True,
+        input: Optional[str] = None,
+        text: bool = True,
+        env: Optional[Dict[str, str]] = None,
+    ) -> subprocess.CompletedProcess:
+        """Run a git command and return the result.
+
+        Args:
+            *args: Arguments to pass to git
+            capture_output: Whether to capture the command output
+            input: Optional text to feed to the command's stdin
+            text: Decode output as text, otherwise return raw bytes
+            env: Environment to run git in instead of env, e.g. user_env
+
+        Returns:
+            The completed process
+
+        Raises:
+            subprocess.CalledProcessError: If git exits with a non-zero status
+        """
+        start = clock()
+        result = subprocess.run(
+            self.cmd_prefix + list(args),
+            capture_output=capture_output,
+            text=text,
+            input=input,
+            env=self._env if env is None else env,
+        )
+        self.record(
+            args,
+            start,
+            result.returncode,
+            len(result.stdout) if capture_output else None,
+            len(result.stderr) if capture_output else None,
+        )
+        result.check_returncode()
+        return result
+
+    def run_mutating(self, *args: str, input: Optional[str] = None) -> subprocess.CompletedProcess:
+        """Run a command that changes the repository, retrying with backoff while a lock is held.
+
+        Output is always captured, so the lock error can be recognized.
+
+        Args:
+            *args: Arguments to pass to git
+            input: Optional text to feed to the command's stdin
+
+        Returns:
+            The completed process
+
+        Raises:
+            subprocess.CalledProcessError: If git fails for another reason, or still finds
+                the lock held after the last retry
+        """
+        for delay in LOCK_RETRY_DELAYS:
+            try:
+                return self.run(*args, input=input)
+            except subprocess.CalledProcessError as e:
+                if not lock_held(e.stderr):
+                    raise
+            time.sleep(delay)
+        return self.run(*args, input=input)
+
+    def stream(self, *args: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Run a git command and yield its stdout in raw chunks as they arrive.
+
+        Args:
+            *args: Arguments to pass to git
+            chunk_size: Maximum size of each chunk in bytes
+
+        Yields:
+            Chunks of raw stdout
+
+        Raises:
+            subprocess.CalledProcessError: If git exits with a non-zero status
+        """
+        start = clock()
+        size = 0
+        # stderr goes to a file so a chatty command cannot block on a full pipe
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(self.cmd_prefix + list(args), stdout=subprocess.PIPE, stderr=stderr, env=self._env)
+            finished = False
+            try:
+                while True:
+                    chunk = proc.stdout.read1(chunk_size)
+                    if not chunk:
+                        finished = True
+                        break
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                if not finished:
+                    # The consumer stopped early or raised
+                    proc.kill()
+                proc.stdout.close()
+                returncode = proc.wait()
+                self.record(args, start, returncode, size, stderr.seek(0, os.SEEK_END))
+
+            if returncode != 0:
+                stderr.seek(0)
+                raise subprocess.CalledProcessError(
+                    returncode, self.cmd_prefix + list(args), None, stderr.read().decode(errors="replace")
+                )
+
+    def submit(self, *args: str, **kwargs) -> "Future[subprocess.CompletedProcess]":
+        """Run a git command on the worker pool.
+
+        Args:
+            *args: Arguments to pass to git
+            **kwargs: Passed through to run()
+
+        Returns:
+            A future resolving to the completed process
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gitx-git")
+            executor = self._executor
+        # Carry the trigger over to the worker thread
+        return executor.submit(contextvars.copy_context().run, self.run, *args, **kwargs)
+
+    def _timed_query(self, reader: CatFileBatch, rev: str):
+        start = clock()
+        result = reader.query(rev)
+        self.record(("cat-file", rev), start, 0 if result else 1, result[2] if result else 0, batched=True)
+        return result
+
+    def cat_file(self, rev: str) -> Optional[Tuple[str, str, bytes]]:
+        """Read an object through the persistent `cat-file --batch` process.
+
+        Args:
+            rev: Revision expression naming the object
+
+        Returns:
+            Tuple of (object id, type, contents) or None if the object is missing
+        """
+        with self._lock:
+            if self._batch is None:
+                self._batch = CatFileBatch(self.cmd_prefix, self._env)
+            reader = self._batch
+        result = self._timed_query(reader, rev)
+        if result is None:
+            return None
+        oid, obj_type, _, data = result
+        return oid, obj_type, data
+
+    def object_info(self, rev: str) -> Optional[Tuple[str, str, int]]:
+        """Read object metadata through the persistent `cat-file --batch-check` process.
+
+        Args:
+            rev: Revision expression naming the object
+
+        Returns:
+            Tuple of (object id, type, size) or None if the object is missing
+        """
+        with self._lock:
+            if self._batch_check is None:
+                self._batch_check = CatFileBatch(self.cmd_prefix, self._env, check_only=True)
+            reader = self._batch_check
+        result = self._timed_query(reader, rev)
+        if result is None:
+            return None
+        return result[0], result[1], result[2]
+
+    def close(self) -> None:
+        """Stop the batch processes and the worker pool."""
+        with self._lock:
+            readers = [r for r in (self._batch, self._batch_check) if r is not None]
+            executor = self._executor
+            self._batch = self._batch_check = self._executor = None
+
+        for reader in readers:
+            reader.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,239 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Refs and pseudo-refs kept per worktree in its own git dir; all others live in the common dir
+_PER_WORKTREE = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+
+# Prefixes of the refs listed as branches
+BRANCH_PREFIXES = ("refs/heads/", "refs/remotes/")
+
+# Symbolic refs pointing at symbolic refs are followed this deep, like git does
+_MAX_SYMREF_DEPTH = 5
+
+_StatKey = Tuple[int, int, int]
+
+# One reader per git dir, shared by everything in the process that reads refs
+_readers: Dict[str, "RefReader"] = {}
+_readers_lock = threading.Lock()
+
+
+def common_dir(git_dir: str) -> str:
+    """The directory shared by all worktrees of a repository, which holds the refs.
+
+    Linked worktrees name it in their commondir file; for the main worktree
+    it is the git dir itself.
+    """
+    try:
+        with open(os.path.join(git_dir, "commondir")) as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def _stat_key(path: str) -> Optional[_StatKey]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class RefReader:
+    """Reads HEAD and refs from the files in the git dir instead of running git.
+
+    Loose refs, packed-refs and symbolic refs are resolved the way git
+    does, with HEAD and per-worktree refs taken from the worktree's own git
+    dir. Files are only read again when their modification time, size or
+    inode changes, and listings of ref directories when the directory
+    changes; git replaces ref files by renaming a lock file over them,
+    which changes both.
+
+    Repositories that keep their refs in a reftable are not supported;
+    `supported` is False for them and callers fall back to running git.
+    """
+
+    def __init__(self, git_dir: str):
+        self.git_dir = git_dir
+        self.common_dir = common_dir(git_dir)
+        self.supported = not os.path.isdir(os.path.join(self.common_dir, "reftable"))
+        self._lock = threading.Lock()
+        # Path -> (stat key, stripped contents)
+        self._files: Dict[str, Tuple[_StatKey, str]] = {}
+        # Directory -> (stat key, loose refs by name, subdirectory names)
+        self._dirs: Dict[str, Tuple[_StatKey, Dict[str, str], List[str]]] = {}
+        self._packed_key: Optional[_StatKey] = None
+        self._packed: Dict[str, str] = {}
+
+    def _path(self, refname: str) -> str:
+        """The file of a loose ref."""
+        if refname.startswith(_PER_WORKTREE) or not refname.startswith("refs/"):
+            return os.path.join(self.git_dir, refname)
+        return os.path.join(self.common_dir, refname)
+
+    def _read(self, path: str) -> Optional[str]:
+        """The contents of a small file, from the cache while the file is unchanged."""
+        key = _stat_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except (OSError, UnicodeDecodeError):
+            return None
+        with self._lock:
+            self._files[path] = (key, value)
+        return value
+
+    def packed_refs(self) -> Dict[str, str]:
+        """Object names by ref name from packed-refs, parsed again only when it changes."""
+        path = os.path.join(self.common_dir, "packed-refs")
+        key = _stat_key(path)
+        with self._lock:
+            if key == self._packed_key:
+                return self._packed
+        packed: Dict[str, str] = {}
+        if key is not None:
+            try:
+                with open(path) as f:
+                    for line in f:
+                        # Skip the header and the peeled values of annotated tags
+                        if line.startswith(("#", "^")):
+                            continue
+                        oid, _, refname = line.rstrip("\n").partition(" ")
+                        packed[refname] = oid
+            except (OSError, UnicodeDecodeError):
+                packed = {}
+        with self._lock:
+            self._packed_key, self._packed = key, packed
+        return packed
+
+    def read_ref(self, refname: str) -> Optional[str]:
+        """The raw value of a ref: an object name, or "ref: <target>" for symbolic refs."""
+        value = self._read(self._path(refname))
+        if value is not None:
+            return value
+        if refname.startswith("refs/"):
+            return self.packed_refs().get(refname)
+        return None
+
+    def resolve(self, refname: str) -> Tuple[str, Optional[str]]:
+        """Follow symbolic refs to the end.
+
+        Returns:
+            The last ref name reached and its object name, None if that ref does not exist
+        """
+        for _ in range(_MAX_SYMREF_DEPTH):
+            value = self.read_ref(refname)
+            if value is None:
+                return refname, None
+            if not value.startswith("ref:"):
+                return refname, value
+            refname = value[4:].strip()
+        return refname, None
+
+    def head(self) -> Tuple[Optional[str], Optional[str]]:
+        """What HEAD of this worktree points at.
+
+        Returns:
+            The branch ref HEAD names (None when detached) and the commit it
+            resolves to (None on an unborn branch)
+        """
+        value = self.read_ref("HEAD")
+        if value is None:
+            return None, None
+        if not value.startswith("ref:"):
+            return None, value
+        return self.resolve(value[4:].strip())
+
+    def current_branch(self) -> Optional[str]:
+        """The current branch, "HEAD" when detached.
+
+        Unlike `rev-parse --abbrev-ref HEAD`, an unborn branch is named too,
+        the way `git status` does.
+
+        Returns:
+            The name, or None if the refs cannot be read here
+        """
+        if not self.supported:
+            return None
+        head_ref, _ = self.head()
+        if head_ref is None:
+            return "HEAD"
+        return head_ref[len("refs/heads/"):] if head_ref.startswith("refs/heads/") else head_ref
+
+    def _list_dir(self, path: str) -> Tuple[Dict[str, str], List[str]]:
+        """The loose refs and subdirectories of one ref directory, cached on its stat key."""
+        key = _stat_key(path)
+        if key is None:
+            return {}, []
+        with self._lock:
+            cached = self._dirs.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1], cached[2]
+        refs: Dict[str, str] = {}
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif not entry.name.endswith(".lock"):
+                        value = self._read(entry.path)
+                        if value is not None:
+                            refs[entry.name] = value
+        except OSError:
+            return {}, []
+        with self._lock:
+            self._dirs[path] = (key, refs, subdirs)
+        return refs, subdirs
+
+    def list_refs(self, prefixes: Tuple[str, ...] = BRANCH_PREFIXES) -> Dict[str, str]:
+        """Object names of all refs under the given prefixes, loose refs overriding packed ones.
+
+        Symbolic refs such as refs/remotes/origin/HEAD are left out.
+
+        Args:
+            prefixes: Ref name prefixes ending in "/", e.g. "refs/heads/"
+        """
+        refs = {name: oid for name, oid in self.packed_refs().items() if name.startswith(prefixes)}
+        for prefix in prefixes:
+            stack = [prefix]
+            while stack:
+                base = stack.pop()
+                loose, subdirs = self._list_dir(self._path(base))
+                for name, value in loose.items():
+                    if not value.startswith("ref:"):
+                        refs[base + name] = value
+                stack.extend(f"{base}{name}/" for name in subdirs)
+        return refs
+
+    def config_key(self) -> Tuple[Optional[_StatKey], Optional[_StatKey]]:
+        """Stat keys of the repository config files, which hold the branch upstreams."""
+        return (
+            _stat_key(os.path.join(self.common_dir, "config")),
+            _stat_key(os.path.join(self.git_dir, "config.worktree")),
+        )
+
+    def branch_state(self) -> Optional[Tuple]:
+        """Everything a branch listing depends on: HEAD, the branch tips and the config.
+
+        Returns:
+            A value that compares equal while the listing is unchanged, or None if the refs cannot be read here
+        """
+        if not self.supported:
+            return None
+        return (self.read_ref("HEAD"), self.list_refs(BRANCH_PREFIXES), self.config_key())
+
+
+def ref_reader(git_dir: str) -> RefReader:
+    """The shared RefReader of a git dir, so its caches are filled once per process."""
+    with _readers_lock:
+        reader = _readers.get(git_dir)
+        if reader is None:
+            reader = _readers[git_dir] = RefReader(git_dir)
+        return reader
@@ -0,0 +1,195 @@
+import hashlib
+import marshal
+import os
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from gitx.git.branches import Branch, BranchIndex
+from gitx.git.history import CommitRecord
+from gitx.git.refs import BRANCH_PREFIXES, ref_reader
+from gitx.git.snapshot import RepoSnapshot, StatusTable
+from gitx.utils.helpers import user_cache_dir
+
+# Start of every session file, followed by the format version
+MAGIC = b"GXS"
+# Bumped whenever the layout changes; files of other versions are ignored
+SESSION_VERSION = 3
+
+
+class RefTips:
+    """HEAD and the branch tips of a repository, read from its files without running git.
+
+    Attributes:
+        head_ref: The branch HEAD points at, None when detached
+        head_oid: The commit HEAD resolves to, None on an unborn branch
+        tips: Object name of every local and remote-tracking branch by full ref name
+        config: Stat keys of the config files, which hold the upstreams
+    """
+
+    __slots__ = ("head_ref", "head_oid", "tips", "config")
+
+    def __init__(self, head_ref: Optional[str], head_oid: Optional[str], tips: Dict[str, str], config: Tuple):
+        self.head_ref = head_ref
+        self.head_oid = head_oid
+        self.tips = tips
+        self.config = config
+
+
+def read_ref_tips(git_dir: str) -> Optional[RefTips]:
+    """Read HEAD and the branch tips with the repository's RefReader.
+
+    Returns:
+        The tips, or None if the repository keeps its refs in a format not read here (reftable)
+    """
+    reader = ref_reader(git_dir)
+    if not reader.supported:
+        return None
+    head_ref, head_oid = reader.head()
+    return RefTips(head_ref, head_oid, reader.list_refs(BRANCH_PREFIXES), reader.config_key())
+
+
+class Session:
+    """What the panels last showed for a repository, kept for the next start.
+
+    A session is shown as soon as gitx starts, marked as stale, and then
+    revalidated: the log and the branch list are kept when the ref tips
+    they were read from are unchanged, while the status is always taken
+    again, since edits in the work tree leave no trace in the refs.
+
+    Attributes:
+        git_dir: The repository the session belongs to
+        snapshot: The last status snapshot, with stale set
+        branches: The last branch index
+        commits: The first page of the log
+        total: Number of commits in the log, None if it was not counted
+        config: Stat keys of the config files when the branches were saved
+    """
+
+    __slots__ = ("git_dir", "snapshot", "branches", "commits", "total", "config")
+
+    def __init__(
+        self,
+        git_dir: str,
+        snapshot: RepoSnapshot,
+        branches: BranchIndex,
+        commits: List[CommitRecord],
+        total: Optional[int],
+        config: Optional[Tuple] = None,
+    ):
+        self.git_dir = git_dir
+        self.snapshot = snapshot
+        self.branches = branches
+        self.commits = commits
+        self.total = total
+        self.config = config if config is not None else ref_reader(git_dir).config_key()
+
+    def log_is_current(self, refs: RefTips) -> bool:
+        """Whether the saved log still starts at the commit HEAD points to."""
+        if self.total is None:
+            return False
+        if refs.head_oid is None:
+            return self.total == 0
+        return bool(self.commits) and self.commits[0].hash == refs.head_oid
+
+    def branches_are_current(self, refs: RefTips) -> bool:
+        """Whether the saved branches have the same tips, HEAD and upstream configuration."""
+        if refs.config != self.config or len(self.branches) != len(refs.tips):
+            return False
+        head = self.branches.head
+        if (head.refname if head is not None else None) != refs.head_ref:
+            return False
+        return all(refs.tips.get(branch.refname) == branch.tip for branch in self.branches)
+
+
+def session_path(repo_path: str) -> str:
+    """Where the session of the repository opened from repo_path is kept."""
+    key = hashlib.sha1(os.path.realpath(repo_path).encode()).hexdigest()[:20]
+    return os.path.join(user_cache_dir(), "sessions", key + ".session")
+
+
+def _dump(repo_path: str, session: Session) -> bytes:
+    snapshot = session.snapshot
+    table = snapshot.entries
+    data = (
+        os.path.realpath(repo_path),
+        session.git_dir,
+        session.config,
+        (snapshot.oid, snapshot.branch, snapshot.upstream, snapshot.ahead, snapshot.behind, snapshot.taken_at),
+        (
+            table.paths, bytes(table.codes), bytes(table.oids), table.oid_offsets.tobytes(),
+            table.orig_paths, table.submodules, table.hexlen,
+        ),
+        [
+            (b.refname, b.is_head, b.upstream, b.ahead, b.behind, b.gone, b.tip, b.date, b.remote)
+            for b in session.branches
+        ],
+        [(c.hash, c.short_hash, c.author_name, c.author_email, c.date, c.subject) for c in session.commits],
+        -1 if session.total is None else session.total,
+    )
+    return MAGIC + bytes([SESSION_VERSION]) + marshal.dumps(data)
+
+
+def _load(repo_path: str, raw: bytes) -> Optional[Session]:
+    if raw[:len(MAGIC)] != MAGIC or raw[len(MAGIC):len(MAGIC) + 1] != bytes([SESSION_VERSION]):
+        return None
+    path, git_dir, config, head, status, branches, commits, total = marshal.loads(raw[len(MAGIC) + 1:])
+    if path != os.path.realpath(repo_path):
+        return None
+
+    snapshot = RepoSnapshot()
+    snapshot.oid, snapshot.branch, snapshot.upstream, snapshot.ahead, snapshot.behind, snapshot.taken_at = head
+    snapshot.stale = True
+    table = StatusTable()
+    table.paths, codes, oids, offsets, table.orig_paths, table.submodules, table.hexlen = status
+    table.codes = bytearray(codes)
+    table.oids = bytearray(oids)
+    table.oid_offsets = array("q")
+    table.oid_offsets.frombytes(offsets)
+    snapshot.entries = table
+
+    index = BranchIndex()
+    for refname, is_head, upstream, ahead, behind, gone, tip, date, remote in branches:
+        index.add(Branch(refname, is_head, upstream, ahead, behind, gone, tip, date, remote))
+    records = [CommitRecord(*fields) for fields in commits]
+    return Session(git_dir, snapshot, index, records, None if total < 0 else total, config)
+
+
+def load_session(repo_path: str) -> Optional[Session]:
+    """Read the saved session of a repository.
+
+    Args:
+        repo_path: The directory gitx was started in
+
+    Returns:
+        The session, or None if there is none or it cannot be read
+    """
+    try:
+        with open(session_path(repo_path), "rb") as f:
+            raw = f.read()
+        session = _load(repo_path, raw)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if session is None or not os.path.isdir(session.git_dir):
+        return None
+    return session
+
+
+def save_session(repo_path: str, session: Session) -> None:
+    """Save the session of a repository, replacing the previous one.
+
+    The file is written next to its final place and renamed over it, so a
+    concurrent start never reads half a session. Errors are ignored: the
+    session only saves time.
+    """
+    path = session_path(repo_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(_dump(repo_path, session))
+        os.replace(tmp, path)
+    except (OSError, ValueError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,398 @@
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Arguments for the single status call a snapshot is built from
+SNAPSHOT_ARGS = ("status", "--porcelain=v2", "--branch", "-z")
+
+# Byte values of status codes, as stored in StatusTable.codes
+_UNMERGED, _UNTRACKED, _IGNORED, _DOT, _DELETED = b"u?!.D"
+_UNTRACKED_CODES, _IGNORED_CODES = b"???", b"!!!"
+
+
+class StatusEntry:
+    """A single changed path from `git status --porcelain=v2`.
+
+    Attributes:
+        kind: "1" ordinary change, "2" rename/copy, "u" unmerged, "?" untracked, "!" ignored
+        index: Index (staged) status letter, "." if unchanged
+        worktree: Work tree (unstaged) status letter, "." if unchanged
+        path: Path relative to the repository root
+        orig_path: Source path of a rename or copy
+        head_oid: Object name in HEAD
+        index_oid: Object name in the index
+        submodule: None for regular files, else the "<c><m><u>" submodule state flags
+    """
+
+    __slots__ = ("kind", "index", "worktree", "path", "orig_path", "head_oid", "index_oid", "submodule")
+
+    def __init__(
+        self,
+        kind: str,
+        index: str,
+        worktree: str,
+        path: str,
+        orig_path: Optional[str] = None,
+        head_oid: Optional[str] = None,
+        index_oid: Optional[str] = None,
+        submodule: Optional[str] = None,
+    ):
+        self.kind = kind
+        self.index = index
+        self.worktree = worktree
+        self.path = path
+        self.orig_path = orig_path
+        self.head_oid = head_oid
+        self.index_oid = index_oid
+        self.submodule = submodule
+
+    @property
+    def staged(self) -> bool:
+        return self.kind in "12" and self.index != "."
+
+    @property
+    def unstaged(self) -> bool:
+        return self.kind == "u" or (self.kind in "12" and self.worktree != ".")
+
+    @property
+    def is_submodule(self) -> bool:
+        return self.submodule is not None
+
+    @property
+    def submodule_commit_changed(self) -> bool:
+        return self.submodule is not None and self.submodule[0] == "C"
+
+    @property
+    def submodule_modified(self) -> bool:
+        return self.submodule is not None and self.submodule[1] == "M"
+
+    @property
+    def submodule_untracked(self) -> bool:
+        return self.submodule is not None and self.submodule[2] == "U"
+
+    def __repr__(self) -> str:
+        return f"StatusEntry({self.kind} {self.index}{self.worktree} {self.path!r})"
+
+
+class StatusTable:
+    """Array-backed storage for status entries.
+
+    Status codes live in one bytearray (three bytes per entry) and object
+    names in another, so a large status costs one path string per entry
+    instead of a full Python object. StatusEntry records are built on access.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        # kind, index status and work tree status per entry
+        self.codes = bytearray()
+        # "<HEAD oid> <index oid>" as ASCII hex, for entries that have them
+        self.oids = bytearray()
+        # Offset into oids per entry, -1 when the entry has none
+        self.oid_offsets = array("q")
+        self.orig_paths: Dict[int, str] = {}
+        self.submodules: Dict[int, str] = {}
+        self.hexlen = 40
+        # Position of each path, built on the first lookup
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, i: int) -> StatusEntry:
+        if i < 0:
+            i += len(self.paths)
+        kind, index, worktree = self.codes[3 * i:3 * i + 3].decode()
+        head_oid = index_oid = None
+        offset = self.oid_offsets[i]
+        if offset >= 0:
+            oids = self.oids[offset:offset + 2 * self.hexlen + 1].decode()
+            head_oid, index_oid = oids[:self.hexlen], oids[self.hexlen + 1:]
+        return StatusEntry(
+            kind, index, worktree, self.paths[i],
+            self.orig_paths.get(i), head_oid, index_oid, self.submodules.get(i)
+        )
+
+    def __iter__(self) -> Iterator[StatusEntry]:
+        for i in range(len(self.paths)):
+            yield self[i]
+
+    def find(self, path: str) -> Optional[int]:
+        """Position of the entry for a path, or None if the path is unchanged."""
+        if self._positions is None or len(self._positions) < len(self.paths):
+            self._positions = {p: i for i, p in enumerate(self.paths)}
+        return self._positions.get(path)
+
+    def iter_codes(self) -> Iterator[Tuple[str, int, int, int]]:
+        """Iterate (path, kind, index, worktree) with codes as byte values, without building entries."""
+        codes = self.codes
+        return zip(self.paths, codes[0::3], codes[1::3], codes[2::3])
+
+    def append(self, entry: StatusEntry) -> None:
+        """Add an entry built elsewhere (e.g. restored from a cache)."""
+        i = len(self.paths)
+        self.paths.append(entry.path)
+        self.codes += f"{entry.kind}{entry.index}{entry.worktree}".encode()
+        if entry.head_oid is not None and entry.index_oid is not None:
+            self.hexlen = len(entry.head_oid)
+            self.oid_offsets.append(len(self.oids))
+            self.oids += f"{entry.head_oid} {entry.index_oid}".encode()
+        else:
+            self.oid_offsets.append(-1)
+        if entry.orig_path is not None:
+            self.orig_paths[i] = entry.orig_path
+        if entry.submodule is not None:
+            self.submodules[i] = entry.submodule
+
+
+class RepoSnapshot:
+    """Repository state captured by one `git status --porcelain=v2 --branch -z` call.
+
+    Every panel renders from the same snapshot, so they all show the same moment.
+    A snapshot restored from the last session is marked stale until a fresh
+    one replaces it. A snapshot taken with `--untracked-files=no` has
+    untracked_listed unset until a separate scan has added its untracked files.
+    """
+
+    def __init__(self):
+        self.oid: Optional[str] = None
+        self.branch: Optional[str] = None
+        self.upstream: Optional[str] = None
+        self.ahead: Optional[int] = None
+        self.behind: Optional[int] = None
+        self.entries = StatusTable()
+        self.taken_at = time.time()
+        self.stale = False
+        self.untracked_listed = True
+
+    @property
+    def detached(self) -> bool:
+        return self.branch is None
+
+    @property
+    def current_branch(self) -> str:
+        """The branch name as `rev-parse --abbrev-ref HEAD` would print it."""
+        return self.branch if self.branch is not None else "HEAD"
+
+    @property
+    def is_clean(self) -> bool:
+        codes = self.entries.codes
+        # Every entry must be unchanged in the work tree or ignored
+        return codes[2::3].count(b".") + codes[0::3].count(b"!") == len(self.entries)
+
+    def same_status(self, other: "RepoSnapshot") -> bool:
+        """Whether another snapshot has the same branch state and changed paths."""
+        mine, theirs = self.entries, other.entries
+        branch_state = (self.oid, self.branch, self.upstream, self.ahead, self.behind)
+        if branch_state != (other.oid, other.branch, other.upstream, other.ahead, other.behind):
+            return False
+        return (mine.codes, mine.oids, mine.paths, mine.orig_paths, mine.submodules) == (
+            theirs.codes, theirs.oids, theirs.paths, theirs.orig_paths, theirs.submodules
+        )
+
+    def add_untracked(self, paths: List[str]) -> None:
+        """Add untracked paths listed after the snapshot was taken.
+
+        Status lists untracked paths after all other entries, so appending
+        them gives the same table a single status call would have.
+        """
+        table = self.entries
+        table.paths.extend(paths)
+        table.codes += _UNTRACKED_CODES * len(paths)
+        table.oid_offsets.extend([-1] * len(paths))
+
+    def status_groups(self) -> Dict[str, List[str]]:
+        """Group paths the way GitHandler.get_status does."""
+        untracked: List[str] = []
+        modified: List[str] = []
+        staged: List[str] = []
+        deleted: List[str] = []
+
+        for path, kind, index, worktree in self.entries.iter_codes():
+            if kind == _UNTRACKED:
+                untracked.append(path)
+            elif kind == _UNMERGED:
+                modified.append(path)
+            elif kind != _IGNORED:
+                if index != _DOT:
+                    staged.append(path)
+                if worktree == _DELETED:
+                    deleted.append(path)
+                elif worktree != _DOT:
+                    modified.append(path)
+
+        paths = self.entries.paths
+        renamed = [f"{orig} -> {paths[i]}" for i, orig in self.entries.orig_paths.items()]
+
+        return {
+            "untracked": untracked,
+            "modified": modified,
+            "staged": staged,
+            "deleted": deleted,
+            "renamed": renamed
+        }
+
+    def summary(self) -> Dict[str, str]:
+        """Summarize the snapshot the way GitHandler.get_repo_status_summary does."""
+        if self.upstream is None or self.ahead is None:
+            remote_status = "no upstream branch"
+        else:
+            remote_status = f"{self.upstream} (ahead:{self.ahead}, behind:{self.behind})"
+
+        return {
+            "branch": self.current_branch,
+            "status": "✓ clean" if self.is_clean else "! modified",
+            "remote": remote_status
+        }
+
+
+class PorcelainV2Parser:
+    """Incremental parser for `git status --porcelain=v2 --branch -z` output.
+
+    Output is fed in arbitrary chunks as it is read from git, so the full
+    status never has to be held in memory. Records are split on NUL, so paths
+    are never quoted and may contain spaces, newlines or arrows.
+    """
+
+    def __init__(self):
+        self.snapshot = RepoSnapshot()
+        self._tail = b""
+        self._rename_pending = False
+        self._hexlen: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> None:
+        """Parse every complete record in a chunk of output.
+
+        Args:
+            chunk: The next piece of raw status output
+        """
+        if self._tail:
+            chunk = self._tail + chunk
+        end = chunk.rfind(b"\0")
+        if end < 0:
+            self._tail = chunk
+            return
+        self._tail = chunk[end + 1:]
+
+        table = self.snapshot.entries
+        paths, codes, oids, oid_offsets = table.paths, table.codes, table.oids, table.oid_offsets
+        hexlen = self._hexlen
+
+        # Decoding whole chunks is much cheaper than decoding every record
+        records = iter(chunk[:end].decode("utf-8", errors="surrogateescape").split("\0"))
+        if self._rename_pending:
+            # The source path of a rename whose entry ended the previous chunk
+            table.orig_paths[len(paths) - 1] = next(records)
+            self._rename_pending = False
+
+        for record in records:
+            kind = record[:1]
+            if kind == "?" or kind == "!":
+                codes += _UNTRACKED_CODES if kind == "?" else _IGNORED_CODES
+                oid_offsets.append(-1)
+                paths.append(record[2:])
+            elif kind == "1" or kind == "2":
+                # 1 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <path>
+                # 2 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <X><score> <path>
+                if hexlen is None:
+                    hexlen = self._hexlen = table.hexlen = record.index(" ", 31) - 31
+                if record[5] != "N":  # "N..." for regular files, "S<c><m><u>" for submodules
+                    table.submodules[len(paths)] = record[6:9]
+                codes += (kind + record[2:4]).encode()
+                oid_offsets.append(len(oids))
+                oids += record[31:32 + 2 * hexlen].encode()
+
+                if kind == "1":
+                    paths.append(record[33 + 2 * hexlen:])
+                else:
+                    paths.append(record[record.index(" ", 33 + 2 * hexlen) + 1:])
+                    # The next record is the source path of the rename or copy
+                    orig_path = next(records, None)
+                    if orig_path is None:
+                        self._rename_pending = True
+                    else:
+                        table.orig_paths[len(paths) - 1] = orig_path
+            elif kind == "u":
+                # u <XY> <sub> <m1> <m2> <m3> <mW> <h1> <h2> <h3> <path>
+                if record[5] != "N":
+                    table.submodules[len(paths)] = record[6:9]
+                codes += (kind + record[2:4]).encode()
+                oid_offsets.append(-1)
+                paths.append(record.split(" ", 10)[10])
+            elif kind == "#":
+                self._parse_header(record)
+
+    def _parse_header(self, record: str) -> None:
+        snapshot = self.snapshot
+        key, _, value = record[2:].partition(" ")
+        if key == "branch.oid":
+            snapshot.oid = None if value == "(initial)" else value
+        elif key == "branch.head":
+            snapshot.branch = None if value == "(detached)" else value
+        elif key == "branch.upstream":
+            snapshot.upstream = value
+        elif key == "branch.ab":
+            ahead, _, behind = value.partition(" ")
+            snapshot.ahead, snapshot.behind = int(ahead), -int(behind)
+
+    def close(self) -> RepoSnapshot:
+        """Finish parsing and return the snapshot."""
+        if self._tail:
+            self.feed(b"\0")
+        return self.snapshot
+
+
+class UntrackedParser:
+    """Incremental parser for a listing of untracked paths.
+
+    The listing is either `ls-files --others -z` output, one path per
+    record, or `status --porcelain=v2 -z` output, of which only the "?"
+    records are kept.
+    """
+
+    def __init__(self, porcelain: bool):
+        self.porcelain = porcelain
+        self._tail = b""
+        # Whether the next record is the source path of a rename
+        self._skip_next = False
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Parse every complete record in a chunk of output, returning the untracked paths."""
+        if self._tail:
+            chunk = self._tail + chunk
+        end = chunk.rfind(b"\0")
+        if end < 0:
+            self._tail = chunk
+            return []
+        self._tail = chunk[end + 1:]
+        records = chunk[:end].decode("utf-8", errors="surrogateescape").split("\0")
+        if not self.porcelain:
+            return records
+
+        paths = []
+        for record in records:
+            if self._skip_next:
+                self._skip_next = False
+            elif record[:2] == "? ":
+                paths.append(record[2:])
+            elif record[:2] == "2 ":
+                self._skip_next = True
+        return paths
+
+    def close(self) -> List[str]:
+        """Parse the last record, if the output did not end with a NUL."""
+        return self.feed(b"\0") if self._tail else []
+
+
+def parse_porcelain_v2(output: bytes) -> RepoSnapshot:
+    """Parse `git status --porcelain=v2 --branch -z` output.
+
+    Args:
+        output: Raw NUL-delimited status output
+
+    Returns:
+        The parsed snapshot
+    """
+    parser = PorcelainV2Parser()
+    parser.feed(output)
+    return parser.close()
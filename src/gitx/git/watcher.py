@@ -0,0 +1,321 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from gitx.git.refs import common_dir
+
+# Change kinds reported to the callback
+WORKTREE = "worktree"
+INDEX = "index"
+REFS = "refs"
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Files directly inside the git dir whose changes we care about
+_GIT_DIR_FILES = {"HEAD": REFS, "packed-refs": REFS, "index": INDEX}
+
+# Worktree paths collected per burst before ignore filtering is skipped
+_MAX_PENDING_PATHS = 2048
+
+
+class Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Read all pending events as (watch descriptor, mask, name) tuples."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class RepoWatcher:
+    """Watch a repository and report coalesced change kinds.
+
+    The work tree (minus ignored directories) and the git dir's HEAD, index,
+    packed-refs and refs/ are watched with inotify. Events are classified as
+    WORKTREE, INDEX or REFS, and a burst of events is debounced into a single
+    callback. Where inotify is unavailable, the git dir files are polled.
+    """
+
+    def __init__(
+        self,
+        git,
+        callback: Callable[[Set[str]], None],
+        debounce: float = 0.3,
+        max_delay: float = 2.0,
+        poll_interval: float = 1.0,
+    ):
+        """Initialize the watcher.
+
+        Args:
+            git: The GitHandler of the repository to watch
+            callback: Called from the watcher thread with the set of change kinds
+            debounce: Quiet period in seconds that ends a burst
+            max_delay: Longest time in seconds a burst is held back
+            poll_interval: Polling interval in seconds when inotify is unavailable
+        """
+        self.git = git
+        self.callback = callback
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        # Set when the inotify watch limit was hit and part of the work tree is unwatched
+        self.worktree_limited = False
+
+        self.work_tree = git.pool.work_tree or git.repo_path
+        self.git_dir = git.pool.git_dir or os.path.join(self.work_tree, ".git")
+        self.common_dir = common_dir(self.git_dir)
+
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, Tuple[str, str]] = {}
+        self._ignored_dirs: Set[str] = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching in a background thread.
+
+        Watches are added by the thread, since walking a large work tree takes
+        a while and the caller should not wait for it.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="gitx-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            if not sys.platform.startswith("linux"):
+                raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+            self._inotify = Inotify()
+            self._add_watches()
+        except (OSError, AttributeError):
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            self._run_polling()
+            return
+        self._run_inotify()
+
+    def stop(self) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _load_ignored_dirs(self) -> None:
+        try:
+            result = self.git.pool.run(
+                "ls-files", "--others", "--ignored", "--exclude-standard", "--directory", "-z"
+            )
+        except subprocess.CalledProcessError:
+            return
+        self._ignored_dirs = {p.rstrip("/") for p in result.stdout.split("\0") if p.endswith("/")}
+
+    def _add_watches(self) -> None:
+        self._watch(self.git_dir, "gitdir", "")
+        if self.common_dir != self.git_dir:
+            self._watch(self.common_dir, "gitdir", "")
+        self._watch_tree(os.path.join(self.common_dir, "refs"), "refs", "refs")
+
+        self._load_ignored_dirs()
+        self._watch_tree(self.work_tree, "worktree", "")
+
+    def _watch(self, path: str, area: str, rel: str) -> bool:
+        try:
+            wd = self._inotify.add_watch(path)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                self.worktree_limited = True
+            return False
+        self._watches[wd] = (area, rel)
+        return True
+
+    def _watch_tree(self, root: str, area: str, rel_root: str) -> None:
+        """Watch a directory and its subdirectories, skipping .git and ignored dirs."""
+        stack = [(root, rel_root)]
+        while stack and not self._stop.is_set():
+            path, rel = stack.pop()
+            if not self._watch(path, area, rel):
+                if self.worktree_limited:
+                    return
+                continue
+            try:
+                entries = list(os.scandir(path))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                child_rel = f"{rel}/{entry.name}" if rel else entry.name
+                if area == "worktree" and (entry.name == ".git" or child_rel in self._ignored_dirs):
+                    continue
+                stack.append((entry.path, child_rel))
+
+    def _classify(self, area: str, rel: str, name: str) -> Optional[str]:
+        if name.endswith(".lock"):
+            return None
+        if area == "gitdir":
+            return _GIT_DIR_FILES.get(name)
+        if area == "refs":
+            return REFS
+        return WORKTREE
+
+    def _run_inotify(self) -> None:
+        kinds: Set[str] = set()
+        paths: Set[str] = set()
+        first_event = last_event = 0.0
+
+        while not self._stop.is_set():
+            timeout = self.debounce if kinds else 0.5
+            try:
+                readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+            except (OSError, ValueError):
+                return
+
+            now = time.monotonic()
+            if readable:
+                for wd, mask, name in self._inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were dropped, assume everything changed
+                        kinds.update((WORKTREE, INDEX, REFS))
+                        paths.clear()
+                        continue
+                    if mask & IN_IGNORED:
+                        self._watches.pop(wd, None)
+                        continue
+                    if wd not in self._watches:
+                        continue
+
+                    area, rel = self._watches[wd]
+                    if not name:
+                        continue
+                    child_rel = f"{rel}/{name}" if rel else name
+
+                    if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and area != "gitdir":
+                        if area == "worktree" and (name == ".git" or self._is_ignored([child_rel + "/"])):
+                            continue
+                        base = self.work_tree if area == "worktree" else self.common_dir
+                        self._watch_tree(os.path.join(base, child_rel), area, child_rel)
+
+                    kind = self._classify(area, rel, name)
+                    if kind is None:
+                        continue
+                    if not kinds:
+                        first_event = now
+                    kinds.add(kind)
+                    last_event = now
+                    if kind == WORKTREE and len(paths) < _MAX_PENDING_PATHS:
+                        paths.add(child_rel)
+
+            if kinds and (now - last_event >= self.debounce or now - first_event >= self.max_delay):
+                self._flush(kinds, paths)
+                kinds, paths = set(), set()
+
+    def _is_ignored(self, paths: Iterable[str]) -> bool:
+        """Whether all of the given work tree paths are ignored."""
+        paths = list(paths)
+        try:
+            result = self.git.pool.run("check-ignore", "--stdin", "-z", input="\0".join(paths) + "\0")
+        except subprocess.CalledProcessError:
+            # Exit status 1 means none of the paths are ignored
+            return False
+        return len([p for p in result.stdout.split("\0") if p]) >= len(paths)
+
+    def _flush(self, kinds: Set[str], paths: Set[str]) -> None:
+        if WORKTREE in kinds and paths and len(paths) < _MAX_PENDING_PATHS and self._is_ignored(paths):
+            kinds.discard(WORKTREE)
+        if kinds:
+            self.callback(kinds)
+
+    def _stat_git_files(self) -> Dict[str, Tuple[int, int, str]]:
+        stats = {}
+        candidates = [
+            (os.path.join(self.git_dir, "HEAD"), REFS),
+            (os.path.join(self.git_dir, "index"), INDEX),
+            (os.path.join(self.common_dir, "packed-refs"), REFS),
+        ]
+        for root, _, files in os.walk(os.path.join(self.common_dir, "refs")):
+            candidates.extend((os.path.join(root, f), REFS) for f in files)
+
+        for path, kind in candidates:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size, kind)
+        return stats
+
+    def _run_polling(self) -> None:
+        previous = self._stat_git_files()
+        while not self._stop.wait(self.poll_interval):
+            current = self._stat_git_files()
+            kinds = set()
+            for path in previous.keys() | current.keys():
+                before, after = previous.get(path), current.get(path)
+                if before != after:
+                    kinds.add((after or before)[2])
+            previous = current
+            if kinds:
+                self.callback(kinds)
@@ -0,0 +1,258 @@
+"""Instrumentation of git commands and panel rendering.
+
+Every git invocation is recorded by GitProcessPool as a CallTiming, tagged
+with the trigger in effect when it was started: the action, panel or other
+cause set with trigger_scope(). Render times are attributed to the panel
+that contains the rendered widget. Both can be exported as plain JSON or in
+the Chrome trace event format, which chrome://tracing and Perfetto load.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# What caused the current git commands, e.g. "action:stage_file > FileTree"
+_trigger: ContextVar[Optional[str]] = ContextVar("gitx_trigger", default=None)
+
+# Clock shared by all records, so calls and renders line up in a trace
+clock = time.perf_counter
+
+
+def current_trigger() -> Optional[str]:
+    """The innermost trigger_scope(), else the widget handling the current message."""
+    trigger = _trigger.get()
+    if trigger is not None:
+        return trigger
+    try:
+        from textual._context import active_message_pump
+        return type(active_message_pump.get()).__name__
+    except (ImportError, LookupError):
+        return None
+
+
+@contextmanager
+def trigger_scope(name: str) -> Iterator[None]:
+    """Attribute the git commands started inside the block to name.
+
+    Scopes nest: a panel refresh started by an action is recorded as
+    "action:refresh > FileTree". Asyncio tasks and Textual workers started
+    in the block inherit the trigger; threads do not unless they are given
+    a copy of the context.
+    """
+    parent = _trigger.get()
+    token = _trigger.set(f"{parent} > {name}" if parent else name)
+    try:
+        yield
+    finally:
+        _trigger.reset(token)
+
+
+class CallTiming:
+    """Timing record for a single git invocation.
+
+    Attributes:
+        args: Arguments passed to git
+        duration: Wall time in seconds
+        returncode: Exit status, or 0/1 for found/missing object reads
+        start: Start time on the trace clock
+        stdout_size: Size of the output, in bytes or characters of decoded text, None if not captured
+        stderr_size: Size of the error output, None if not captured
+        trigger: What caused the call, see trigger_scope()
+        thread: Name of the thread that waited for the call
+        batched: Whether this was a request to a persistent cat-file process rather than a new process
+    """
+
+    __slots__ = (
+        "args", "duration", "returncode", "start", "stdout_size", "stderr_size", "trigger", "thread", "batched"
+    )
+
+    def __init__(
+        self,
+        args: Tuple[str, ...],
+        duration: float,
+        returncode: int,
+        start: Optional[float] = None,
+        stdout_size: Optional[int] = None,
+        stderr_size: Optional[int] = None,
+        batched: bool = False,
+    ):
+        self.args = tuple(args)
+        self.duration = duration
+        self.returncode = returncode
+        self.start = clock() - duration if start is None else start
+        self.stdout_size = stdout_size
+        self.stderr_size = stderr_size
+        self.thread = threading.current_thread().name
+        # Background threads such as the watcher are their own trigger
+        self.trigger = current_trigger() or (self.thread if self.thread != "MainThread" else None)
+        self.batched = batched
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "args": list(self.args),
+            "start": self.start,
+            "duration": self.duration,
+            "returncode": self.returncode,
+            "stdout_size": self.stdout_size,
+            "stderr_size": self.stderr_size,
+            "trigger": self.trigger,
+            "thread": self.thread,
+            "batched": self.batched,
+        }
+
+    def __repr__(self) -> str:
+        return f"CallTiming({' '.join(self.args)!r}, {self.duration * 1000:.1f}ms, rc={self.returncode})"
+
+
+class RenderStats:
+    """Render times of each panel, with a bounded history of single renders."""
+
+    def __init__(self, history: int = 5000):
+        self.records: Deque[Tuple[str, float, float]] = deque(maxlen=history)
+        # Panel name -> [renders, total seconds, slowest render]
+        self.totals: Dict[str, List[float]] = {}
+
+    def add(self, panel: str, start: float, duration: float) -> None:
+        self.records.append((panel, start, duration))
+        totals = self.totals.get(panel)
+        if totals is None:
+            self.totals[panel] = [1, duration, duration]
+        else:
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] = max(totals[2], duration)
+
+    def clear(self) -> None:
+        self.records.clear()
+        self.totals.clear()
+
+
+class RenderTimer:
+    """Times widget rendering and attributes it to the enclosing panel.
+
+    Textual has no render hooks, so install() wraps render_lines on Widget
+    and on the widget classes that override it. Only the outermost call is
+    timed, since overrides call the base implementation.
+    """
+
+    def __init__(self, panel_types: Iterable[type], stats: Optional[RenderStats] = None):
+        self.panel_types = tuple(panel_types)
+        self.stats = stats or RenderStats()
+        self._originals: Dict[type, Any] = {}
+        self._depth = 0
+
+    def _panel_of(self, widget) -> Optional[str]:
+        node = widget
+        while node is not None:
+            if isinstance(node, self.panel_types):
+                return type(node).__name__
+            node = node._parent
+        return None
+
+    def _wrap(self, original):
+        def render_lines(widget, crop):
+            if self._depth:
+                return original(widget, crop)
+            self._depth += 1
+            start = clock()
+            try:
+                return original(widget, crop)
+            finally:
+                self._depth -= 1
+                panel = self._panel_of(widget)
+                if panel is not None:
+                    self.stats.add(panel, start, clock() - start)
+        return render_lines
+
+    def install(self) -> None:
+        from textual.widget import Widget
+        from textual.widgets import Tree
+
+        for cls in (Widget, Tree):
+            if cls not in self._originals and "render_lines" in cls.__dict__:
+                self._originals[cls] = cls.__dict__["render_lines"]
+                cls.render_lines = self._wrap(self._originals[cls])
+
+    def uninstall(self) -> None:
+        for cls, original in self._originals.items():
+            cls.render_lines = original
+        self._originals.clear()
+
+
+def export_json(calls: Iterable[CallTiming], renders: RenderStats) -> Dict[str, Any]:
+    """All records as plain JSON-compatible data."""
+    return {
+        "calls": [call.as_dict() for call in calls],
+        "renders": [
+            {"panel": panel, "start": start, "duration": duration} for panel, start, duration in renders.records
+        ],
+        "render_totals": {
+            panel: {"count": int(count), "total": total, "max": longest}
+            for panel, (count, total, longest) in renders.totals.items()
+        },
+    }
+
+
+def _lanes(intervals: List[Tuple[float, float]]) -> List[int]:
+    """Assign overlapping intervals to separate lanes, first fit in start order."""
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    ends: List[float] = []
+    lanes = [0] * len(intervals)
+    for i in order:
+        start, end = intervals[i]
+        for lane, lane_end in enumerate(ends):
+            if lane_end <= start:
+                break
+        else:
+            lane = len(ends)
+            ends.append(end)
+        ends[lane] = end
+        lanes[i] = lane
+    return lanes
+
+
+def export_chrome_trace(calls: Iterable[CallTiming], renders: RenderStats) -> Dict[str, Any]:
+    """All records in the Chrome trace event format.
+
+    Git calls that overlap (concurrent workers) are spread over as many
+    "git" tracks as needed; renders get one track per panel.
+    """
+    pid = os.getpid()
+    calls = list(calls)
+    events: List[Dict[str, Any]] = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "gitx"}},
+    ]
+
+    lanes = _lanes([(call.start, call.start + call.duration) for call in calls])
+    for call, lane in zip(calls, lanes):
+        events.append({
+            "name": " ".join(call.args[:2]),
+            "cat": "cat-file" if call.batched else "git",
+            "ph": "X",
+            "ts": call.start * 1e6,
+            "dur": call.duration * 1e6,
+            "pid": pid,
+            "tid": lane + 1,
+            "args": call.as_dict(),
+        })
+    for lane in range(max(lanes, default=-1) + 1):
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lane + 1, "args": {"name": f"git {lane + 1}"}})
+
+    panels = {panel: 1000 + i for i, panel in enumerate(sorted(renders.totals))}
+    for panel, tid in panels.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"render {panel}"}})
+    for panel, start, duration in renders.records:
+        events.append({
+            "name": f"render {panel}",
+            "cat": "render",
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": panels[panel],
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
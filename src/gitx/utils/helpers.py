@@ -0,0 +1,21 @@
+import os
+import sys
+
+
+def user_cache_dir(app_name: str = "gitx") -> str:
+    """Return the per-user cache directory for the app.
+
+    GITX_CACHE_DIR overrides the platform default (XDG_CACHE_HOME or
+    ~/.cache on Linux, ~/Library/Caches on macOS, LOCALAPPDATA on Windows).
+    """
+    override = os.environ.get("GITX_CACHE_DIR")
+    if override:
+        return override
+
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, app_name)
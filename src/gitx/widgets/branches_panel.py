@@ -1,69 +1,246 @@
-from textual.widgets import Static, Tree
+from typing import Dict, Optional, Set, Tuple
+
+from textual import work
+from textual.binding import Binding
+from textual.widgets import Input, Static, Tree
+from textual.widgets.tree import TreeNode
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.widgets import Label
 from rich.text import Text
 
+from gitx.git.branches import Branch, BranchIndex
+from gitx.git.snapshot import RepoSnapshot
+
+# Most branches listed for a filter
+FILTER_LIMIT = 200
+
+# Key of the top level group of local branches; remote names are never empty
+LOCAL_GROUP = ""
+
+
+class BranchGroup:
+    """A group of branches sharing a remote or a "/" prefix."""
+
+    __slots__ = ("path", "children", "branch", "count")
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.children: Dict[str, "BranchGroup"] = {}
+        # The branch ending at this node; a group can also have one, e.g. "a" next to "a/b"
+        self.branch: Optional[Branch] = None
+        # Number of branches below this group
+        self.count = 0
+
+
+def group_branches(index: BranchIndex) -> BranchGroup:
+    """Arrange branches in a trie: Local and one group per remote, then by "/" prefix."""
+    root = BranchGroup(())
+    for branch in index:
+        if branch.is_remote:
+            parts = [branch.remote] + branch.name[len(branch.remote) + 1:].split("/")
+        else:
+            parts = [LOCAL_GROUP] + branch.name.split("/")
+        node = root
+        node.count += 1
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = BranchGroup(node.path + (part,))
+            node = child
+            node.count += 1
+        node.branch = branch
+    return root
+
 
 class BranchesPanel(Static):
-    """Panel that displays and manages branches."""
+    """Panel that displays and manages branches.
+
+    Branches are grouped by remote and by "/" prefix, and a group's nodes
+    are only created when it is expanded. Press / to filter branches by
+    name.
+    """
+
+    BINDINGS = [
+        Binding("slash", "filter", "Filter branches", show=False),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index = BranchIndex()
+        self._groups = BranchGroup(())
+        # Paths of the groups the user expanded, kept across refreshes
+        self._expanded: Set[Tuple[str, ...]] = {(LOCAL_GROUP,)}
 
     def compose(self) -> ComposeResult:
         """Compose the branches panel."""
         yield Vertical(
-            Label("[bold]3-Local branches[/bold]", classes="section-title"),
+            Label("[bold]3-Branches[/bold]", classes="section-title"),
+            Input(placeholder="Filter branches...", id="branch-filter"),
             Tree("Branches", id="branches-tree"),
             classes="panel"
         )
 
     def on_mount(self) -> None:
-        """Set up the tree when mounted."""
-        self.refresh_branches()
+        self.query_one("#branch-filter", Input).display = False
+        self.query_one(Tree).root.add_leaf(Text("loading…", style="dim"))
 
     def refresh_branches(self) -> None:
         """Refresh the branches tree with current repository branches."""
+        self.app.refresh_repository([BranchesPanel])
+
+    def update_snapshot(self, snapshot: RepoSnapshot) -> None:
+        """Reload the branches, taking the current branch from a snapshot.
+
+        Args:
+            snapshot: The snapshot to render
+        """
+        self.load()
+
+    def load(self) -> None:
+        """Reload the branches; the index has its own record of the current branch."""
+        self._load_branches()
+
+    @work(exclusive=True, group="branches-panel")
+    async def _load_branches(self) -> None:
+        """Load the branches in a worker, cancelling any previous load."""
         tree = self.query_one(Tree)
-        tree.clear()
 
         try:
-            # Get actual branches from git
-            branches = self.app.git.get_branches()
-            current_branch = self.app.git.get_current_branch()
-
-            if not branches:
-                tree.root.add_leaf("No branches found")
-                return
-
-            # Add branches to tree with proper styling
-            for branch_info in branches:
-                branch = branch_info["name"]
-                node = tree.root.add_leaf(branch)
-                node.data = {"branch": branch}
-
-                if branch == current_branch:
-                    # Current branch in green with check mark
-                    node.label.stylize("green bold")
-                    node.label = Text("✓ ") + node.label
-
-            # Get remote branches
-            remote_branches = []
-            for branch_info in branches:
-                if branch_info.get("remote"):
-                    remote_branches.append(branch_info["remote"])
-
-            # Add any remote branches that don't have a local counterpart
-            if remote_branches:
-                for remote_branch in remote_branches:
-                    if "/" in remote_branch:  # Make sure it's a valid remote branch
-                        node = tree.root.add_leaf(remote_branch)
-                        node.data = {"branch": remote_branch}
-                        node.label.stylize("blue")
-
-            # Expand the tree by default
-            tree.root.expand()
+            # Every branch with its upstream and tracking state, from one git call
+            index = await self.app.git_async.get_branch_index()
+            if index is not self.index:
+                # The same index comes back while the refs are unchanged
+                self.show_index(index)
         except Exception as e:
+            self.index = BranchIndex()
+            tree.clear()
             tree.root.add_leaf(f"Error: {str(e)}")
 
+    def show_index(self, index: BranchIndex) -> None:
+        """Show a branch index, e.g. the one restored from the last session."""
+        self.index = index
+        self._groups = group_branches(index)
+        if index.head is not None:
+            # Show the current branch
+            parts = (LOCAL_GROUP,) + tuple(index.head.name.split("/"))
+            self._expanded.update(parts[:i] for i in range(1, len(parts)))
+
+        filter_text = self.query_one("#branch-filter", Input).value
+        if filter_text:
+            self._show_matches(filter_text)
+        else:
+            self._show_groups()
+
+    def _branch_label(self, branch: Branch, full_name: bool = False) -> Text:
+        """Label a branch by its last name component, or its full name in filter results."""
+        label = Text(branch.name if full_name else branch.name.rsplit("/", 1)[-1])
+        if branch.is_remote:
+            label.stylize("blue")
+        if branch.is_head:
+            # Current branch in green with check mark
+            label.stylize("green bold")
+            label = Text("✓ ") + label
+        if branch.gone:
+            label.append(" (gone)", style="red dim")
+        elif branch.ahead or branch.behind:
+            label.append(f" ↑{branch.ahead} ↓{branch.behind}", style="yellow")
+        return label
+
+    def _add_children(self, parent: TreeNode, group: BranchGroup) -> None:
+        """Create the nodes of one group level."""
+        if group.branch is not None and group.children:
+            # A branch named like a group, shown first inside it
+            self._add_branch(parent, group.branch)
+        for name, child in group.children.items():
+            if child.branch is not None and not child.children:
+                self._add_branch(parent, child.branch)
+            else:
+                # Top level groups are Local and remote names, deeper ones are prefixes
+                if len(child.path) > 1:
+                    title = name + "/"
+                else:
+                    title = name if name != LOCAL_GROUP else "Local"
+                label = Text.assemble((title, "bold"), (f" ({child.count})", "dim"))
+                node = parent.add(label, data={"group": child, "loaded": False})
+                if child.path in self._expanded:
+                    node.expand()
+                    self._load_group(node)
+
+    def _add_branch(self, parent: TreeNode, branch: Branch) -> None:
+        node = parent.add_leaf(self._branch_label(branch))
+        node.data = {"branch": branch.name}
+
+    def _load_group(self, node: TreeNode) -> None:
+        if node.data and "group" in node.data and not node.data["loaded"]:
+            node.data["loaded"] = True
+            self._add_children(node, node.data["group"])
+
+    def _show_groups(self) -> None:
+        """Show the grouped tree, creating nodes for expanded groups only."""
+        tree = self.query_one(Tree)
+        tree.clear()
+        if not self.index.local and not self.index.remote:
+            tree.root.add_leaf("No branches found")
+            return
+        self._add_children(tree.root, self._groups)
+        tree.root.expand()
+
+    def _show_matches(self, text: str) -> None:
+        """Show the branches matching a filter as a flat list."""
+        tree = self.query_one(Tree)
+        tree.clear()
+        matches = self.index.search(text, limit=FILTER_LIMIT + 1)
+        for branch in matches[:FILTER_LIMIT]:
+            node = tree.root.add_leaf(self._branch_label(branch, full_name=True))
+            node.data = {"branch": branch.name}
+        if not matches:
+            tree.root.add_leaf(Text("No matching branches", style="dim"))
+        elif len(matches) > FILTER_LIMIT:
+            tree.root.add_leaf(Text(f"… more than {FILTER_LIMIT} matches, keep typing", style="dim"))
+        tree.root.expand()
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Create the nodes of a group when it is first expanded."""
+        node = event.node
+        if node.data and "group" in node.data:
+            self._expanded.add(node.data["group"].path)
+            self._load_group(node)
+
+    def on_tree_node_collapsed(self, event: Tree.NodeCollapsed) -> None:
+        node = event.node
+        if node.data and "group" in node.data:
+            self._expanded.discard(node.data["group"].path)
+
+    def action_filter(self) -> None:
+        """Show and focus the filter input."""
+        branch_filter = self.query_one("#branch-filter", Input)
+        branch_filter.display = True
+        branch_filter.focus()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Filter the branches as the user types."""
+        if event.input.id != "branch-filter":
+            return
+        if event.value:
+            self._show_matches(event.value)
+        else:
+            self._show_groups()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Move to the matches."""
+        if event.input.id == "branch-filter":
+            self.query_one(Tree).focus()
+
+    def on_key(self, event) -> None:
+        """Clear and hide the filter on escape."""
+        branch_filter = self.query_one("#branch-filter", Input)
+        if event.key == "escape" and branch_filter.display:
+            branch_filter.value = ""
+            branch_filter.display = False
+            self.query_one(Tree).focus()
+            event.stop()
+
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         """Handle tree node selection."""
         node = event.node
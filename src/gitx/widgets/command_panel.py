@@ -1,12 +1,45 @@
-from textual.widgets import Static, Input, Button
+import asyncio
+import subprocess
+import time
+from typing import List, Optional, Tuple
+
+from textual import work
+from textual.binding import Binding
+from textual.widgets import Static, Input, Button, RichLog
 from textual.app import ComposeResult
 from textual.containers import Vertical, Horizontal
+from textual.timer import Timer
 from textual.widgets import Label
+from textual.worker import Worker
 from rich.text import Text
 
+from gitx.config import GitxConfig
+
+# Lines kept in the command log, unless set with gitx.commandLogLines
+LOG_LINES = 1000
+
+# Seconds between writes of streamed command output to the log
+FLUSH_INTERVAL = 0.05
+
 
 class CommandPanel(Static):
-    """Panel for executing custom Git commands."""
+    """Panel for executing custom Git commands.
+
+    Command output is streamed into a log that keeps the last lines only.
+    The log also shows background jobs such as push and pull, with a
+    single line below it for progress meters that redraw in place.
+    """
+
+    BINDINGS = [
+        Binding("escape", "cancel_command", "Cancel command", show=False),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._command: Optional[Worker] = None
+        # Output lines waiting to be written, with whether they came from stderr
+        self._pending: List[Tuple[str, bool]] = []
+        self._flush_timer: Optional[Timer] = None
 
     def compose(self) -> ComposeResult:
         """Compose the command panel."""
@@ -17,44 +50,138 @@ class CommandPanel(Static):
                 Button("Run", id="run-command-btn", variant="primary"),
                 id="command-row"
             ),
-            Static("You can hide/focus this panel by pressing '@'", id="command-output"),
+            RichLog(id="command-output", max_lines=LOG_LINES, wrap=True),
+            Static("", id="command-progress"),
             id="command-panel",
             classes="panel"
         )
 
+    def on_mount(self) -> None:
+        self.write(Text("You can hide/focus this panel by pressing '@'"))
+        self.query_one("#command-progress", Static).display = False
+
+    def apply_config(self, config: GitxConfig) -> None:
+        """Apply the settings of the repository once it is open."""
+        log = self.query_one("#command-output", RichLog)
+        log.max_lines = max(1, config.get_int("commandLogLines", LOG_LINES))
+
+    @property
+    def running(self) -> bool:
+        """Whether a command from the input is running."""
+        return self._command is not None and self._command.is_running
+
+    def write(self, text: Text) -> None:
+        """Append text to the log."""
+        self.query_one("#command-output", RichLog).write(text)
+
+    def begin_job(self, command: str) -> None:
+        """Log the start of a job."""
+        self.write(Text(f"$ {command}", style="yellow"))
+
+    def show_progress(self, line: str, transient: bool) -> None:
+        """Show a line of job output, redrawing the progress line if it is transient."""
+        progress = self.query_one("#command-progress", Static)
+        if transient:
+            progress.update(Text(line))
+            progress.display = True
+        else:
+            progress.display = False
+            self.write(Text(line))
+
+    def end_job(self, success: bool, message: str) -> None:
+        """Log the outcome of a job and clear its progress line."""
+        self.query_one("#command-progress", Static).display = False
+        self.write(Text(message, style="green" if success else "red"))
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle button press event."""
         if event.button.id == "run-command-btn":
-            command_input = self.query_one("#command-input", Input)
-            command = command_input.value
-
-            if command.strip():
-                output = self.query_one("#command-output", Static)
-                output_text = Text(f"$ git {command}\n")
-                output_text.stylize("yellow")
-
-                # Execute the actual git command
-                success, result = self.app.git.execute_command(command)
-
-                # Format the response based on success/failure
-                response = Text(result + "\n" if result else "Command executed successfully.\n")
-                if success:
-                    response.stylize("green")
-                else:
-                    response.stylize("red")
-
-                output.update(output_text + response)
-
-                # Clear the input field after execution
-                command_input.value = ""
-
-                # Focus back on input for next command
-                self.app.set_focus(command_input)
-
-                # Notify user about command execution
-                if success:
-                    self.app.notify(f"Executed: git {command}")
-                else:
-                    self.app.notify(f"Error executing: git {command}", severity="error")
-            else:
-                self.app.notify("Please enter a command", severity="warning")
+            self.run_input()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Run the command when Enter is pressed in the input."""
+        if event.input.id == "command-input":
+            self.run_input()
+
+    def run_input(self) -> None:
+        """Start the command typed in the input."""
+        command_input = self.query_one("#command-input", Input)
+        command = command_input.value
+
+        if not command.strip():
+            self.app.notify("Please enter a command", severity="warning")
+            return
+        if self.running:
+            self.app.notify("A command is already running, press Esc to cancel it", severity="warning")
+            return
+        if self.app.git_async is None:
+            self.app.notify("The repository is still loading", severity="warning")
+            return
+
+        from gitx.git.handler import parse_command
+
+        try:
+            args = parse_command(command)
+        except ValueError as e:
+            self.app.notify(f"Cannot parse command: {e}", severity="error")
+            return
+
+        # Clear the input field and keep focus on it for the next command
+        command_input.value = ""
+        self.app.set_focus(command_input)
+        self._command = self._run_command(args)
+
+    def action_cancel_command(self) -> None:
+        """Cancel the running command."""
+        if self.running:
+            self._command.cancel()
+
+    @work(group="command")
+    async def _run_command(self, args: List[str]) -> None:
+        """Run a command, streaming its output into the log."""
+        command = " ".join(["git", *args])
+        self.begin_job(f"{command} (Esc to cancel)")
+        self._flush_timer = self.set_interval(FLUSH_INTERVAL, self._flush)
+        start = time.monotonic()
+        try:
+            code = await self.app.git_async.run_command(args, lambda line, stderr: self._pending.append((line, stderr)))
+        except asyncio.CancelledError:
+            self._finish_command(False, f"Cancelled after {time.monotonic() - start:.2f}s")
+            raise
+        except (OSError, subprocess.SubprocessError) as e:
+            self._finish_command(False, f"Failed to run: {e}")
+            self.app.notify(f"Error executing: {command}", severity="error")
+            return
+
+        elapsed = time.monotonic() - start
+        self._finish_command(code == 0, f"Exit code {code} in {elapsed:.2f}s")
+        # Notify user about command execution
+        if code == 0:
+            self.app.notify(f"Executed: {command}")
+        else:
+            self.app.notify(f"Error executing: {command}", severity="error")
+
+    def _finish_command(self, success: bool, message: str) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.stop()
+            self._flush_timer = None
+        self._flush()
+        self.end_job(success, message)
+
+    def _flush(self) -> None:
+        """Write the pending output, skipping lines the log could not keep anyway."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        log = self.query_one("#command-output", RichLog)
+        if log.max_lines is not None and len(pending) > log.max_lines:
+            skipped = len(pending) - log.max_lines + 1
+            pending = pending[skipped:]
+            self.write(Text(f"… {skipped} lines skipped", style="dim"))
+
+        text = Text()
+        for i, (line, stderr) in enumerate(pending):
+            if i:
+                text.append("\n")
+            text.append(line, style="red" if stderr else None)
+        self.write(text)
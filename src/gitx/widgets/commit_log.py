@@ -1,7 +1,307 @@
-from textual.widgets import Static, RichLog
+from typing import Dict, List, Optional, Set
+
+from rich.segment import Segment
+from rich.style import Style
+from textual import events, work
 from textual.app import ComposeResult
+from textual.binding import Binding
 from textual.containers import Vertical
-from textual.widgets import Label
+from textual.geometry import Size
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Label, Static
+
+from gitx.git.history import CommitRecord
+from gitx.git.snapshot import RepoSnapshot
+
+
+class CommitList(ScrollView, can_focus=True):
+    """Virtualized commit list.
+
+    The log is loaded in pages of PAGE_SIZE commits as rows scroll into view,
+    and only the pages around the visible window are kept. Rows are rendered
+    straight from CommitRecord objects, one line per commit.
+    """
+
+    COMPONENT_CLASSES = {"commit-list--cursor"}
+
+    BINDINGS = [
+        Binding("up", "cursor_up", "Previous commit", show=False),
+        Binding("down", "cursor_down", "Next commit", show=False),
+        Binding("pageup", "page_up", "Page up", show=False),
+        Binding("pagedown", "page_down", "Page down", show=False),
+        Binding("home", "first", "First commit", show=False),
+        Binding("end", "last", "Last commit", show=False),
+        Binding("enter", "select", "Show commit", show=False),
+    ]
+
+    # Commits per `git log` call
+    PAGE_SIZE = 200
+    # Pages kept loaded on each side of the visible window
+    PREFETCH_PAGES = 1
+
+    cursor = reactive(0)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current_branch = "HEAD"
+        self._pages: Dict[int, List[CommitRecord]] = {}
+        self._loading: Set[int] = set()
+        # Number of commits in the log, once known
+        self._total: Optional[int] = None
+        # Bumped on every reset so results of stale loads are dropped
+        self._generation = 0
+        # Whether the commits of the current generation are being counted
+        self._counting = False
+
+    @property
+    def row_count(self) -> int:
+        """Rows the list currently spans; grows as pages load until the total is known."""
+        if self._total is not None:
+            return self._total
+        loaded = max((page * self.PAGE_SIZE + len(rows) for page, rows in self._pages.items()), default=0)
+        return max(loaded, (max(self._pages, default=0) + 1) * self.PAGE_SIZE, self.cursor + 1)
+
+    def reset(self, current_branch: Optional[str] = None) -> None:
+        """Drop all loaded pages and reload the log, keeping the scroll position.
+
+        Args:
+            current_branch: Branch name shown next to the first commit, None to keep the current one
+        """
+        if current_branch is not None:
+            self.current_branch = current_branch
+        self._generation += 1
+        self.workers.cancel_group(self, "commit-log-pages")
+        self._pages.clear()
+        self._loading.clear()
+        self._total = None
+        self._counting = False
+        self._update_virtual_size()
+        self.refresh_window()
+
+    def restore(self, records: List[CommitRecord], total: Optional[int], current_branch: str) -> None:
+        """Show commits saved by the last session at the top of the log, without loading anything.
+
+        Args:
+            records: The first page of the log
+            total: Number of commits in the log, if known
+            current_branch: Branch name shown next to the first commit
+        """
+        self.current_branch = current_branch
+        self._generation += 1
+        self.workers.cancel_group(self, "commit-log-pages")
+        self._pages = {0: records} if records else {}
+        self._loading.clear()
+        self._total = total
+        self._counting = False
+        self._update_virtual_size()
+        self.refresh()
+
+    @property
+    def first_page(self) -> List[CommitRecord]:
+        """The loaded commits at the top of the log, empty if that page is not loaded."""
+        return self._pages.get(0, [])
+
+    @property
+    def total(self) -> Optional[int]:
+        """Number of commits in the log, once known."""
+        return self._total
+
+    def get_record(self, row: int) -> Optional[CommitRecord]:
+        """The commit at a row, or None if it is not loaded."""
+        rows = self._pages.get(row // self.PAGE_SIZE)
+        if rows is None:
+            return None
+        index = row % self.PAGE_SIZE
+        return rows[index] if index < len(rows) else None
+
+    def jump_to_offset(self, offset: int) -> None:
+        """Move the cursor to the commit at an offset from the tip, loading only its page.
+
+        Args:
+            offset: Zero-based position of the commit in the log
+        """
+        offset = max(offset, 0)
+        if self._total is not None:
+            offset = min(offset, max(self._total - 1, 0))
+        self.cursor = offset
+        self._update_virtual_size()
+        self.scroll_to(y=max(offset - self.size.height // 2, 0), animate=False, immediate=True)
+        self.refresh_window()
+
+    @work(exclusive=True, group="commit-log-jump")
+    async def jump_to_commit(self, commit: str) -> None:
+        """Move the cursor to a commit given by hash or any revision naming it.
+
+        Args:
+            commit: The commit to find
+        """
+        offset = await self.app.git_async.find_commit_offset(commit)
+        if offset is None:
+            self.app.notify(f"Commit not found on {self.current_branch}: {commit}", severity="warning")
+            return
+        self.jump_to_offset(offset)
+
+    def _update_virtual_size(self) -> None:
+        self.virtual_size = Size(self.size.width, self.row_count)
+
+    def refresh_window(self) -> None:
+        """Load the pages around the visible window and evict the rest."""
+        if not self.is_mounted or not self._generation or self.app.git_async is None:
+            # Nothing is loaded before the first reset() or while the repository
+            # is opening; until then every row shows as loading or restored
+            return
+        first = int(self.scroll_offset.y) // self.PAGE_SIZE - self.PREFETCH_PAGES
+        last = (int(self.scroll_offset.y) + self.size.height) // self.PAGE_SIZE + self.PREFETCH_PAGES
+        first = max(first, 0)
+        if self._total is not None:
+            last = min(last, max(self._total - 1, 0) // self.PAGE_SIZE)
+
+        for page in list(self._pages):
+            if page < first or page > last:
+                del self._pages[page]
+        visible = range(
+            int(self.scroll_offset.y) // self.PAGE_SIZE,
+            min(last, (int(self.scroll_offset.y) + self.size.height) // self.PAGE_SIZE) + 1,
+        )
+        if any(page not in self._pages for page in visible):
+            # Prefetch once the visible pages are in, so they don't compete with them
+            first, last = visible.start, visible.stop - 1
+        for page in range(first, last + 1):
+            if page not in self._pages and page not in self._loading:
+                self._loading.add(page)
+                self._load_page(self._generation, page)
+
+    @work(group="commit-log-pages")
+    async def _load_page(self, generation: int, page: int) -> None:
+        try:
+            rows = await self.app.git_async.get_commit_page(page * self.PAGE_SIZE, self.PAGE_SIZE)
+        except Exception as e:
+            if generation == self._generation:
+                self._loading.discard(page)
+                self.app.notify(f"Error loading commit history: {e}", severity="error")
+            return
+        if generation != self._generation:
+            return
+
+        self._loading.discard(page)
+        self._pages[page] = rows
+        if len(rows) < self.PAGE_SIZE and (rows or page == 0):
+            # A short page is the end of the log
+            self._total = page * self.PAGE_SIZE + len(rows)
+        elif self._total is None and not self._counting:
+            # Counting walks the whole history, so it waits for the first page
+            self._counting = True
+            self._count_commits(generation)
+        if not rows and self._total is None:
+            # Jumped past the end; the count will settle the size
+            return
+        if self._total is not None and self.cursor >= self._total:
+            self.cursor = max(self._total - 1, 0)
+        self._update_virtual_size()
+        self.refresh_window()
+        self.refresh()
+
+    @work(exclusive=True, group="commit-log-count")
+    async def _count_commits(self, generation: int) -> None:
+        total = await self.app.git_async.count_commits()
+        if generation != self._generation:
+            return
+        self._total = total
+        if self.cursor >= total:
+            self.cursor = max(total - 1, 0)
+        self._update_virtual_size()
+        self.refresh_window()
+        self.refresh()
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self.refresh_window()
+
+    def watch_cursor(self, old_value: int, new_value: int) -> None:
+        self.refresh()
+
+    def on_resize(self, event: events.Resize) -> None:
+        self._update_virtual_size()
+        self.refresh_window()
+
+    def render_line(self, y: int) -> Strip:
+        """Render one commit row."""
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.size.width
+        if row >= self.row_count:
+            return Strip.blank(width, self.rich_style)
+
+        if self._total == 0:
+            segments = [Segment("No commits found in this repository.", Style(color="yellow"))] if row == 0 else []
+            return Strip(segments).crop_extend(scroll_x, scroll_x + width, self.rich_style)
+
+        record = self.get_record(row)
+        if record is None:
+            segments = [Segment("  loading…", Style(dim=True))]
+        else:
+            segments = [
+                Segment("✱ ", Style(color="green")),
+                Segment(record.short_hash, Style(color="yellow")),
+            ]
+            if row == 0:
+                segments.append(Segment(f" (HEAD → {self.current_branch})", Style(color="red")))
+            segments += [
+                Segment(" "),
+                Segment(record.subject),
+                Segment(f"  {record.author_name}", Style(color="blue")),
+                Segment(f", {record.date}", Style(dim=True)),
+            ]
+
+        base = self.rich_style
+        if row == self.cursor and self.has_focus:
+            base = self.get_component_rich_style("commit-list--cursor")
+        segments = [Segment(text, base + style if style else base) for text, style, _ in segments]
+        return Strip(segments).crop_extend(scroll_x, scroll_x + width, base)
+
+    def _move_cursor(self, row: int) -> None:
+        row = max(0, min(row, self.row_count - 1))
+        self.cursor = row
+        if row < self.scroll_offset.y:
+            self.scroll_to(y=row, animate=False)
+        elif row >= self.scroll_offset.y + self.size.height:
+            self.scroll_to(y=row - self.size.height + 1, animate=False)
+
+    def action_cursor_up(self) -> None:
+        self._move_cursor(self.cursor - 1)
+
+    def action_cursor_down(self) -> None:
+        self._move_cursor(self.cursor + 1)
+
+    def action_page_up(self) -> None:
+        self._move_cursor(self.cursor - self.size.height)
+
+    def action_page_down(self) -> None:
+        self._move_cursor(self.cursor + self.size.height)
+
+    def action_first(self) -> None:
+        self.jump_to_offset(0)
+
+    def action_last(self) -> None:
+        self.jump_to_offset(self.row_count - 1)
+
+    def action_select(self) -> None:
+        self._show_details(self.cursor)
+
+    def on_click(self, event: events.Click) -> None:
+        """Select the commit under the mouse and show its details."""
+        row = int(self.scroll_offset.y) + event.y
+        if row >= self.row_count:
+            return
+        self.cursor = row
+        self._show_details(row)
+
+    def _show_details(self, row: int) -> None:
+        record = self.get_record(row)
+        if record is not None:
+            self.app.query_one("MainPanel").show_commit_details(record.hash)
 
 
 class CommitLog(Static):
@@ -11,86 +311,63 @@ class CommitLog(Static):
         """Compose the commit log."""
         yield Vertical(
             Label("[bold]2-Log[/bold]", classes="section-title"),
-            RichLog(id="commit-log", wrap=False, highlight=True, markup=True),
+            CommitList(id="commit-log"),
             id="commit-log-panel",
             classes="panel"
         )
 
-    def on_mount(self) -> None:
-        """Set up the commit log when mounted."""
-        self.refresh_log()
+    def refresh_log(self) -> None:
+        """Reload the commit log from the tip of the current branch."""
+        self.app.refresh_repository([CommitLog])
 
-    def refresh_log(self, count: int = 20) -> None:
-        """Refresh the commit log with the latest commits.
+    def update_snapshot(self, snapshot: RepoSnapshot) -> None:
+        """Reload the log, taking the current branch from a snapshot.
 
         Args:
-            count: Number of commits to show
+            snapshot: The snapshot to render
         """
-        log = self.query_one(RichLog)
-        log.clear()
+        self.query_one(CommitList).reset(snapshot.current_branch)
 
-        try:
-            # Get actual commit history from git
-            commits = self.app.git.get_commit_history(count)
-
-            if not commits:
-                log.write("[yellow]No commits found in this repository.[/yellow]")
-                return
-
-            # Get current branch for reference
-            current_branch = self.app.git.get_current_branch()
-
-            # Format and display the commits
-            for i, commit in enumerate(commits):
-                # Show branch indicator for the first commit
-                branch_indicator = ""
-                if i == 0:
-                    branch_indicator = f"([red]HEAD → {current_branch}[/red])"
-
-                # Display commit in a format similar to git log
-                log.write(f"[green]✱[/green] [yellow]commit[/yellow] [green]{commit['hash']}[/green] {branch_indicator}")
-                log.write(f"│ [blue]Author:[/blue] {commit['author']}")
-                log.write(f"│ [blue]Date:[/blue]   {commit['date']}")
-                log.write("│ ")
-
-                # Format commit message with proper indentation
-                for line in commit['message'].split("\n"):
-                    log.write(f"│     {line}")
-
-                log.write("│")
-        except Exception as e:
-            log.write(f"[red]Error loading commit history: {str(e)}[/red]")
+    def load(self, current_branch: Optional[str] = None) -> None:
+        """Load the log from HEAD without waiting for a snapshot.
 
-    def on_click(self, event) -> None:
-        """Handle click events to select commits."""
-        # Find which line was clicked
-        log = self.query_one(RichLog)
+        Args:
+            current_branch: Branch name shown next to the first commit, None to
+                keep the current label until show_branch() is called
+        """
+        self.query_one(CommitList).reset(current_branch)
 
-        try:
-            # Get the line that was clicked
-            line_index = log.get_line_at(event.y)
-            if line_index is None:
-                return
-
-            line = log.get_content_at(line_index)
-
-            # Check if this is a commit line (starts with ✱ commit)
-            if "[green]✱[/green] [yellow]commit[/yellow]" in line:
-                # Extract the commit hash
-                parts = line.split()
-                for i, part in enumerate(parts):
-                    if "[green]" in part and len(part) > 15:  # Likely the hash
-                        # Extract just the hash, removing formatting
-                        commit_hash = part.replace("[green]", "").replace("[/green]", "")
-
-                        # Show commit details in the main panel
-                        main_panel = self.app.query_one('MainPanel')
-                        main_panel.show_commit_details(commit_hash)
-                        break
-        except Exception:
-            # Silently ignore any errors in click handling
-            pass
-
-    def update_log(self, count: int = 20) -> None:
-        """Update the commit log with real commit data."""
-        self.refresh_log(count)
+    def restore(self, records: List[CommitRecord], total: Optional[int], current_branch: str) -> None:
+        """Show the top of the log saved by the last session; see CommitList.restore()."""
+        self.query_one(CommitList).restore(records, total, current_branch)
+
+    def keep_restored(self) -> None:
+        """Keep the restored log once it is known to be current, loading further pages as needed."""
+        self.query_one(CommitList).refresh_window()
+
+    def show_branch(self, branch: str) -> None:
+        """Update the branch label next to the first commit without reloading the log."""
+        commit_list = self.query_one(CommitList)
+        if commit_list.current_branch != branch:
+            commit_list.current_branch = branch
+            commit_list.refresh()
+
+    def jump_to_commit(self, commit: str) -> None:
+        """Scroll the log to a commit given by hash or revision.
+
+        Args:
+            commit: The commit to find
+        """
+        commit_list = self.query_one(CommitList)
+        commit_list.focus()
+        commit_list.jump_to_commit(commit)
+
+    def jump_to_offset(self, offset: int) -> None:
+        """Scroll the log to the commit at an offset from the tip.
+
+        Args:
+            offset: Zero-based position of the commit in the log
+        """
+        commit_list = self.query_one(CommitList)
+        commit_list.focus()
+        commit_list.jump_to_offset(offset)
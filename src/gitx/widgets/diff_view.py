@@ -0,0 +1,124 @@
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+from rich.segment import Segment
+from rich.style import Style
+from textual import events
+from textual.binding import Binding
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
+
+from gitx.git.diff import DiffBuffer
+
+# Widest line the view scrolls to; longer lines are cut off
+MAX_LINE_WIDTH = 4096
+
+_ADDED = Style(color="green")
+_REMOVED = Style(color="red")
+_HUNK = Style(color="cyan")
+_HEADER = Style(color="green")
+
+
+def _line_style(line: str) -> Optional[Style]:
+    """Color a diff line the way the main panel always has."""
+    if line.startswith("+") and not line.startswith("+++"):
+        return _ADDED
+    if line.startswith("-") and not line.startswith("---"):
+        return _REMOVED
+    if line.startswith("@@"):
+        return _HUNK
+    if line.startswith(("diff", "index", "---", "+++")):
+        return _HEADER
+    return None
+
+
+class DiffView(ScrollView, can_focus=True):
+    """Scrollable view of a DiffBuffer that only reads the lines on screen.
+
+    The buffer may still be filling while it is shown; the view grows as
+    lines arrive.
+    """
+
+    BINDINGS = [
+        Binding("]", "next_hunk", "Next hunk", show=False),
+        Binding("[", "previous_hunk", "Previous hunk", show=False),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer: Optional[DiffBuffer] = None
+        self._timer: Optional[Timer] = None
+
+    def show_buffer(self, buffer: DiffBuffer) -> None:
+        """Show a buffer, following it while it is being filled.
+
+        The previous buffer is closed.
+        """
+        self.clear()
+        self.buffer = buffer
+        self.scroll_to(0, 0, animate=False, immediate=True)
+        self._sync_size()
+        if not buffer.complete:
+            self._timer = self.set_interval(0.1, self._sync_size)
+
+    def clear(self) -> None:
+        """Drop the current buffer."""
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        self.virtual_size = Size(0, 0)
+        self.refresh()
+
+    def _sync_size(self) -> None:
+        buffer = self.buffer
+        if buffer is None:
+            return
+        size = Size(min(buffer.width, MAX_LINE_WIDTH), buffer.line_count)
+        if size != self.virtual_size:
+            self.virtual_size = size
+            self.refresh()
+        if buffer.complete and self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+    def on_unmount(self, event: events.Unmount) -> None:
+        self.clear()
+
+    def render_line(self, y: int) -> Strip:
+        """Render one diff line, read from the buffer on demand."""
+        scroll_x, scroll_y = self.scroll_offset
+        row = scroll_y + y
+        width = self.size.width
+        buffer = self.buffer
+        if buffer is None or row >= buffer.line_count:
+            return Strip.blank(width, self.rich_style)
+
+        # Four bytes per cell covers any UTF-8 text on screen
+        line = buffer.line(row, max_bytes=(scroll_x + width) * 4).expandtabs(4)
+        style = _line_style(line)
+        base = self.rich_style
+        segment = Segment(line, base + style if style else base)
+        return Strip([segment]).crop_extend(scroll_x, scroll_x + width, base)
+
+    def action_next_hunk(self) -> None:
+        """Scroll the next hunk header to the top."""
+        if self.buffer is None:
+            return
+        hunks = self.buffer.hunks
+        i = bisect_right(hunks, int(self.scroll_offset.y))
+        if i < len(hunks):
+            self.scroll_to(y=hunks[i], animate=False)
+
+    def action_previous_hunk(self) -> None:
+        """Scroll the previous hunk header to the top."""
+        if self.buffer is None:
+            return
+        hunks = self.buffer.hunks
+        i = bisect_left(hunks, int(self.scroll_offset.y))
+        if i > 0:
+            self.scroll_to(y=hunks[i - 1], animate=False)
@@ -1,11 +1,131 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from rich.text import Text
+from textual.binding import Binding
 from textual.widgets import Tree, Static
+from textual.widgets.tree import TreeNode
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.widgets import Label
 
+from gitx.config import GitxConfig
+from gitx.git.snapshot import RepoSnapshot
+
+# Label style of each file status
+STATUS_STYLES = {
+    "modified": "red",
+    "untracked": "magenta",
+    "staged": "green",
+    "deleted": "red dim",
+}
+
+# Status groups in the order they are shown, with their titles
+GROUPS = (
+    ("staged", "Staged Changes"),
+    ("modified", "Unstaged Changes"),
+    ("deleted", "Deleted Files"),
+    ("untracked", "Untracked Files"),
+)
+
+# Marker in front of selected files
+SELECTED_MARK = "● "
+
+# Removing a node costs a scan of its siblings, so when the removed nodes
+# times the size of their groups exceeds this, the tree is rebuilt instead
+REBUILD_COST = 100_000_000
+
+
+class FileDirectory:
+    """A directory in the trie of changed files shown by the directory view."""
+
+    __slots__ = ("path", "children", "files", "count")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.children: Dict[str, "FileDirectory"] = {}
+        # Paths of the files directly in this directory
+        self.files: List[str] = []
+        # Number of files below this directory
+        self.count = 0
+
+    def all_files(self) -> List[str]:
+        """The paths of every file below this directory."""
+        paths: List[str] = []
+        pending = [self]
+        while pending:
+            directory = pending.pop()
+            paths.extend(directory.files)
+            pending.extend(directory.children.values())
+        return paths
+
+
+def split_path(path: str) -> Tuple[str, str]:
+    """Split a path into its directory and name; an untracked directory keeps its "/" on the name."""
+    directory = path.rstrip("/").rpartition("/")[0]
+    return directory, path[len(directory) + 1:] if directory else path
+
+
+def group_files(paths: List[str]) -> FileDirectory:
+    """Arrange paths in a trie of their directories."""
+    directories = {"": FileDirectory("")}
+
+    def directory_of(path: str) -> FileDirectory:
+        directory = directories.get(path)
+        if directory is None:
+            parent_path, _, name = path.rpartition("/")
+            parent = directory_of(parent_path)
+            directory = parent.children[name] = directories[path] = FileDirectory(path)
+        return directory
+
+    for path in paths:
+        directory_of(split_path(path)[0]).files.append(path)
+    # Parents are created before their children, so the counts add up from the end
+    for path, directory in reversed(directories.items()):
+        directory.count += len(directory.files)
+        if path:
+            directories[path.rpartition("/")[0]].count += directory.count
+    return directories[""]
+
 
 class FileTree(Static):
-    """Tree view for displaying unstaged/untracked files."""
+    """Tree view for displaying unstaged/untracked files.
+
+    Files can be selected with v (a file, or every file of a directory or
+    status group when on one) and d (every file in the same directory and
+    group), so that staging and unstaging act on the whole selection at once.
+
+    A new snapshot is applied as a diff against the files shown: only the
+    nodes of files that left or joined a group are removed or added, so the
+    cursor and collapsed groups stay as they were.
+
+    Press ` (or set gitx.fileTreeDirectories) to show the files of each
+    group by directory instead, with the number of files in each directory.
+    The directories come from a trie built once per snapshot, and the nodes
+    of a directory are only created when it is expanded.
+    """
+
+    BINDINGS = [
+        Binding("v", "toggle_selection", "Select", show=False),
+        Binding("d", "select_directory", "Select directory", show=False),
+        Binding("escape", "clear_selection", "Clear selection", show=False),
+        Binding("grave_accent", "toggle_directories", "Directory view", show=False),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Selected files as (status, path) pairs
+        self.selected: Set[Tuple[str, str]] = set()
+        # The paths shown in each group, None until a snapshot is shown
+        self._shown: Optional[Dict[str, List[str]]] = None
+        self._group_nodes: Dict[str, TreeNode] = {}
+        self._files: Dict[Tuple[str, str], TreeNode] = {}
+        # Groups the user collapsed, which stay collapsed when they are created again
+        self._collapsed: Set[str] = set()
+        # Whether files are shown by directory rather than as a flat list per group
+        self.show_directories = False
+        self._directory_nodes: Dict[Tuple[str, str], TreeNode] = {}
+        # Directories the user expanded as (status, path) pairs, kept across refreshes
+        self._expanded: Set[Tuple[str, str]] = set()
 
     def compose(self) -> ComposeResult:
         """Compose the file tree."""
@@ -16,69 +136,273 @@ class FileTree(Static):
         )
 
     def on_mount(self) -> None:
-        """Set up the tree when mounted."""
-        self.refresh_tree()
+        self.query_one(Tree).root.add_leaf(Text("loading…", style="dim"))
+
+    def apply_config(self, config: GitxConfig) -> None:
+        """Apply the settings of the repository once it is open."""
+        self.set_directories(config.get_bool("fileTreeDirectories", self.show_directories))
+
+    def set_directories(self, show_directories: bool) -> None:
+        """Show files by directory or as flat lists, rebuilding the tree if that changes."""
+        if show_directories != self.show_directories:
+            self.show_directories = show_directories
+            if self._shown is not None:
+                self._rebuild(self.query_one(Tree), self._shown)
 
     def refresh_tree(self) -> None:
         """Refresh the file tree with current repository status."""
+        self.app.refresh_repository([FileTree])
+
+    def update_snapshot(self, snapshot: RepoSnapshot) -> None:
+        """Show a repository snapshot, changing only the nodes of files that moved.
+
+        Args:
+            snapshot: The snapshot to render
+        """
         tree = self.query_one(Tree)
-        tree.clear()
 
         try:
-            # Get the actual status from git
-            status = self.app.git.get_status()
-
-            # Add sections for different file statuses
-            if status.get("staged"):
-                staged = tree.root.add("Staged Changes", expand=True)
-                for file in status["staged"]:
-                    node = staged.add_leaf(file)
-                    node.data = {"status": "staged", "path": file}
-
-            if status.get("modified"):
-                unstaged = tree.root.add("Unstaged Changes", expand=True)
-                for file in status["modified"]:
-                    node = unstaged.add_leaf(file)
-                    node.data = {"status": "modified", "path": file}
-
-            if status.get("deleted"):
-                deleted_node = tree.root.add("Deleted Files", expand=True)
-                for file in status["deleted"]:
-                    node = deleted_node.add_leaf(file)
-                    node.data = {"status": "deleted", "path": file}
-
-            if status.get("untracked"):
-                untracked = tree.root.add("Untracked Files", expand=True)
-                for file in status["untracked"]:
-                    node = untracked.add_leaf(file)
-                    node.data = {"status": "untracked", "path": file}
-
-            # Add styling to tree nodes
-            self.apply_tree_styling()
+            status = snapshot.status_groups()
+            groups = {name: status.get(name) or [] for name, _ in GROUPS}
+            if self._shown is None:
+                self._rebuild(tree, groups)
+            elif self.show_directories:
+                # Only the expanded directories have nodes, so building them again is cheap
+                if groups != self._shown:
+                    self._rebuild(tree, groups)
+            elif self._update_cost(groups) > REBUILD_COST:
+                self._rebuild(tree, groups)
+            else:
+                self._update(tree, groups)
+
+            # Forget selected files that are no longer in the same group
+            if self.selected:
+                members = {name: set(groups[name]) for name in {name for name, _ in self.selected}}
+                self.selected = {(name, path) for name, path in self.selected if path in members[name]}
         except Exception as e:
             # If there's an error, add an error node
+            self._forget_nodes()
+            tree.clear()
             error_node = tree.root.add("Error")
             error_node.add_leaf(f"Error: {str(e)}")
 
-    def apply_tree_styling(self) -> None:
-        """Apply appropriate CSS classes to tree nodes based on their status."""
-        tree = self.query_one(Tree)
+    def _forget_nodes(self) -> None:
+        self._shown = None
+        self._group_nodes.clear()
+        self._files.clear()
+        self._directory_nodes.clear()
+
+    def _update_cost(self, groups: Dict[str, List[str]]) -> float:
+        """Estimate the work of updating the shown groups in place; infinite if it cannot be done."""
+        cost = 0
+        for name, _ in GROUPS:
+            old, new = self._shown.get(name, []), groups[name]
+            if old == new or not old:
+                continue
+            old_set, new_set = set(old), set(new)
+            # Files staying in the group must stay in the same order, as new ones are inserted around them
+            if [path for path in old if path in new_set] != [path for path in new if path in old_set]:
+                return float("inf")
+            cost += len(old_set - new_set) * len(old)
+        return cost
 
-        # Walk all children and manually skip the root node
-        for node in tree.walk_children():
-            # Skip the root node
-            if node is tree.root:
+    def _rebuild(self, tree: Tree, groups: Dict[str, List[str]]) -> None:
+        """Replace every node, then put the cursor back on the same file, directory or group."""
+        cursor = self._node_key(tree.cursor_node)
+        self._forget_nodes()
+        tree.clear()
+        for name, title in GROUPS:
+            if groups[name]:
+                group = self._add_group(tree, name, title)
+                if self.show_directories:
+                    self._add_directory(group, name, group_files(groups[name]))
+                else:
+                    for path in groups[name]:
+                        self._add_file(group, name, path)
+        self._shown = groups
+        if cursor is not None:
+            self.call_after_refresh(self._restore_cursor, cursor)
+
+    def _update(self, tree: Tree, groups: Dict[str, List[str]]) -> None:
+        """Remove and insert the nodes of files that left or joined each group."""
+        for name, title in GROUPS:
+            old, new = self._shown.get(name, []), groups[name]
+            if old == new:
+                continue
+            if not new:
+                self._group_nodes.pop(name).remove()
+                for path in old:
+                    del self._files[(name, path)]
                 continue
 
-            if hasattr(node, 'data') and node.data:
-                if node.data.get("status") == "modified":
-                    node.label.stylize("red")
-                elif node.data.get("status") == "untracked":
-                    node.label.stylize("magenta")
-                elif node.data.get("status") == "staged":
-                    node.label.stylize("green")
-                elif node.data.get("status") == "deleted":
-                    node.label.stylize("red dim")
+            group = self._group_nodes.get(name) or self._add_group(tree, name, title)
+            new_set = set(new)
+            for path in old:
+                if path not in new_set:
+                    self._files.pop((name, path)).remove()
+            # Files that stayed are in order, so each new file goes at its position in the list
+            for position, path in enumerate(new):
+                if (name, path) not in self._files:
+                    self._add_file(group, name, path, position)
+        self._shown = groups
+
+    def _add_group(self, tree: Tree, name: str, title: str) -> TreeNode:
+        """Add the node of a status group, between the groups before and after it."""
+        position = 0
+        for other, _ in GROUPS:
+            if other == name:
+                break
+            position += other in self._group_nodes
+        node = tree.root.add(title, expand=name not in self._collapsed, before=position)
+        self._group_nodes[name] = node
+        return node
+
+    def _add_file(self, group: TreeNode, status: str, path: str, position: Optional[int] = None) -> None:
+        node = group.add_leaf(self._file_label(status, path), {"status": status, "path": path}, before=position)
+        self._files[(status, path)] = node
+
+    def _add_directory(self, parent: TreeNode, status: str, directory: FileDirectory) -> None:
+        """Create the nodes of one directory level: its subdirectories, then its files."""
+        for name, child in directory.children.items():
+            label = Text.assemble((name + "/", "bold"), (f" ({child.count})", "dim"))
+            node = parent.add(label, data={"status": status, "directory": child, "loaded": False})
+            self._directory_nodes[(status, child.path)] = node
+            if (status, child.path) in self._expanded:
+                node.expand()
+                self._load_directory(node)
+        for path in directory.files:
+            self._add_file(parent, status, path)
+
+    def _load_directory(self, node: TreeNode) -> None:
+        if not node.data["loaded"]:
+            node.data["loaded"] = True
+            self._add_directory(node, node.data["status"], node.data["directory"])
+
+    def _node_key(self, node: Optional[TreeNode]) -> Optional[Tuple[str, str, Optional[str]]]:
+        """The kind ("file", "directory" or "group"), status group and path of a node."""
+        if node is None:
+            return None
+        if node.data:
+            if "directory" in node.data:
+                return "directory", node.data["status"], node.data["directory"].path
+            return "file", node.data["status"], node.data["path"]
+        for name, group in self._group_nodes.items():
+            if group is node:
+                return "group", name, None
+        return None
+
+    def _restore_cursor(self, key: Tuple[str, str, Optional[str]]) -> None:
+        """Move the cursor to a node, or to the closest directory or group shown if it is gone."""
+        kind, name, path = key
+        node = self._files.get((name, path)) if kind == "file" else None
+        if kind == "directory":
+            node = self._directory_nodes.get((name, path))
+        while node is None and path:
+            path = split_path(path)[0]
+            node = self._directory_nodes.get((name, path))
+        if node is None:
+            node = self._group_nodes.get(name)
+        if node is not None:
+            self.query_one(Tree).move_cursor(node)
+
+    def on_tree_node_collapsed(self, event: Tree.NodeCollapsed) -> None:
+        key = self._node_key(event.node)
+        if key is None:
+            return
+        kind, name, path = key
+        if kind == "group":
+            self._collapsed.add(name)
+        elif kind == "directory":
+            self._expanded.discard((name, path))
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        """Track expanded groups and directories, creating a directory's nodes when first expanded."""
+        key = self._node_key(event.node)
+        if key is None:
+            return
+        kind, name, path = key
+        if kind == "group":
+            self._collapsed.discard(name)
+        elif kind == "directory":
+            self._expanded.add((name, path))
+            self._load_directory(event.node)
+
+    def apply_tree_styling(self) -> None:
+        """Label every file node with its status color and selection mark."""
+        for node in self._files.values():
+            self._style_node(node)
+
+    def _file_label(self, status: str, path: str) -> Text:
+        # Under its directory a file is labeled with its name only
+        name = split_path(path)[1] if self.show_directories else path
+        label = Text(name, style=STATUS_STYLES.get(status, ""))
+        if (status, path) in self.selected:
+            label = Text.assemble((SELECTED_MARK, "bold yellow"), label)
+        return label
+
+    def _style_node(self, node: TreeNode) -> None:
+        node.set_label(self._file_label(node.data["status"], node.data["path"]))
+
+    def _node_files(self, node: TreeNode) -> List[Tuple[str, str]]:
+        """The files of a node: itself for a file, every file below a directory or group."""
+        key = self._node_key(node)
+        if key is None:
+            return []
+        kind, name, path = key
+        if kind == "file":
+            return [(name, path)]
+        if kind == "directory":
+            return [(name, file) for file in node.data["directory"].all_files()]
+        return [(name, file) for file in self._shown[name]]
+
+    def _toggle(self, keys: List[Tuple[str, str]]) -> None:
+        """Select all of the files, or deselect them if they are all selected."""
+        if all(key in self.selected for key in keys):
+            self.selected.difference_update(keys)
+        else:
+            self.selected.update(keys)
+        # Files in directories that were never expanded have no node to restyle
+        for key in keys:
+            if key in self._files:
+                self._style_node(self._files[key])
+
+    def action_toggle_selection(self) -> None:
+        """Select or deselect the file, directory or status group under the cursor."""
+        node = self.query_one(Tree).cursor_node
+        if node is not None:
+            self._toggle(self._node_files(node))
+
+    def action_select_directory(self) -> None:
+        """Select or deselect every file in the cursor file's directory and status group."""
+        key = self._node_key(self.query_one(Tree).cursor_node)
+        if key is None or key[0] != "file":
+            return
+        _, name, path = key
+        directory = split_path(path)[0]
+        self._toggle([(name, file) for file in self._shown[name] if split_path(file)[0] == directory])
+
+    def action_toggle_directories(self) -> None:
+        """Switch between showing files by directory and as flat lists."""
+        self.set_directories(not self.show_directories)
+
+    def action_clear_selection(self) -> None:
+        """Deselect all files."""
+        if self.selected:
+            keys, self.selected = self.selected, set()
+            for key in keys:
+                if key in self._files:
+                    self._style_node(self._files[key])
+
+    def target_files(self) -> List[Tuple[str, str]]:
+        """The (status, path) pairs an action should apply to.
+
+        This is the selection if there is one, otherwise the file, directory
+        or status group under the cursor.
+        """
+        if self.selected:
+            return sorted(self.selected)
+        node = self.query_one(Tree).cursor_node
+        return [] if node is None else self._node_files(node)
 
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         """Handle tree node selection."""
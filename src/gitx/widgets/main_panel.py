@@ -1,12 +1,23 @@
+from typing import Optional, Tuple
+
+from textual import work
 from textual.widgets import Static, RichLog
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.widgets import Label
 
+from gitx.git.diff import DiffBuffer
+from gitx.widgets.diff_view import DiffView
+
 
 class MainPanel(Static):
     """Main panel that changes based on context."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The file and staged flag of a diff shown as a summary, see show_full_diff
+        self._summarized: Optional[Tuple[str, bool]] = None
+
     def compose(self) -> ComposeResult:
         """Compose the main panel."""
         yield Vertical(
@@ -16,51 +27,99 @@ class MainPanel(Static):
                 highlight=True,
                 id="main-content",
             ),
+            DiffView(id="diff-view"),
             id="main-panel",
             classes="panel"
         )
 
     def on_mount(self) -> None:
         """Set up the main panel when mounted."""
+        self._show_content(diff=False)
         content = self.query_one("#main-content", RichLog)
         content.clear()
         content.write("Select a file to view its contents or a commit to view its details.")
 
-    def show_file_diff(self, file_path: str, staged: bool = False) -> None:
+    def show_file_diff(self, file_path: str, staged: bool = False, full: bool = False) -> None:
         """Show the diff content of a file.
 
         Args:
             file_path: Path to the file
             staged: Whether to show the staged diff
+            full: Show the whole patch even if it is above the summary threshold
         """
-        content = self.query_one("#main-content", RichLog)
-        content.clear()
-
+        if self.app.git is None:
+            self.app.notify("The repository is still loading", severity="warning")
+            return
         # Update the title
         staging_status = "Staged" if staged else "Unstaged"
         self.query_one(".section-title", Label).update(f"[bold]4-Diff: {file_path} ({staging_status})[/bold]")
+        self._summarized = None
+        self._load_file_diff(file_path, staged, full)
 
-        try:
-            # Get the actual diff from git
-            diff_output = self.app.git.get_file_diff(file_path, staged)
+    def show_full_diff(self) -> bool:
+        """Load the whole patch of a diff that is shown as a summary.
 
-            if not diff_output:
-                content.write("[yellow]No changes detected in this file.[/yellow]")
-                return
+        Returns:
+            False if the current diff is not a summary
+        """
+        if self._summarized is None:
+            return False
+        self.show_file_diff(*self._summarized, full=True)
+        return True
+
+    def _show_content(self, diff: bool) -> None:
+        """Switch between the diff view and the text content."""
+        self.query_one(DiffView).display = diff
+        self.query_one("#main-content", RichLog).display = not diff
+        if not diff:
+            self.query_one(DiffView).clear()
+
+    @work(exclusive=True, group="main-content")
+    async def _load_file_diff(self, file_path: str, staged: bool, full: bool = False) -> None:
+        """Load a diff in a worker, cancelling any previous main panel load.
+
+        The size and type of the change are probed first. Binary diffs and
+        diffs above the gitx.diffStatThreshold size (unless full is set) are
+        shown as a `--stat` summary; others are streamed into the diff view.
+        """
+        content = self.query_one("#main-content", RichLog)
+        git = self.app.git_async
 
-            # Parse and colorize the diff output
-            for line in diff_output.splitlines():
-                if line.startswith("+") and not line.startswith("+++"):
-                    content.write(f"[green]{line}[/green]")
-                elif line.startswith("-") and not line.startswith("---"):
-                    content.write(f"[red]{line}[/red]")
-                elif line.startswith("@@"):
-                    content.write(f"[cyan]{line}[/cyan]")
-                elif line.startswith("diff") or line.startswith("index") or line.startswith("---") or line.startswith("+++"):
-                    content.write(f"[green]{line}[/green]")
-                else:
-                    content.write(line)
+        try:
+            key = self.app.git.file_diff_key(file_path, staged)
+            cached = key is not None and self.app.git.diff_cache.get(key) is not None
+            if not cached:
+                probe = await git.probe_file_diff(file_path, staged)
+                threshold = self.app.git.config.get_int("diffStatThreshold", 4 * 1024 * 1024)
+                if probe.binary or (probe.size > threshold and not full):
+                    stat = await git.get_file_diff_stat(file_path, staged)
+                    self._show_content(diff=False)
+                    content.clear()
+                    if probe.binary:
+                        content.write(f"[yellow]Binary file ({probe.old_size} -> {probe.new_size} bytes)[/yellow]")
+                    else:
+                        self._summarized = (file_path, staged)
+                        content.write(
+                            f"[yellow]File is {probe.size / (1024 * 1024):.1f} MiB, showing a summary. "
+                            "Press L to load the full diff.[/yellow]"
+                        )
+                    content.write("")
+                    content.write(stat or "No changes detected in this file.")
+                    return
+
+            buffer = DiffBuffer()
+            view = self.query_one(DiffView)
+            self._show_content(diff=True)
+            view.show_buffer(buffer)
+            await git.stream_file_diff(file_path, staged, buffer)
+
+            if buffer.size == 0:
+                self._show_content(diff=False)
+                content.clear()
+                content.write("[yellow]No changes detected in this file.[/yellow]")
         except Exception as e:
+            self._show_content(diff=False)
+            content.clear()
             content.write(f"[red]Error displaying diff: {str(e)}[/red]")
 
     def show_commit_details(self, commit_hash: str) -> None:
@@ -69,15 +128,24 @@ class MainPanel(Static):
         Args:
             commit_hash: The commit hash to display
         """
-        content = self.query_one("#main-content", RichLog)
-        content.clear()
-
+        if self.app.git is None:
+            self.app.notify("The repository is still loading", severity="warning")
+            return
         # Update the title
         self.query_one(".section-title", Label).update(f"[bold]4-Commit: {commit_hash}[/bold]")
+        self._summarized = None
+        self._show_content(diff=False)
+        self._load_commit_details(commit_hash)
+
+    @work(exclusive=True, group="main-content")
+    async def _load_commit_details(self, commit_hash: str) -> None:
+        """Load commit details in a worker, cancelling any previous main panel load."""
+        content = self.query_one("#main-content", RichLog)
 
         try:
             # Get the actual commit details from git
-            details = self.app.git.get_commit_details(commit_hash)
+            details = await self.app.git_async.get_commit_details(commit_hash)
+            content.clear()
 
             if not details:
                 content.write(f"[red]Could not find commit: {commit_hash}[/red]")
@@ -106,10 +174,14 @@ class MainPanel(Static):
             for file in details['changed_files'].get('added', []):
                 content.write(f"[green]+ {file}[/green]")
         except Exception as e:
+            content.clear()
             content.write(f"[red]Error displaying commit details: {str(e)}[/red]")
 
     def show_welcome(self) -> None:
         """Show welcome message."""
+        self.workers.cancel_group(self, "main-content")
+        self._summarized = None
+        self._show_content(diff=False)
         content = self.query_one("#main-content", RichLog)
         content.clear()
 
@@ -4,6 +4,8 @@ from textual.containers import Vertical, Horizontal
 from textual.widgets import Label
 from rich.text import Text
 
+from gitx.git.snapshot import RepoSnapshot
+
 
 class StatusPanel(Static):
     """Panel that shows the current status of the repository."""
@@ -14,40 +16,48 @@ class StatusPanel(Static):
             Label("[bold]1-Status[/bold]", classes="section-title"),
             Horizontal(
                 Static("gitx ➜", classes="status-label"),
-                Static("", id="current-branch", classes="status-value"),
+                Static(Text("loading…", style="dim"), id="current-branch", classes="status-value"),
                 classes="status-row"
             ),
             id="status-panel",
             classes="panel"
         )
 
-    def on_mount(self) -> None:
-        """Set up the status panel when mounted."""
-        self.refresh_status()
-
     def refresh_status(self) -> None:
         """Refresh the status information with current repository state."""
-        try:
-            # Get actual status from git
-            status_info = self.app.git.get_repo_status_summary()
-
-            branch_label = self.query_one("#current-branch", Static)
-            branch_text = Text(f"{status_info['branch']} - {status_info['status']}")
-
-            # Color based on status
-            if "clean" in status_info["status"]:
-                branch_text.stylize("green")
-            elif "modified" in status_info["status"]:
-                branch_text.stylize("red")
-            elif "untracked" in status_info["status"]:
-                branch_text.stylize("magenta")
-
-            branch_label.update(branch_text)
-        except Exception as e:
-            branch_label = self.query_one("#current-branch", Static)
-            error_text = Text(f"Error: {str(e)}")
-            error_text.stylize("red")
-            branch_label.update(error_text)
+        self.app.refresh_repository([StatusPanel])
+
+    def update_snapshot(self, snapshot: RepoSnapshot) -> None:
+        """Render the status summary of a repository snapshot.
+
+        Args:
+            snapshot: The snapshot to render, marked as such if it is stale
+        """
+        status_info = snapshot.summary()
+
+        branch_label = self.query_one("#current-branch", Static)
+        branch_text = Text(f"{status_info['branch']} - {status_info['status']}")
+
+        # Color based on status
+        if "clean" in status_info["status"]:
+            branch_text.stylize("green")
+        elif "modified" in status_info["status"]:
+            branch_text.stylize("red")
+        elif "untracked" in status_info["status"]:
+            branch_text.stylize("magenta")
+
+        if snapshot.stale:
+            branch_text.append(" (stale)", style="dim")
+        elif not snapshot.untracked_listed:
+            branch_text.append(" (listing untracked files…)", style="dim")
+        branch_label.update(branch_text)
+
+    def show_error(self, error: Exception) -> None:
+        """Show an error that prevented loading the repository status."""
+        branch_label = self.query_one("#current-branch", Static)
+        error_text = Text(f"Error: {str(error)}")
+        error_text.stylize("red")
+        branch_label.update(error_text)
 
     def update_status(self, branch: str = None, status: str = None) -> None:
         """Update the status information manually.
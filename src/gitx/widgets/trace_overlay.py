@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional
+
+from rich.console import Group
+from rich.table import Table
+from rich.text import Text
+from textual.timer import Timer
+from textual.widgets import Static
+
+from gitx.trace import CallTiming, RenderStats
+
+# Rows shown in each table
+RECENT_CALLS = 12
+TOP_TRIGGERS = 8
+
+
+def _size(value) -> str:
+    if value is None:
+        return "-"
+    for unit in ("B", "K", "M"):
+        if value < 1024:
+            return f"{value:.0f}{unit}"
+        value /= 1024
+    return f"{value:.0f}G"
+
+
+class TraceOverlay(Static):
+    """Live summary of git calls and panel render times.
+
+    Hidden until toggled with T. While shown it refreshes twice a second.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._timer: Optional[Timer] = None
+
+    def on_mount(self) -> None:
+        self.display = False
+        self._timer = self.set_interval(0.5, self.update_summary, pause=True)
+
+    def toggle(self) -> None:
+        """Show or hide the overlay."""
+        self.display = not self.display
+        if self.display:
+            self.update_summary()
+            self._timer.resume()
+        else:
+            self._timer.pause()
+
+    def update_summary(self) -> None:
+        calls: List[CallTiming] = list(self.app.git.pool.timings) if self.app.git is not None else []
+        renders: RenderStats = self.app.render_timer.stats
+        processes = [call for call in calls if not call.batched]
+
+        header = Text.assemble(
+            ("Performance trace", "bold"),
+            f"  {len(processes)} git processes, {len(calls) - len(processes)} cat-file reads, ",
+            f"{sum(call.duration for call in processes) * 1000:.0f} ms in processes",
+        )
+
+        by_trigger: Dict[str, List[float]] = {}
+        for call in calls:
+            totals = by_trigger.setdefault(call.trigger or "(unknown)", [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += call.duration
+            totals[2] = max(totals[2], call.duration)
+        triggers = Table("trigger", "calls", "total ms", "max ms", title="By trigger", expand=True)
+        for trigger, (count, total, longest) in sorted(by_trigger.items(), key=lambda item: -item[1][1])[:TOP_TRIGGERS]:
+            triggers.add_row(trigger, str(count), f"{total * 1000:.1f}", f"{longest * 1000:.1f}")
+
+        recent = Table("ms", "rc", "out", "err", "trigger", "command", title="Recent calls", expand=True)
+        for call in calls[-RECENT_CALLS:]:
+            recent.add_row(
+                f"{call.duration * 1000:.1f}",
+                Text(str(call.returncode), style="red" if call.returncode else ""),
+                _size(call.stdout_size),
+                _size(call.stderr_size),
+                call.trigger or "",
+                Text(" ".join(call.args), overflow="ellipsis", no_wrap=True),
+            )
+
+        panels = Table("panel", "renders", "total ms", "max ms", title="Rendering", expand=True)
+        for panel, (count, total, longest) in sorted(renders.totals.items()):
+            panels.add_row(panel, str(int(count)), f"{total * 1000:.1f}", f"{longest * 1000:.1f}")
+
+        footer = Text("E export JSON and Chrome trace · T close", style="dim")
+        self.update(Group(header, triggers, recent, panels, footer))
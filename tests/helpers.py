@@ -0,0 +1,28 @@
+import os
+import subprocess
+
+
+def git(repo: str, *args: str, **kwargs) -> str:
+    """Run git in a test repository and return its output; checked and as text unless told otherwise."""
+    kwargs.setdefault("text", True)
+    kwargs.setdefault("check", True)
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, **kwargs).stdout
+
+
+def init_repo(path: str) -> str:
+    """Create an empty repository with an author configured, isolated from the user's config."""
+    path = str(path)
+    os.makedirs(path, exist_ok=True)
+    git(path, "init", "-q", "-b", "main")
+    git(path, "config", "user.name", "Test Author")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "commit.gpgsign", "false")
+    return path
+
+
+def write(repo: str, path: str, content: str = "") -> None:
+    """Write a file in the work tree, creating its directories."""
+    full = os.path.join(str(repo), path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
@@ -0,0 +1,91 @@
+import asyncio
+
+from textual.app import App
+from textual.widgets import Tree
+
+from gitx.git.branches import BranchIndex, parse_branch_refs, remote_of
+from gitx.widgets.branches_panel import LOCAL_GROUP, BranchesPanel, group_branches
+
+
+def refs_output(*refnames: str, head: str = "refs/heads/main") -> str:
+    """for-each-ref output in the BRANCH_ARGS format for the given refs."""
+    lines = []
+    for refname in refnames:
+        marker = "*" if refname == head else " "
+        lines.append("\0".join([refname, "", marker, "", "", "0" * 40, "1700000000"]))
+    return "\n".join(lines) + "\n"
+
+
+def test_remote_of_prefers_longest_configured_remote():
+    assert remote_of("origin/main", ["origin"]) == "origin"
+    assert remote_of("up/stream/main", ["up", "up/stream"]) == "up/stream"
+    assert remote_of("up/main", ["up", "up/stream"]) == "up"
+    assert remote_of("other/main", ["origin"]) == "other"
+
+
+def test_parse_branch_refs_uses_configured_remotes():
+    index = parse_branch_refs(
+        refs_output("refs/heads/main", "refs/remotes/up/stream/feature/x", "refs/remotes/origin/main"),
+        ["origin", "up/stream"],
+    )
+    assert index.get("main").remote is None
+    assert index.get("up/stream/feature/x").remote == "up/stream"
+    assert index.get("origin/main").remote == "origin"
+
+
+def test_group_branches_keeps_local_apart_from_a_remote_named_local():
+    index = parse_branch_refs(
+        refs_output("refs/heads/main", "refs/remotes/Local/main"), ["Local"]
+    )
+    root = group_branches(index)
+    assert set(root.children) == {LOCAL_GROUP, "Local"}
+    assert root.children[LOCAL_GROUP].children["main"].branch.refname == "refs/heads/main"
+    assert root.children["Local"].children["main"].branch.refname == "refs/remotes/Local/main"
+
+
+def test_group_branches_groups_remote_with_slash_by_remote_name():
+    index = parse_branch_refs(
+        refs_output("refs/remotes/up/stream/main", "refs/remotes/up/main"), ["up", "up/stream"]
+    )
+    root = group_branches(index)
+    assert set(root.children) == {"up", "up/stream"}
+    assert root.children["up/stream"].children["main"].branch.name == "up/stream/main"
+    assert root.children["up"].children["main"].branch.name == "up/main"
+
+
+def test_group_with_its_own_branch_keeps_it():
+    index = BranchIndex()
+    for refname in ("refs/remotes/origin/a", "refs/remotes/origin/a/b"):
+        index.add(parse_branch_refs(refs_output(refname), ["origin"]).get(refname))
+    group = group_branches(index).children["origin"].children["a"]
+    assert group.branch.name == "origin/a"
+    assert group.children["b"].branch.name == "origin/a/b"
+    assert group.count == 2
+
+
+def test_panel_shows_branch_of_a_group_inside_it():
+    class PanelApp(App):
+        def compose(self):
+            yield BranchesPanel()
+
+    async def labels():
+        app = PanelApp()
+        async with app.run_test() as pilot:
+            panel = app.query_one(BranchesPanel)
+            panel.show_index(parse_branch_refs(
+                refs_output("refs/heads/main", "refs/remotes/Local/a", "refs/remotes/Local/a/b"), ["Local"]
+            ))
+            await pilot.pause()
+            tree = panel.query_one(Tree)
+            groups = [str(node.label) for node in tree.root.children]
+            remote = tree.root.children[1]
+            remote.expand()
+            await pilot.pause()
+            group = remote.children[0]
+            group.expand()
+            await pilot.pause()
+            return groups, [str(node.label) for node in group.children]
+
+    groups, children = asyncio.run(labels())
+    assert groups == ["Local (1)", "Local (2)"]
+    assert children == ["a", "b"]
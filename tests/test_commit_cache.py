@@ -0,0 +1,64 @@
+from gitx.git.commit_cache import CommitCache
+from gitx.git.handler import GitHandler
+from gitx.git.history import CommitMetadata
+from gitx.git.objects import RENAMES_OFF, RENAMES_ON
+
+from tests.helpers import git, init_repo, write
+
+HASH = "1" * 40
+
+
+def metadata(files=None) -> CommitMetadata:
+    return CommitMetadata(
+        HASH, "2" * 40, ["3" * 40], "A U Thor", "author@example.com", 1700000000, "+0000",
+        "A U Thor", "author@example.com", 1700000000, "+0000", "Message\n", files,
+    )
+
+
+def test_changed_files_are_kept_per_rename_mode(tmp_path):
+    cache = CommitCache(str(tmp_path / "commits.db"))
+    try:
+        cache.put(metadata("R100\told.txt\tnew.txt\n"), RENAMES_ON)
+        assert cache.get(HASH, RENAMES_ON).files == "R100\told.txt\tnew.txt\n"
+        assert cache.get(HASH, RENAMES_OFF).files is None
+        assert cache.get(HASH).files is None
+        assert cache.get(HASH).message == "Message\n"
+
+        cache.put(metadata("D\told.txt\nA\tnew.txt\n"), RENAMES_OFF)
+        assert cache.get(HASH, RENAMES_OFF).files == "D\told.txt\nA\tnew.txt\n"
+        assert cache.get(HASH, RENAMES_ON).files is None
+        # Files without a mode never replace stored ones
+        cache.put(metadata("M\tother.txt\n"))
+        assert cache.get(HASH, RENAMES_OFF).files == "D\told.txt\nA\tnew.txt\n"
+    finally:
+        cache.close()
+
+
+def test_details_follow_the_repository_rename_setting(tmp_path, monkeypatch):
+    # The same commit, down to its dates, in two repositories that detect renames differently
+    monkeypatch.setenv("GIT_AUTHOR_DATE", "1700000000 +0000")
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "1700000000 +0000")
+    cache = CommitCache(str(tmp_path / "commits.db"))
+    repos = []
+    for name, renames in (("renames", "true"), ("plain", "false")):
+        repo = init_repo(tmp_path / name)
+        git(repo, "config", "diff.renames", renames)
+        write(repo, "old.txt", "a file long enough to be detected as renamed\n" * 4)
+        git(repo, "add", "old.txt")
+        git(repo, "commit", "-q", "-m", "Base")
+        git(repo, "mv", "old.txt", "new.txt")
+        git(repo, "commit", "-q", "-m", "Rename")
+        repos.append(repo)
+    head = git(repos[0], "rev-parse", "HEAD").strip()
+    assert git(repos[1], "rev-parse", "HEAD").strip() == head
+
+    try:
+        for repo, (added, deleted) in zip(repos, [([], []), (["new.txt"], ["old.txt"])]):
+            handler = GitHandler(repo)
+            handler.commit_cache = cache
+            for _ in range(2):
+                changed = handler.get_commit_details(head)["changed_files"]
+                assert (changed["added"], changed["deleted"]) == (added, deleted), repo
+            handler.close()
+    finally:
+        cache.close()
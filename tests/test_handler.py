@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+from gitx.git.async_handler import AsyncGitHandler
+from gitx.git.handler import GitHandler
+
+from tests.helpers import git, init_repo, write
+
+
+def staged(repo: str):
+    return git(repo, "diff", "--cached", "--name-only").splitlines()
+
+
+def test_stage_and_unstage_from_a_subdirectory(tmp_path):
+    repo = init_repo(tmp_path / "repo")
+    write(repo, "a.txt", "a\n")
+    write(repo, "sub/b [1].txt", "b\n")
+    git(repo, "add", "a.txt")
+    git(repo, "commit", "-q", "-m", "Base")
+    handler = GitHandler(os.path.join(repo, "sub"))
+    handler.pool.discover()
+    git_async = AsyncGitHandler(handler)
+
+    # Paths as status gives them, relative to the top of the work tree
+    assert asyncio.run(git_async.stage_files(["sub/b [1].txt"])) == (True, None)
+    assert staged(repo) == ["sub/b [1].txt"]
+    assert asyncio.run(git_async.unstage_files(["sub/b [1].txt"])) == (True, None)
+    assert staged(repo) == []
+    assert handler.stage_files(["sub/b [1].txt"])
+    assert staged(repo) == ["sub/b [1].txt"]
+    assert handler.unstage_files(["sub/b [1].txt"])
+    assert staged(repo) == []
+
+
+def test_unstage_on_an_unborn_branch(tmp_path):
+    repo = init_repo(tmp_path / "repo")
+    write(repo, "a.txt", "a\n")
+    write(repo, "b.txt", "b\n")
+    git(repo, "add", "a.txt", "b.txt")
+    handler = GitHandler(repo)
+    handler.pool.discover()
+
+    assert asyncio.run(AsyncGitHandler(handler).unstage_files(["a.txt"])) == (True, None)
+    assert staged(repo) == ["b.txt"]
+    assert handler.unstage_files(["b.txt"])
+    assert staged(repo) == []
@@ -0,0 +1,185 @@
+import os
+import time
+
+import pytest
+
+from gitx.git.handler import GitHandler
+from gitx.git.index import GitIndex
+
+from tests.helpers import git, init_repo, write
+
+# Longer than the 12 bits of the name length in the entry flags
+LONG_PATH = "/".join(["d" * 200] * 21) + "/long.txt"
+
+
+def ls_files(repo: str):
+    """(mode, object name, stage, path) of every entry, as git lists them."""
+    entries = []
+    for record in git(repo, "ls-files", "--stage", "-z").split("\0"):
+        if record:
+            info, _, path = record.partition("\t")
+            mode, oid, stage = info.split(" ")
+            entries.append((int(mode, 8), oid, int(stage), path))
+    return entries
+
+
+def read(repo: str) -> GitIndex:
+    return GitIndex(os.path.join(repo, ".git", "index"))
+
+
+@pytest.fixture
+def repo(tmp_path) -> str:
+    """A repository with shared path prefixes, a path of 0xFFF bytes or more, a conflict and extended flags."""
+    repo = init_repo(tmp_path / "repo")
+    for path in ("README", "src/app.py", "src/app_test.py", "src/pkg/a.py", "src/pkg/b.py", "src/pkg2/c.py"):
+        write(repo, path, f"{path}\n")
+    write(repo, "conflict.txt", "base\n")
+    git(repo, "add", "-A")
+    blob = git(repo, "hash-object", "-w", "--stdin", input="long\n").strip()
+    git(repo, "update-index", "--add", "--cacheinfo", f"100644,{blob},{LONG_PATH}")
+    git(repo, "commit", "-q", "-m", "Base")
+
+    git(repo, "checkout", "-q", "-b", "other")
+    write(repo, "conflict.txt", "theirs\n")
+    git(repo, "commit", "-q", "-a", "-m", "Theirs")
+    git(repo, "checkout", "-q", "main")
+    write(repo, "conflict.txt", "ours\n")
+    git(repo, "commit", "-q", "-a", "-m", "Ours")
+    git(repo, "merge", "-q", "other", check=False)
+
+    git(repo, "update-index", "--skip-worktree", "src/pkg/b.py")
+    write(repo, "src/pkg/new.py", "intent to add\n")
+    git(repo, "add", "-N", "src/pkg/new.py")
+    return repo
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_entries_match_git(repo, version):
+    if version == 2:
+        # Extended flags need version 3, so drop them to write a version 2 index
+        git(repo, "update-index", "--no-skip-worktree", "src/pkg/b.py")
+        git(repo, "rm", "-q", "--cached", "src/pkg/new.py")
+    git(repo, "update-index", "--index-version", str(version))
+    index = read(repo)
+    try:
+        assert index.version == version
+        assert [(e.mode, e.oid, e.stage, e.path) for e in index] == ls_files(repo)
+        assert LONG_PATH in index.paths and len(LONG_PATH) >= 0xFFF
+        assert [e.stage for e in index if e.path == "conflict.txt"] == [1, 2, 3]
+        assert index.find("conflict.txt") == index.paths.index("conflict.txt")
+        assert index.find("missing") is None
+
+        skipped = {e.path for e in index if e.skip_worktree}
+        assert skipped == ({"src/pkg/b.py"} if version > 2 else set())
+        assert [index.skips_worktree(i) for i in range(len(index))] == [e.skip_worktree for e in index]
+        added = {e.path for e in index if e.intent_to_add}
+        assert added == ({"src/pkg/new.py"} if version > 2 else set())
+        assert not any(index.is_gitlink(i) for i in range(len(index)))
+        # Extensions start right after the last entry, whose offset the scan found
+        assert b"TREE" in [signature for signature, _, _ in index.extensions()]
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_stat_matches_after_refresh(tmp_path, version):
+    repo = init_repo(tmp_path / "repo")
+    for path in ("a.txt", "dir/b.txt", "dir/c.txt"):
+        write(repo, path, f"{path}\n")
+    os.chmod(os.path.join(repo, "dir/c.txt"), 0o755)
+    git(repo, "add", "-A")
+    git(repo, "update-index", "--index-version", str(version))
+    index = read(repo)
+    try:
+        for i, path in enumerate(index.paths):
+            assert index.stat_matches(i, os.lstat(os.path.join(repo, path))), path
+        os.chmod(os.path.join(repo, "a.txt"), 0o755)
+        assert not index.stat_matches(index.find("a.txt"), os.lstat(os.path.join(repo, "a.txt")))
+        past = time.time() - 100
+        os.utime(os.path.join(repo, "dir/b.txt"), (past, past))
+        assert not index.stat_matches(index.find("dir/b.txt"), os.lstat(os.path.join(repo, "dir/b.txt")))
+    finally:
+        index.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = str(tmp_path / "index")
+    with open(path, "wb") as f:
+        f.write(b"DIRC\0\0\0\x05\0\0\0\0")
+    with pytest.raises(ValueError):
+        GitIndex(path)
+    with open(path, "wb") as f:
+        f.write(b"")
+    with pytest.raises(ValueError):
+        GitIndex(path)
+
+
+def age(repo: str, seconds: float = 60) -> None:
+    """Move the times of the work tree back, so nothing in it is too recent to trust."""
+    past = time.time() - seconds
+    for directory, dirs, files in os.walk(repo):
+        if ".git" in dirs:
+            dirs.remove(".git")
+        for name in files + dirs:
+            os.utime(os.path.join(directory, name), (past, past), follow_symlinks=False)
+        os.utime(directory, (past, past))
+    # Record the new stat data, so every entry matches its file
+    git(repo, "update-index", "-q", "--refresh")
+
+
+@pytest.fixture
+def handler(tmp_path):
+    repo = init_repo(tmp_path / "repo")
+    for path in ("a.txt", "dir/b.txt", "dir/sub/c.txt", "untracked/d.txt", "modified.txt"):
+        write(repo, path, f"{path}\n")
+    git(repo, "add", "a.txt", "dir", "modified.txt")
+    git(repo, "commit", "-q", "-m", "Base")
+    write(repo, "modified.txt", "changed\n")
+    age(repo)
+    handler = GitHandler(repo)
+    handler.get_snapshot()
+    assert handler.status_unchanged()
+    return handler
+
+
+def touch(path: str) -> None:
+    os.utime(path, (time.time() - 30, time.time() - 30))
+
+
+@pytest.mark.parametrize("change", [
+    lambda repo: touch(os.path.join(repo, "a.txt")),
+    lambda repo: touch(os.path.join(repo, "modified.txt")),
+    lambda repo: write(repo, "dir/sub/new.txt", "new\n"),
+    lambda repo: write(repo, "new.txt", "new\n"),
+    lambda repo: write(repo, "untracked/new.txt", "new\n"),
+    lambda repo: os.remove(os.path.join(repo, "dir/sub/c.txt")),
+    lambda repo: os.remove(os.path.join(repo, "untracked/d.txt")),
+    lambda repo: git(repo, "add", "modified.txt"),
+    lambda repo: git(repo, "commit", "-q", "--allow-empty", "-m", "Empty"),
+], ids=[
+    "touch tracked", "touch modified", "add in tracked dir", "add at root", "add in untracked dir",
+    "remove tracked", "remove untracked", "stage", "commit",
+])
+def test_baseline_notices_changes(handler, change):
+    change(handler.repo_path)
+    assert not handler.status_unchanged()
+
+
+def test_baseline_trusts_files_touched_before_the_snapshot(tmp_path, monkeypatch):
+    # Trust files changed right before the snapshot, as their change time cannot be moved back
+    monkeypatch.setattr("gitx.git.index.RACY_MARGIN_NS", 0)
+    repo = init_repo(tmp_path / "repo")
+    write(repo, "a.txt", "a\n")
+    git(repo, "add", "a.txt")
+    git(repo, "commit", "-q", "-m", "Base")
+    age(repo)
+    # Out of date in the index, which status without optional locks leaves as it is
+    touch(os.path.join(repo, "a.txt"))
+    time.sleep(0.05)
+    handler = GitHandler(repo)
+    assert handler.get_snapshot().is_clean
+    assert handler.status_unchanged()
+    assert set(handler._status_baseline.refreshed) == {"a.txt"}
+    past = time.time() - 20
+    os.utime(os.path.join(repo, "a.txt"), (past, past))
+    assert not handler.status_unchanged()
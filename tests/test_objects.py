@@ -0,0 +1,166 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from gitx.git.history import METADATA_ARGS, CommitMetadata, page_args, parse_metadata
+from gitx.git.objects import PackBackend
+from gitx.git.refs import RefReader
+
+from tests.helpers import git, init_repo, write
+
+# Small, so the log spans many pages
+PAGE_SIZE = 7
+
+
+def commit_all(repo: str, message: str) -> None:
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message)
+
+
+def build_history(repo: str) -> None:
+    """Commits with nested trees, deletes, mode and type changes, merges, a rename and a Latin-1 message."""
+    write(repo, "README", "readme\n")
+    write(repo, "src/app.py", "app\n")
+    write(repo, "src/pkg/core.py", "core\n")
+    write(repo, "src/pkg-data.txt", "sorts between src/pkg and src/pkg/\n")
+    write(repo, "docs/guide.md", "guide\n")
+    commit_all(repo, "Initial commit")
+    paths = ["README", "src/app.py", "src/pkg/core.py", "docs/guide.md"]
+    for i in range(12):
+        with open(os.path.join(repo, paths[i % len(paths)]), "a") as f:
+            f.write(f"edit {i}\n")
+        if i % 4 == 3:
+            write(repo, f"src/pkg/sub{i}/module.py", f"module {i}\n")
+        commit_all(repo, f"Edit {i}")
+
+    os.remove(os.path.join(repo, "docs/guide.md"))
+    commit_all(repo, "Remove the guide")
+    os.chmod(os.path.join(repo, "src/app.py"), 0o755)
+    commit_all(repo, "Make the app executable")
+    # Compared with src/pkg/ in tree order, where directories sort as "pkg/"
+    os.remove(os.path.join(repo, "src/pkg-data.txt"))
+    with open(os.path.join(repo, "src/pkg/core.py"), "a") as f:
+        f.write("without the data file\n")
+    commit_all(repo, "Drop the data file")
+
+    for i in range(2):
+        git(repo, "checkout", "-q", "-b", f"topic-{i}", f"main~{i * 4 + 2}")
+        write(repo, f"topic-{i}.txt", f"topic {i}\n")
+        commit_all(repo, f"Topic {i}")
+        git(repo, "checkout", "-q", "main")
+        git(repo, "merge", "-q", "--no-ff", "-m", f"Merge topic {i}", f"topic-{i}")
+
+    git(repo, "mv", "src/pkg/core.py", "src/pkg/engine.py")
+    git(repo, "commit", "-q", "-m", "Rename core")
+    os.symlink("README", os.path.join(repo, "link"))
+    commit_all(repo, "Add a symlink")
+    os.remove(os.path.join(repo, "link"))
+    write(repo, "link", "no longer a link\n")
+    commit_all(repo, "Replace the symlink with a file")
+    write(repo, "latin1.txt", "latin-1\n")
+    git(repo, "add", "latin1.txt")
+    subprocess.run(
+        ["git", "-C", repo, "-c", "i18n.commitEncoding=ISO-8859-1", "commit", "-q", "-F", "-"],
+        input="Caf\xe9\n".encode("latin-1"), check=True,
+    )
+    for i in range(3):
+        with open(os.path.join(repo, "README"), "a") as f:
+            f.write(f"after {i}\n")
+        commit_all(repo, f"After {i}")
+
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory) -> str:
+    repo = init_repo(tmp_path_factory.mktemp("objects") / "loose")
+    build_history(repo)
+    return repo
+
+
+@pytest.fixture(params=["loose", "repacked", "repacked-then-loose"])
+def repo(request, history, tmp_path) -> str:
+    """The test history with loose objects only, in one deltified pack, or packed with loose commits on top."""
+    if request.param == "loose":
+        return history
+    repo = str(tmp_path / request.param)
+    shutil.copytree(history, repo, symlinks=True)
+    git(repo, "repack", "-a", "-d", "-f", "-q", "--depth=50", "--window=50")
+    if request.param == "repacked-then-loose":
+        for i in range(4):
+            write(repo, f"src/pkg/loose{i}.py", f"loose {i}\n")
+            commit_all(repo, f"Loose {i}")
+    return repo
+
+
+@pytest.fixture
+def backend(repo):
+    git_dir = git(repo, "rev-parse", "--absolute-git-dir").strip()
+    refs = RefReader(git_dir)
+    backend = PackBackend(refs, hash_size=len(refs.head()[1]) // 2)
+    yield backend
+    backend.close()
+
+
+def all_commits(repo: str):
+    return git(repo, "rev-list", "HEAD").split()
+
+
+def recoded(repo: str):
+    """Commits whose message git log re-encodes, which PackBackend leaves to git."""
+    lines = git(repo, "log", "--format=%H %e").splitlines()
+    return {oid for oid, _, encoding in (line.partition(" ") for line in lines) if encoding}
+
+
+def fields(commit):
+    return None if commit is None else [getattr(commit, name) for name in CommitMetadata.__slots__]
+
+
+def test_commit_pages_match_rev_list(repo, backend):
+    commits = all_commits(repo)
+    skipped = recoded(repo)
+    for skip in range(0, len(commits) + PAGE_SIZE, PAGE_SIZE):
+        want = git(repo, *page_args(skip, PAGE_SIZE)).split()
+        page = backend.commit_page(skip, PAGE_SIZE)
+        if skipped.isdisjoint(want):
+            assert page is not None, f"page at {skip} fell back"
+            assert [commit.hash for commit in page] == want
+        else:
+            assert page is None
+
+
+def test_commit_metadata_matches_git_log(repo, backend):
+    commits = all_commits(repo)
+    skipped = recoded(repo)
+    from_git = {
+        commit.hash: commit
+        for commit in parse_metadata(git(repo, *METADATA_ARGS, input="\n".join(commits) + "\n"))
+    }
+    assert set(from_git) == set(commits)
+    for oid in commits:
+        read = backend.read_commit(oid)
+        if oid in skipped:
+            assert read is None
+        else:
+            assert fields(read) == fields(from_git[oid])
+
+
+def test_changed_files_match_git_show(repo, backend):
+    commits = all_commits(repo)
+    skipped = recoded(repo)
+    from_git = {commit.hash: commit for commit in parse_metadata(
+        git(repo, *METADATA_ARGS, input="\n".join(commits) + "\n")
+    )}
+    answered = 0
+    for oid in commits:
+        commit = from_git[oid]
+        shown = git(repo, "show", "--name-status", "--pretty=format:", oid)
+        files = backend.changed_files(commit)
+        renamed = shown.startswith("R") or "\nR" in shown
+        if len(commit.parents) > 1 or renamed or not skipped.isdisjoint(commit.parents):
+            # Merges, renames and children of re-encoded commits are left to git
+            assert files is None
+        else:
+            assert files == shown, oid
+            answered += 1
+    assert answered >= len(commits) - 4
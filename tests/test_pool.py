@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+
+from gitx.git.async_handler import AsyncGitHandler
+from gitx.git.handler import GitHandler
+from gitx.git.pool import READ_ENV
+
+from tests.helpers import git, init_repo, write
+
+
+def test_commit_waits_for_a_held_index_lock_without_blocking(tmp_path):
+    repo = init_repo(tmp_path)
+    write(repo, "a.txt", "a\n")
+    git(repo, "add", "a.txt")
+    handler = GitHandler(repo)
+    handler.pool.discover()
+    git_async = AsyncGitHandler(handler)
+
+    lock = os.path.join(repo, ".git", "index.lock")
+    open(lock, "w").close()
+    threading.Timer(0.2, os.remove, [lock]).start()
+
+    async def commit():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        committed = await git_async.commit("Add a")
+        ticker.cancel()
+        return committed, ticks
+
+    committed, ticks = asyncio.run(commit())
+    assert committed
+    # The event loop kept running while the commit was retried
+    assert ticks >= 10
+    assert git(repo, "log", "--format=%s").split("\n")[0] == "Add a"
+
+
+def test_user_commands_take_optional_locks(tmp_path):
+    handler = GitHandler(init_repo(tmp_path))
+    handler.pool.discover()
+    assert all(handler.pool.env[key] == value for key, value in READ_ENV.items())
+    assert all(handler.pool.user_env.get(key) == os.environ.get(key) for key in READ_ENV)
+
+
+def slow_filter_repo(path, seconds: float = 0.5) -> str:
+    """A repository whose clean filter keeps `git add` running, and holding index.lock, for a while."""
+    repo = init_repo(path)
+    git(repo, "config", "filter.slow.clean", f"sleep {seconds}; cat")
+    write(repo, ".gitattributes", "*.txt filter=slow\n")
+    write(repo, "a.txt", "a\n")
+    write(repo, "b.txt", "b\n")
+    return repo
+
+
+def test_cancelled_stage_finishes_and_releases_the_index_lock(tmp_path):
+    repo = slow_filter_repo(tmp_path)
+    handler = GitHandler(repo)
+    handler.pool.discover()
+    git_async = AsyncGitHandler(handler)
+
+    async def stage_twice():
+        first = asyncio.ensure_future(git_async.stage_files(["a.txt"]))
+        await asyncio.sleep(0.2)
+        first.cancel()
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+        # Waits for the first git add, which is still running, to release the lock
+        return await git_async.stage_files(["b.txt"])
+
+    assert asyncio.run(stage_twice()) == (True, None)
+    assert not os.path.exists(os.path.join(repo, ".git", "index.lock"))
+    assert git(repo, "diff", "--cached", "--name-only").split() == ["a.txt", "b.txt"]
+
+
+def test_index_writes_ignore_the_read_timeout(tmp_path):
+    repo = slow_filter_repo(tmp_path)
+    handler = GitHandler(repo)
+    handler.pool.discover()
+    git_async = AsyncGitHandler(handler, timeout=0.1)
+
+    assert asyncio.run(git_async.stage_files(["a.txt"])) == (True, None)
+    assert not os.path.exists(os.path.join(repo, ".git", "index.lock"))
+    assert git(repo, "diff", "--cached", "--name-only").split() == ["a.txt"]
+
+
+def test_slow_commit_is_not_timed_out_or_cancelled(tmp_path):
+    repo = init_repo(tmp_path)
+    write(repo, "a.txt", "a\n")
+    git(repo, "add", "a.txt")
+    hook = os.path.join(repo, ".git", "hooks", "pre-commit")
+    write(repo, ".git/hooks/pre-commit", "#!/bin/sh\nsleep 0.5\n")
+    os.chmod(hook, 0o755)
+    handler = GitHandler(repo)
+    handler.pool.discover()
+    git_async = AsyncGitHandler(handler, timeout=0.1)
+
+    async def commit_then_cancel():
+        assert await git_async.commit("Add a")
+        write(repo, "b.txt", "b\n")
+        git(repo, "add", "b.txt")
+        second = asyncio.ensure_future(git_async.commit("Add b"))
+        await asyncio.sleep(0.2)
+        second.cancel()
+        try:
+            await second
+        except asyncio.CancelledError:
+            pass
+        await asyncio.gather(*git_async._mutations)
+
+    asyncio.run(commit_then_cancel())
+    assert not os.path.exists(os.path.join(repo, ".git", "index.lock"))
+    assert git(repo, "log", "--format=%s").split("\n")[:2] == ["Add b", "Add a"]
+
+
+def test_sync_remote_commands_are_not_retried(tmp_path):
+    remote = init_repo(tmp_path / "remote")
+    write(remote, "a.txt", "a\n")
+    git(remote, "add", "a.txt")
+    git(remote, "commit", "-q", "-m", "Add a")
+    repo = str(tmp_path / "clone")
+    git(str(tmp_path), "clone", "-q", remote, repo)
+    write(remote, "b.txt", "b\n")
+    git(remote, "add", "b.txt")
+    git(remote, "commit", "-q", "-m", "Add b")
+    handler = GitHandler(repo)
+    handler.pool.discover()
+
+    # The fast-forward needs the index
+    open(os.path.join(repo, ".git", "index.lock"), "w").close()
+    handler.pool.timings.clear()
+    success, error = handler.pull()
+    assert not success and "index.lock" in error
+    assert [timing.args for timing in handler.pool.timings] == [("pull",)]
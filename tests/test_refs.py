@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+from gitx.git.handler import GitHandler
+from gitx.git.refs import RefReader, common_dir
+from gitx.git.session import read_ref_tips
+
+from tests.helpers import git, init_repo, write
+
+
+def commit(repo: str, message: str) -> str:
+    write(repo, "file.txt", message + "\n")
+    git(repo, "add", "file.txt")
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD").strip()
+
+
+def git_refs(repo: str, *patterns: str):
+    """Object names by ref name as for-each-ref lists them."""
+    output = git(repo, "for-each-ref", "--format=%(objectname) %(refname)", *patterns)
+    return dict(reversed(line.split(" ", 1)) for line in output.splitlines())
+
+
+@pytest.fixture
+def repo(tmp_path) -> str:
+    repo = init_repo(tmp_path / "repo")
+    commit(repo, "First")
+    git(repo, "branch", "topic")
+    commit(repo, "Second")
+    return repo
+
+
+def reader(repo: str) -> RefReader:
+    return RefReader(git(repo, "rev-parse", "--absolute-git-dir").strip())
+
+
+def test_unborn_branch(tmp_path):
+    refs = reader(init_repo(tmp_path / "empty"))
+    assert refs.head() == ("refs/heads/main", None)
+    assert refs.current_branch() == "main"
+    assert refs.list_refs() == {}
+
+
+def test_packed_refs_skip_peeled_lines(repo):
+    git(repo, "tag", "-a", "-m", "Release", "v1", "topic")
+    git(repo, "tag", "light", "main")
+    git(repo, "pack-refs", "--all")
+    with open(os.path.join(repo, ".git", "packed-refs")) as f:
+        assert any(line.startswith("^") for line in f)
+
+    refs = reader(repo)
+    assert refs.list_refs(("refs/heads/", "refs/tags/")) == git_refs(repo, "refs/heads/", "refs/tags/")
+    # The tag object, not the commit it peels to
+    assert refs.read_ref("refs/tags/v1") == git(repo, "rev-parse", "v1").strip()
+    assert refs.head() == ("refs/heads/main", git(repo, "rev-parse", "main").strip())
+
+
+def test_loose_refs_override_packed_ones(repo):
+    git(repo, "pack-refs", "--all")
+    refs = reader(repo)
+    packed_main = refs.packed_refs()["refs/heads/main"]
+
+    third = commit(repo, "Third")
+    assert os.path.exists(os.path.join(repo, ".git", "refs", "heads", "main"))
+    assert refs.packed_refs()["refs/heads/main"] == packed_main
+    assert refs.list_refs()["refs/heads/main"] == third
+    assert refs.head() == ("refs/heads/main", third)
+    assert refs.list_refs() == git_refs(repo, "refs/heads/", "refs/remotes/")
+
+    # Deleting the loose ref also removes the packed one
+    git(repo, "checkout", "-q", "topic")
+    git(repo, "branch", "-q", "-D", "main")
+    assert "refs/heads/main" not in refs.list_refs()
+
+
+def test_nested_symbolic_refs(repo):
+    main = git(repo, "rev-parse", "main").strip()
+    git(repo, "symbolic-ref", "refs/heads/alias", "refs/heads/main")
+    git(repo, "symbolic-ref", "refs/heads/alias-of-alias", "refs/heads/alias")
+    git(repo, "symbolic-ref", "HEAD", "refs/heads/alias-of-alias")
+
+    refs = reader(repo)
+    assert refs.resolve("refs/heads/alias-of-alias") == ("refs/heads/main", main)
+    assert refs.head() == ("refs/heads/main", main)
+    assert refs.head()[1] == git(repo, "rev-parse", "HEAD").strip()
+    # Symbolic refs are not listed as branches of their own
+    assert set(refs.list_refs()) == {"refs/heads/main", "refs/heads/topic"}
+
+
+def test_symbolic_ref_cycle_does_not_resolve(repo):
+    git(repo, "symbolic-ref", "refs/heads/a", "refs/heads/b")
+    git(repo, "symbolic-ref", "refs/heads/b", "refs/heads/a")
+    assert reader(repo).resolve("refs/heads/a")[1] is None
+
+
+def test_detached_head(repo):
+    first = git(repo, "rev-parse", "topic").strip()
+    git(repo, "checkout", "-q", "--detach", "topic")
+    refs = reader(repo)
+    assert refs.head() == (None, first)
+    assert refs.current_branch() == "HEAD"
+
+
+def test_linked_worktree(repo, tmp_path):
+    worktree = str(tmp_path / "worktree")
+    git(repo, "worktree", "add", "-q", "-b", "feature", worktree, "topic")
+    feature = commit(worktree, "On the feature branch")
+    git(worktree, "update-ref", "refs/worktree/mark", "HEAD")
+
+    git_dir = git(worktree, "rev-parse", "--absolute-git-dir").strip()
+    assert os.path.exists(os.path.join(git_dir, "commondir"))
+    refs = RefReader(git_dir)
+    assert refs.common_dir == common_dir(git_dir) == os.path.join(repo, ".git")
+    assert refs.head() == ("refs/heads/feature", feature)
+    assert refs.current_branch() == "feature"
+    assert refs.list_refs() == git_refs(repo, "refs/heads/", "refs/remotes/")
+    # Per-worktree refs live in the worktree's own git dir
+    assert refs.read_ref("refs/worktree/mark") == feature
+    assert reader(repo).read_ref("refs/worktree/mark") is None
+    assert reader(repo).head()[0] == "refs/heads/main"
+
+
+def test_changes_are_seen_by_the_same_reader(repo):
+    refs = reader(repo)
+    state = refs.branch_state()
+    assert refs.branch_state() == state
+    third = commit(repo, "Third")
+    assert refs.head() == ("refs/heads/main", third)
+    assert refs.branch_state() != state
+    git(repo, "branch", "nested/branch")
+    assert refs.list_refs() == git_refs(repo, "refs/heads/", "refs/remotes/")
+
+
+def test_reftable_repositories_fall_back_to_git(repo):
+    # git only reads a reftable when the repository says so; the directory is enough for RefReader
+    os.mkdir(os.path.join(repo, ".git", "reftable"))
+    refs = reader(repo)
+    assert not refs.supported
+    assert refs.current_branch() is None
+    assert refs.branch_state() is None
+    assert read_ref_tips(refs.git_dir) is None
+
+    handler = GitHandler(repo)
+    assert handler.get_current_branch() == "main"
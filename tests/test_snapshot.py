@@ -0,0 +1,162 @@
+import os
+
+import pytest
+
+from gitx.git.snapshot import SNAPSHOT_ARGS, PorcelainV2Parser, parse_porcelain_v2
+
+from tests.helpers import git, init_repo, write
+
+HEAD_OID = "1" * 40
+INDEX_OID = "2" * 40
+
+
+def ordinary(xy: str, path: str, sub: str = "N...") -> str:
+    return f"1 {xy} {sub} 100644 100644 100644 {HEAD_OID} {INDEX_OID} {path}"
+
+
+def renamed(xy: str, path: str, orig: str, score: str = "R100") -> str:
+    return f"2 {xy} N... 100644 100644 100644 {HEAD_OID} {INDEX_OID} {score} {path}\0{orig}"
+
+
+def unmerged(xy: str, path: str, sub: str = "N...") -> str:
+    return f"u {xy} {sub} 100644 100644 100644 100644 {'3' * 40} {'4' * 40} {'5' * 40} {path}"
+
+
+# Paths in -z output are never quoted, so they may hold spaces, arrows and newlines
+OUTPUT = "\0".join([
+    f"# branch.oid {HEAD_OID}",
+    "# branch.head main",
+    "# branch.upstream origin/main",
+    "# branch.ab +2 -3",
+    ordinary(".M", "src/app.py"),
+    ordinary("A.", "new file.txt"),
+    renamed("R.", "docs/new -> name.md", "docs/old\nname.md"),
+    renamed("C.", "copy.txt", "original.txt", score="C75"),
+    ordinary(".M", "vendor/lib", sub="SCMU"),
+    ordinary(".M", "vendor/other", sub="S.M."),
+    unmerged("UU", "conflict.txt"),
+    unmerged("AA", "both added.txt"),
+    "? untracked/file.txt",
+    "? caf\xe9.txt",
+    "! build/output.o",
+]).encode() + b"\0"
+
+
+def entries(snapshot):
+    return [
+        (e.kind, e.index, e.worktree, e.path, e.orig_path, e.head_oid, e.index_oid, e.submodule)
+        for e in snapshot.entries
+    ]
+
+
+def parse_in_chunks(output: bytes, size: int):
+    parser = PorcelainV2Parser()
+    for start in range(0, len(output), size):
+        parser.feed(output[start:start + size])
+    return parser.close()
+
+
+def test_parses_every_record_kind():
+    snapshot = parse_porcelain_v2(OUTPUT)
+    assert (snapshot.oid, snapshot.branch, snapshot.upstream, snapshot.ahead, snapshot.behind) == (
+        HEAD_OID, "main", "origin/main", 2, 3
+    )
+    assert entries(snapshot) == [
+        ("1", ".", "M", "src/app.py", None, HEAD_OID, INDEX_OID, None),
+        ("1", "A", ".", "new file.txt", None, HEAD_OID, INDEX_OID, None),
+        ("2", "R", ".", "docs/new -> name.md", "docs/old\nname.md", HEAD_OID, INDEX_OID, None),
+        ("2", "C", ".", "copy.txt", "original.txt", HEAD_OID, INDEX_OID, None),
+        ("1", ".", "M", "vendor/lib", None, HEAD_OID, INDEX_OID, "CMU"),
+        ("1", ".", "M", "vendor/other", None, HEAD_OID, INDEX_OID, ".M."),
+        ("u", "U", "U", "conflict.txt", None, None, None, None),
+        ("u", "A", "A", "both added.txt", None, None, None, None),
+        ("?", "?", "?", "untracked/file.txt", None, None, None, None),
+        ("?", "?", "?", "caf\xe9.txt", None, None, None, None),
+        ("!", "!", "!", "build/output.o", None, None, None, None),
+    ]
+    lib, other = snapshot.entries[4], snapshot.entries[5]
+    assert lib.submodule_commit_changed and lib.submodule_modified and lib.submodule_untracked
+    assert not other.submodule_commit_changed and other.submodule_modified and not other.submodule_untracked
+    assert snapshot.status_groups()["renamed"] == [
+        "docs/old\nname.md -> docs/new -> name.md", "original.txt -> copy.txt"
+    ]
+
+
+@pytest.mark.parametrize("size", list(range(1, 40)) + [97, 256])
+def test_chunk_boundaries_do_not_change_the_result(size):
+    # Small sizes split inside records, between a rename and its source path, and on NULs
+    assert entries(parse_in_chunks(OUTPUT, size)) == entries(parse_porcelain_v2(OUTPUT))
+
+
+def test_rename_source_in_the_next_chunk():
+    record = renamed("R.", "to.txt", "from.txt").encode() + b"\0"
+    split = record.index(b"\0") + 1
+    parser = PorcelainV2Parser()
+    parser.feed(record[:split])
+    parser.feed(record[split:])
+    assert entries(parser.close())[0][3:5] == ("to.txt", "from.txt")
+
+
+def test_last_record_without_nul():
+    snapshot = parse_porcelain_v2(OUTPUT[:-1])
+    assert snapshot.entries.paths[-1] == "build/output.o"
+
+
+def test_initial_commit_and_detached_head():
+    snapshot = parse_porcelain_v2(b"# branch.oid (initial)\0# branch.head (detached)\0")
+    assert snapshot.oid is None and snapshot.branch is None
+    assert snapshot.upstream is None and snapshot.ahead is None
+
+
+def test_sha256_object_names():
+    head, index = "a" * 64, "b" * 64
+    record = f"1 M. N... 100644 100644 100644 {head} {index} file.txt\0".encode()
+    entry = parse_porcelain_v2(record).entries[0]
+    assert (entry.path, entry.head_oid, entry.index_oid) == ("file.txt", head, index)
+
+
+def status(repo: str, *extra: str) -> bytes:
+    return git(repo, *SNAPSHOT_ARGS, *extra, text=False)
+
+
+def test_matches_git_status(tmp_path):
+    sub = init_repo(tmp_path / "sub")
+    write(sub, "lib.txt", "lib\n")
+    git(sub, "add", "lib.txt")
+    git(sub, "commit", "-q", "-m", "Library")
+
+    repo = init_repo(tmp_path / "repo")
+    write(repo, ".gitignore", "*.o\n")
+    write(repo, "conflict.txt", "base\n")
+    write(repo, "old name.txt", "a file long enough to be detected as renamed\n" * 4)
+    git(repo, "-c", "protocol.file.allow=always", "submodule", "add", "-q", sub, "vendor/sub")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "Base")
+
+    git(repo, "checkout", "-q", "-b", "other")
+    write(repo, "conflict.txt", "theirs\n")
+    git(repo, "commit", "-q", "-a", "-m", "Theirs")
+    git(repo, "checkout", "-q", "main")
+    write(repo, "conflict.txt", "ours\n")
+    git(repo, "commit", "-q", "-a", "-m", "Ours")
+    git(repo, "merge", "-q", "other", check=False)
+
+    git(repo, "mv", "old name.txt", "new\nname.txt")
+    write(repo, "vendor/sub/lib.txt", "changed inside the submodule\n")
+    write(repo, "vendor/sub/extra.txt", "untracked inside the submodule\n")
+    write(repo, "untracked dir/file.txt", "untracked\n")
+    write(repo, "build.o", "ignored\n")
+
+    output = status(repo, "--ignored")
+    snapshot = parse_in_chunks(output, 5)
+    assert entries(snapshot) == entries(parse_porcelain_v2(output))
+    assert snapshot.branch == "main"
+    assert snapshot.oid == git(repo, "rev-parse", "HEAD").strip()
+
+    by_path = {entry.path: entry for entry in snapshot.entries}
+    assert by_path["conflict.txt"].kind == "u"
+    assert (by_path["new\nname.txt"].kind, by_path["new\nname.txt"].orig_path) == ("2", "old name.txt")
+    assert by_path["vendor/sub"].submodule == ".MU"
+    assert by_path["untracked dir/"].kind == "?"
+    assert by_path["build.o"].kind == "!"
+    assert os.path.exists(os.path.join(repo, ".git", "MERGE_HEAD"))